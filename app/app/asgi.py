@@ -11,6 +11,12 @@ import os
 
 from django.core.asgi import get_asgi_application
 
+from core.db import prewarm
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
 application = get_asgi_application()
+
+# No-op unless the pooled backend is configured with a MIN_SIZE. The async
+# views' shared thread pool (ASYNC_VIEW_THREADS) draws on these.
+prewarm()
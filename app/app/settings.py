@@ -43,9 +43,11 @@ INSTALLED_APPS = [
     'drf_spectacular',
     'user',
     'recipe',
+    'job',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -55,6 +57,9 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Per-endpoint latency and query histograms, served at /metrics.
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED') == '1'
+
 ROOT_URLCONF = 'app.urls'
 
 TEMPLATES = [
@@ -75,20 +80,130 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'app.wsgi.application'
 
+# Threads per process that run the async recipe views' ORM work under ASGI;
+# each can hold a database connection (0 = Django's thread-sensitive thread).
+ASYNC_VIEW_THREADS = int(os.environ.get('ASYNC_VIEW_THREADS', 8))
+
 
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
+#
+# DB_CONN_MAX_AGE keeps a connection open per worker thread for that many
+# seconds (0 closes it after each request). DB_POOL=1 switches to a backend
+# that checks connections out of a bounded in-process pool instead; leave
+# DB_CONN_MAX_AGE at 0 with it so connections return to the pool.
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': (
+            'core.db.backends.postgresql_pool'
+            if os.environ.get('DB_POOL') == '1'
+            else 'django.db.backends.postgresql'
+        ),
         'HOST': os.environ.get('DB_HOST'),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 0)),
+        'POOL': {
+            'MAX_SIZE': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            'MIN_SIZE': int(os.environ.get('DB_POOL_MIN_SIZE', 0)),
+            'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+            'CHECK_AFTER': float(os.environ.get('DB_POOL_CHECK_AFTER', 30)),
+        },
     }
 }
 
+# Read replicas, as a comma separated list of hosts sharing the primary's
+# name and credentials. Recipe, tag and ingredient reads go to a replica
+# unless the request writes or the user wrote in the last
+# DB_REPLICA_STICKY_SECONDS, so users always read their own writes. Write
+# times are kept in the 'api' cache, so replicas are only read from when
+# API_CACHE_BACKEND is shared by every worker; with a per-process cache all
+# reads stay on the primary.
+
+DATABASE_REPLICAS = []
+
+for index, host in enumerate(filter(None, os.environ.get(
+    'DB_REPLICA_HOSTS', '',
+).split(','))):
+    alias = f'replica{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.db_router.PrimaryReplicaRouter']
+
+DB_REPLICA_STICKY_SECONDS = float(
+    os.environ.get('DB_REPLICA_STICKY_SECONDS', 5)
+)
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+#
+# The 'api' cache holds per-user API responses and the generation counters
+# that invalidate them. It defaults to a bounded per-process LocMemCache,
+# which is only coherent with a single worker process; with several workers
+# point API_CACHE_BACKEND/API_CACHE_LOCATION at a shared backend such as
+# Redis or memcached.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'api': {
+        'BACKEND': os.environ.get(
+            'API_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.environ.get('API_CACHE_LOCATION', 'api'),
+        'TIMEOUT': int(os.environ.get('API_CACHE_TIMEOUT', 300)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('API_CACHE_MAX_ENTRIES', 10000)),
+        },
+    },
+    # Token -> user lookups for CachedTokenAuthentication. Deleted tokens
+    # and deactivated users are only forgotten by the cache the change was
+    # made through, so the backend must be shared by every worker (Redis,
+    # Memcached, ...): with a per-process one a revoked token would keep
+    # working elsewhere until its entry expired. Off (DummyCache) unless
+    # AUTH_CACHE_BACKEND names one.
+    'auth': {
+        'BACKEND': os.environ.get(
+            'AUTH_CACHE_BACKEND',
+            'django.core.cache.backends.dummy.DummyCache',
+        ),
+        'LOCATION': os.environ.get('AUTH_CACHE_LOCATION', 'auth'),
+        'TIMEOUT': int(os.environ.get('AUTH_CACHE_TIMEOUT', 60)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('AUTH_CACHE_MAX_ENTRIES', 10000)),
+        },
+    },
+}
+
+
+# Password hashing
+# PBKDF2 iterations are pinned per environment; hashes stored with a different
+# count are upgraded on the next successful login. PASSWORD_HASH_WORKERS sizes
+# the process pool that runs login hashes off the request worker (0 = inline).
+
+PASSWORD_HASHERS = [
+    'user.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+
+PASSWORD_HASH_ITERATIONS = int(os.environ.get('PASSWORD_HASH_ITERATIONS', 260000))
+
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 0))
+
+AUTHENTICATION_BACKENDS = ['user.backends.PooledModelBackend']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -128,6 +243,21 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.environ.get('MEDIA_ROOT', str(BASE_DIR / 'media'))
+
+# Recipe images are streamed to a temporary file while uploading and
+# thumbnailed by RECIPE_IMAGE_WORKERS background threads (0 = inline).
+# Thumbnails are stored by content hash under RECIPE_THUMBNAIL_ROOT.
+RECIPE_IMAGE_MAX_BYTES = int(
+    os.environ.get('RECIPE_IMAGE_MAX_BYTES', 10 * 1024 * 1024)
+)
+RECIPE_IMAGE_WORKERS = int(os.environ.get('RECIPE_IMAGE_WORKERS', 2))
+RECIPE_THUMBNAIL_SIZE = int(os.environ.get('RECIPE_THUMBNAIL_SIZE', 320))
+RECIPE_THUMBNAIL_ROOT = os.environ.get(
+    'RECIPE_THUMBNAIL_ROOT', os.path.join(MEDIA_ROOT, 'thumbnails'),
+)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
@@ -138,3 +268,32 @@ AUTH_USER_MODEL = 'core.User'
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
+
+# Default page size of the cursor paginated list endpoints.
+API_PAGE_SIZE = int(os.environ.get('API_PAGE_SIZE', 50))
+
+# Upper bound for the ?page_size= query parameter on list endpoints.
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 200))
+
+# Largest number of recipes written per transaction by the bulk import
+# endpoint; ?batch_size= can lower it per request.
+RECIPE_IMPORT_BATCH_SIZE = int(os.environ.get('RECIPE_IMPORT_BATCH_SIZE', 500))
+
+# Rows fetched per server-side cursor round trip by the export endpoint.
+RECIPE_EXPORT_CHUNK_SIZE = int(os.environ.get('RECIPE_EXPORT_CHUNK_SIZE', 1000))
+
+# Background jobs (core.jobs, run by `manage.py run_worker`). Failed jobs
+# are retried JOB_MAX_ATTEMPTS times in all with exponential backoff, and
+# a running job whose worker has not reported within JOB_LEASE_SECONDS is
+# handed to another worker.
+JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', 3))
+JOB_RETRY_DELAY = float(os.environ.get('JOB_RETRY_DELAY', 10))
+JOB_RETRY_MAX_DELAY = float(os.environ.get('JOB_RETRY_MAX_DELAY', 600))
+JOB_LEASE_SECONDS = int(os.environ.get('JOB_LEASE_SECONDS', 600))
+JOB_WORKER_CONCURRENCY = int(os.environ.get('JOB_WORKER_CONCURRENCY', 2))
+JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', 1.0))
+
+# Rows removed per transaction by core.deletion, and seconds to sleep
+# between batches to keep replication lag down on large deletions.
+DELETION_BATCH_SIZE = int(os.environ.get('DELETION_BATCH_SIZE', 1000))
+DELETION_BATCH_PAUSE = float(os.environ.get('DELETION_BATCH_PAUSE', 0))
@@ -18,11 +18,18 @@ from drf_spectacular.views import (
     SpectacularSwaggerView,
 )
 
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
 
+from core import views as core_views
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('healthz', core_views.healthz, name='healthz'),
+    path('readyz', core_views.readyz, name='readyz'),
+    path('metrics', core_views.prometheus_metrics, name='metrics'),
     path('api/schema/', SpectacularAPIView.as_view(), name = 'api-schema'),
     path(
         'api/docs/',
@@ -31,4 +38,11 @@ urlpatterns = [
     ),
     path('api/user/', include('user.urls')),
     path('api/recipe/', include('recipe.urls')),  # this will include all of the URLs we defined inside our recipe_urls.py file. save and rerun the test.
+    path('api/job/', include('job.urls')),
 ]
+
+if settings.DEBUG:
+    urlpatterns += static(
+        settings.MEDIA_URL,
+        document_root=settings.MEDIA_ROOT,
+    )
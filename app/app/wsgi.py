@@ -11,6 +11,12 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
+from core.db import prewarm
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
 application = get_wsgi_application()
+
+# Fill the pool as the server process starts, before its first request.
+# No-op unless the pooled backend is configured with a MIN_SIZE.
+prewarm()
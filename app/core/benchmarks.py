@@ -0,0 +1,131 @@
+"""
+Helpers shared by the benchmark management commands.
+"""
+import random
+import statistics
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.db import connection
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+from recipe import bulk
+
+
+WORDS = (
+    'apple basil bean beef bread broccoli butter carrot cheese chicken '
+    'chili chocolate coconut cod corn cream curry egg garlic ginger honey '
+    'kale lamb lemon lentil lime mango mint mushroom noodle oat olive '
+    'onion orange pasta peanut pepper pork potato prawn pumpkin rice '
+    'salmon sesame spinach squash steak tofu tomato tuna vanilla yogurt '
+    'baked braised creamy crispy fried grilled roasted smoked spicy '
+    'steamed stewed sweet tangy quick easy classic rustic'
+).split()
+
+
+@contextmanager
+def throwaway_database(keepdb=False):
+    """Run the block against a test database instead of the real one."""
+    creation = connection.creation
+    old_name = connection.settings_dict['NAME']
+    creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+    try:
+        yield
+    finally:
+        creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+
+
+def random_text(rng, words):
+    """Return a string of random vocabulary words."""
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def seed_recipes(user, count, batch_size=10000, seed=0):
+    """Bulk insert count random recipes for user and return the count."""
+    rng = random.Random(seed)
+    created = 0
+    while created < count:
+        size = min(batch_size, count - created)
+        Recipe.objects.bulk_create([
+            Recipe(
+                user=user,
+                title=random_text(rng, 3).title(),
+                description=random_text(rng, 20),
+                time_minutes=rng.randint(5, 180),
+                price=Decimal(rng.randint(100, 9999)) / 100,
+            )
+            for _ in range(size)
+        ])
+        created += size
+    return created
+
+
+def seed_named(model, user, count, seed=0):
+    """Bulk insert count uniquely named tags or ingredients for user."""
+    rng = random.Random(seed)
+    return bulk.create_all(model, [
+        model(user=user, name=f'{random_text(rng, 1)} {index}')
+        for index in range(count)
+    ])
+
+
+def seed_links(field_name, recipe_ids, related, per_recipe, batch_size=10000,
+               seed=0):
+    """Link each recipe to per_recipe random objects of related."""
+    rng = random.Random(seed)
+    related_ids = [obj.pk for obj in related]
+    per_recipe = min(per_recipe, len(related_ids))
+    pairs = [
+        (recipe_id, related_id)
+        for recipe_id in recipe_ids
+        for related_id in rng.sample(related_ids, per_recipe)
+    ]
+    for start in range(0, len(pairs), batch_size):
+        bulk.add_links(
+            Recipe, field_name, pairs[start:start + batch_size],
+        )
+
+
+def seed_user(user, recipes, tags, ingredients, tags_per_recipe=3,
+              ingredients_per_recipe=5, seed=0):
+    """Seed a user's recipes, tags and ingredients and link them."""
+    seed_recipes(user, recipes, seed=seed)
+    recipe_ids = list(
+        Recipe.objects.filter(user=user).values_list('id', flat=True)
+    )
+    seed_links(
+        'tags', recipe_ids, seed_named(Tag, user, tags, seed),
+        tags_per_recipe, seed=seed,
+    )
+    seed_links(
+        'ingredients', recipe_ids,
+        seed_named(Ingredient, user, ingredients, seed),
+        ingredients_per_recipe, seed=seed,
+    )
+
+
+def time_call(func, runs):
+    """Call func runs times and return the wall times in milliseconds."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def summarize(timings):
+    """Return median/p95/p99/max of timings in milliseconds."""
+    ordered = sorted(timings)
+    return {
+        'runs': len(ordered),
+        'median_ms': round(statistics.median(ordered), 3),
+        'p95_ms': round(ordered[int(0.95 * (len(ordered) - 1))], 3),
+        'p99_ms': round(ordered[int(0.99 * (len(ordered) - 1))], 3),
+        'max_ms': round(ordered[-1], 3),
+    }
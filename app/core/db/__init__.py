@@ -0,0 +1,16 @@
+"""
+Database helpers shared by the app's backends and commands.
+"""
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def prewarm(using=DEFAULT_DB_ALIAS, count=None):
+    """Fill the connection pool of using, if its backend has one.
+
+    Opens up to count connections (the pool's MIN_SIZE by default) and
+    returns how many were created, or None without a pooled backend.
+    """
+    connection = connections[using]
+    if not hasattr(connection, 'prewarm_pool'):
+        return None
+    return connection.prewarm_pool(count)
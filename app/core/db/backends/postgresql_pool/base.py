@@ -0,0 +1,139 @@
+"""
+PostgreSQL backend that checks connections out of an in-process pool.
+
+Configure it with a POOL entry next to OPTIONS in DATABASES:
+
+    'POOL': {'MAX_SIZE': 10, 'MIN_SIZE': 2, 'TIMEOUT': 10, 'CHECK_AFTER': 30}
+
+Keep CONN_MAX_AGE at 0 so Django hands the connection back to the pool at
+the end of each request instead of pinning it to a thread.
+"""
+import os
+import threading
+
+import psycopg2
+import psycopg2.extensions
+import psycopg2.extras
+
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base
+
+from core.db.backends.postgresql_pool.creation import DatabaseCreation
+from core.db.pool import ConnectionPool
+
+
+_pools = {}
+_pools_pid = None
+_pools_lock = threading.Lock()
+
+
+def _connect(conn_params, options):
+    """Open a raw connection the way Django's backend does."""
+    connection = psycopg2.connect(**conn_params)
+    if 'isolation_level' in options:
+        connection.set_session(isolation_level=options['isolation_level'])
+    psycopg2.extras.register_default_jsonb(
+        conn_or_curs=connection, loads=lambda x: x,
+    )
+    return connection
+
+
+def _check(connection):
+    """Raise if a pooled connection can no longer run queries."""
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+
+
+def get_pool(key, factory):
+    """Return the pool for key in this process, creating it if needed."""
+    global _pools_pid
+    with _pools_lock:
+        # Sockets inherited across fork() must not be shared.
+        if _pools_pid != os.getpid():
+            _pools.clear()
+            _pools_pid = os.getpid()
+        if key not in _pools:
+            _pools[key] = factory()
+        return _pools[key]
+
+
+def pool_stats():
+    """Return {alias: stats} for the pools in this process.
+
+    An alias whose connection parameters changed has several pools;
+    their stats are summed.
+    """
+    with _pools_lock:
+        pools = list(_pools.items()) if _pools_pid == os.getpid() else []
+    stats = {}
+    for (alias, _), pool in pools:
+        totals = stats.setdefault(alias, {})
+        for name, value in pool.stats().items():
+            totals[name] = totals.get(name, 0) + value
+    return stats
+
+
+def close_pools():
+    """Close the idle connections of every pool in this process."""
+    with _pools_lock:
+        pools = list(_pools.values()) if _pools_pid == os.getpid() else []
+    for pool in pools:
+        pool.close_all()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pool = None
+
+    def get_pool(self, conn_params=None):
+        """Return the pool serving this alias's connection parameters."""
+        if conn_params is None:
+            conn_params = self.get_connection_params()
+        config = self.settings_dict.get('POOL', {})
+        options = self.settings_dict['OPTIONS']
+        key = (self.alias, repr(sorted(conn_params.items())))
+        return get_pool(key, lambda: ConnectionPool(
+            lambda: _connect(conn_params, options),
+            max_size=config.get('MAX_SIZE', 10),
+            min_size=config.get('MIN_SIZE', 0),
+            timeout=config.get('TIMEOUT', 10.0),
+            check=_check,
+            check_after=config.get('CHECK_AFTER', 30.0),
+        ))
+
+    def prewarm_pool(self, count=None):
+        """Open up to count (default MIN_SIZE) pooled connections."""
+        return self.get_pool().prewarm(count)
+
+    def get_new_connection(self, conn_params):
+        if self.alias == NO_DB_ALIAS:
+            # Used briefly to create and drop databases; never pooled.
+            return super().get_new_connection(conn_params)
+        self._pool = self.get_pool(conn_params)
+        connection = self._pool.acquire()
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level', connection.isolation_level,
+        )
+        return connection
+
+    def _close(self):
+        pool, self._pool = self._pool, None
+        if pool is None:
+            return super()._close()
+        pool.release(self.connection, discard=not self._reset_connection())
+
+    def _reset_connection(self):
+        """Roll back leftover state; return False if unusable."""
+        connection = self.connection
+        if connection.closed:
+            return False
+        try:
+            status = connection.get_transaction_status()
+            if status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+        except psycopg2.Error:
+            return False
+        return True
@@ -0,0 +1,10 @@
+from django.db.backends.postgresql import creation
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Pooled connections to the test database would block DROP DATABASE.
+        from core.db.backends.postgresql_pool.base import close_pools
+        close_pools()
+        super()._destroy_test_db(test_database_name, verbosity)
@@ -0,0 +1,142 @@
+"""
+A thread-safe pool of database connections.
+"""
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection frees up within the acquire timeout."""
+
+
+class ConnectionPool:
+    """Bounded pool of reusable connections.
+
+    connect() opens a new connection, check(conn) raises if an idle
+    connection is no longer usable and close(conn) disposes of one.
+    Idle connections are health checked on checkout once they have been
+    idle for check_after seconds.
+    """
+
+    def __init__(self, connect, max_size=10, min_size=0, timeout=10.0,
+                 check=None, check_after=30.0, close=None):
+        self.connect = connect
+        self.check = check
+        self.close = close or (lambda conn: conn.close())
+        self.max_size = max_size
+        self.min_size = min_size
+        self.timeout = timeout
+        self.check_after = check_after
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._counters = dict.fromkeys((
+            'acquired', 'created', 'reused', 'discarded', 'failed_checks',
+            'timeouts',
+        ), 0)
+        self._wait_seconds = 0.0
+
+    def acquire(self, timeout=None):
+        """Check out a connection, opening one if none is idle."""
+        start = time.monotonic()
+        timeout = self.timeout if timeout is None else timeout
+        if not self._slots.acquire(timeout=timeout):
+            self._count('timeouts')
+            raise PoolTimeout(
+                f'No connection available within {timeout}s '
+                f'(max_size={self.max_size}).'
+            )
+        try:
+            conn = self._pop_idle()
+            if conn is None:
+                conn = self.connect()
+                self._count('created')
+            else:
+                self._count('reused')
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._in_use += 1
+            self._counters['acquired'] += 1
+            self._wait_seconds += time.monotonic() - start
+        return conn
+
+    def release(self, conn, discard=False):
+        """Return a connection to the pool, or close it if discard."""
+        try:
+            if discard:
+                self._discard(conn)
+            else:
+                with self._lock:
+                    self._idle.append((conn, time.monotonic()))
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._slots.release()
+
+    def prewarm(self, count=None):
+        """Open and check connections until count are idle.
+
+        Defaults to min_size and returns the number of new connections.
+        """
+        count = min(self.min_size if count is None else count, self.max_size)
+        created = self._counters['created']
+        conns = []
+        try:
+            for _ in range(count):
+                conns.append(self.acquire())
+        finally:
+            for conn in conns:
+                self.release(conn)
+        return self._counters['created'] - created
+
+    def close_all(self):
+        """Close every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, deque()
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def stats(self):
+        """Return a snapshot of the pool's counters and gauges."""
+        with self._lock:
+            return {
+                **self._counters,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'max_size': self.max_size,
+                'wait_seconds': round(self._wait_seconds, 6),
+            }
+
+    def _pop_idle(self):
+        """Return the most recently used healthy idle connection."""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                conn, released_at = self._idle.pop()
+            if (self.check is None or
+                    time.monotonic() - released_at < self.check_after):
+                return conn
+            try:
+                self.check(conn)
+            except Exception:
+                self._count('failed_checks')
+                self._discard(conn)
+            else:
+                return conn
+
+    def _discard(self, conn):
+        """Close a connection that leaves the pool."""
+        self._count('discarded')
+        try:
+            self.close(conn)
+        except Exception:
+            pass
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
@@ -0,0 +1,66 @@
+"""
+Database router sending recipe reads to replicas.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+REPLICATED_MODELS = {'core.recipe', 'core.tag', 'core.ingredient'}
+
+_pinned = ContextVar('db_pinned', default=False)
+
+
+def pin_primary():
+    """Send reads to the primary for the rest of the current scope."""
+    _pinned.set(True)
+
+
+@contextmanager
+def routing_scope():
+    """Undo any pin_primary() made inside the block when it exits."""
+    token = _pinned.set(_pinned.get())
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+@contextmanager
+def use_primary():
+    """Send reads inside the block to the primary."""
+    with routing_scope():
+        pin_primary()
+        yield
+
+
+class PrimaryReplicaRouter:
+    """Read recipes, tags and ingredients from DATABASE_REPLICAS.
+
+    Everything else, every write, pinned scopes and reads made inside a
+    transaction on the primary use the default database.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (not replicas or
+                model._meta.label_lower not in REPLICATED_MODELS or
+                _pinned.get() or
+                connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return None
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
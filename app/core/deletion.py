@@ -0,0 +1,161 @@
+"""
+Chunked deletion of users and heavily linked tags and ingredients.
+
+Django's delete() collects every dependent object into memory and removes
+them in one transaction. Here each table is emptied in primary key batches
+with plain DELETE ... WHERE id IN (...) statements, one short transaction
+per batch, children before parents. A deletion that stops part way can be
+run again and carries on with what is left.
+"""
+import time
+from collections import namedtuple
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import router, transaction
+from django.utils import timezone
+
+from core.models import Ingredient, Recipe, Tag
+from recipe import bulk, images
+from recipe.cache import bump_generation
+
+
+# delete(batch, using), if set, replaces the plain DELETE of a batch and
+# returns the number of rows removed.
+Step = namedtuple('Step', ['label', 'queryset', 'delete'], defaults=[None])
+
+
+def unlink_recipes(field_name, links, using):
+    """Delete through rows, updating the recipes they linked."""
+    recipe_ids = list(links.values_list('recipe_id', flat=True).distinct())
+    recipes = Recipe.objects.filter(pk__in=recipe_ids)
+    owners = set(recipes.values_list('user_id', flat=True).distinct())
+    recipes.update(updated_at=timezone.now())
+    deleted = links._raw_delete(using)
+    bulk.refresh_summaries(field_name, recipe_ids)
+    for user_id in owners:
+        bump_generation(user_id)
+    return deleted
+
+
+def uncount_links(field_name, links, using):
+    """Delete through rows, taking them off the related recipe counts."""
+    target = Recipe._meta.get_field(field_name).m2m_reverse_field_name()
+    related_ids = list(links.values_list(f'{target}_id', flat=True))
+    deleted = links._raw_delete(using)
+    bulk.adjust_counts(field_name, related_ids, -1)
+    return deleted
+
+
+def delete_recipes(recipes, using):
+    """Delete recipes, removing their image files after the batch."""
+    files = list(recipes.values_list('image', 'thumbnail'))
+    deleted = recipes._raw_delete(using)
+    images.delete_files(files, using=using)
+    return deleted
+
+
+def user_steps(user_id):
+    """Return the steps that delete everything owned by the user."""
+    tag_links = Recipe.tags.through.objects
+    ingredient_links = Recipe.ingredients.through.objects
+    return [
+        Step(
+            'recipe_tags',
+            tag_links.filter(recipe__user_id=user_id),
+            partial(uncount_links, 'tags'),
+        ),
+        Step(
+            'recipe_ingredients',
+            ingredient_links.filter(recipe__user_id=user_id),
+            partial(uncount_links, 'ingredients'),
+        ),
+        # Links from other users' recipes, should any exist.
+        Step(
+            'tag_links',
+            tag_links.filter(tag__user_id=user_id),
+            partial(unlink_recipes, 'tags'),
+        ),
+        Step(
+            'ingredient_links',
+            ingredient_links.filter(ingredient__user_id=user_id),
+            partial(unlink_recipes, 'ingredients'),
+        ),
+        Step(
+            'recipes', Recipe.objects.filter(user_id=user_id), delete_recipes,
+        ),
+        Step('tags', Tag.objects.filter(user_id=user_id)),
+        Step('ingredients', Ingredient.objects.filter(user_id=user_id)),
+    ]
+
+
+def link_steps(instance):
+    """Return the steps that unlink a tag or ingredient from its recipes."""
+    field_name = 'tags' if isinstance(instance, Tag) else 'ingredients'
+    field = Recipe._meta.get_field(field_name)
+    links = field.remote_field.through.objects.filter(
+        **{f'{field.m2m_reverse_field_name()}_id': instance.pk}
+    )
+    return [Step(
+        f'recipe_{field_name}', links, partial(unlink_recipes, field_name),
+    )]
+
+
+class Deletion:
+    """Run deletion steps in bounded batches.
+
+    progress, if given, is called after every batch with the current step
+    and the running totals; pass the totals of an earlier, interrupted run
+    as deleted to keep counting from there.
+    """
+
+    def __init__(self, steps, batch_size=None, pause=None, progress=None,
+                 deleted=None):
+        self.steps = steps
+        self.batch_size = batch_size or settings.DELETION_BATCH_SIZE
+        self.pause = settings.DELETION_BATCH_PAUSE if pause is None else pause
+        self.progress = progress
+        self.deleted = dict(deleted or {})
+
+    def run(self):
+        """Delete every step's rows and return the totals by step."""
+        for step in self.steps:
+            self.deleted.setdefault(step.label, 0)
+            while self._delete_batch(step):
+                if self.progress is not None:
+                    self.progress(step=step.label, deleted=self.deleted)
+                if self.pause:
+                    time.sleep(self.pause)  # let replicas catch up
+        return self.deleted
+
+    def _delete_batch(self, step):
+        model = step.queryset.model
+        using = router.db_for_write(model)
+        with transaction.atomic(using=using):
+            ids = list(
+                step.queryset.using(using).order_by().values_list(
+                    'pk', flat=True,
+                )[:self.batch_size]
+            )
+            if not ids:
+                return 0
+            batch = model._base_manager.using(using).filter(pk__in=ids)
+            if step.delete is not None:
+                deleted = step.delete(batch, using)
+            else:
+                deleted = batch._raw_delete(using)
+        self.deleted[step.label] += deleted
+        return deleted
+
+
+def delete_user(user_id, **kwargs):
+    """Delete the user and everything they own in batches.
+
+    Takes the Deletion options and returns the totals by step.
+    """
+    deleted = Deletion(user_steps(user_id), **kwargs).run()
+    # Only small tables (tokens, jobs, ...) are left for the collector.
+    get_user_model().objects.filter(pk=user_id).delete()
+    bump_generation(user_id)
+    return deleted
@@ -0,0 +1,25 @@
+"""
+Database probes shared by wait_for_db and the health endpoints.
+"""
+import random
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def probe_database(using=DEFAULT_DB_ALIAS):
+    """Open a connection to the database and run a trivial query."""
+    with connections[using].cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+
+
+def backoff_delays(initial=0.01, maximum=2.0, factor=2.0):
+    """Yield jittered, exponentially growing delays in seconds.
+
+    Each delay is drawn from the upper half of the current step, so
+    replicas started together do not retry in lockstep.
+    """
+    step = initial
+    while True:
+        yield random.uniform(step / 2, step)
+        step = min(step * factor, maximum)
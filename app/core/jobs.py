@@ -0,0 +1,234 @@
+"""
+Database-backed background jobs.
+
+Tasks are plain functions registered with @task in an app's tasks.py and
+queued with enqueue(). `manage.py run_worker` claims queued rows with
+SELECT ... FOR UPDATE SKIP LOCKED, so any number of workers can share the
+table, and retries failures with backoff up to the job's max_attempts.
+"""
+import logging
+import os
+import socket
+import threading
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from core.health import backoff_delays
+from core.models import Job
+
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+
+def task(name):
+    """Register the decorated function as the task called name.
+
+    The function is called with the Job first and the job's kwargs, and
+    its return value, which must be JSON serializable, is the job result.
+    """
+    def register(func):
+        TASKS[name] = func
+        func.task_name = name
+        return func
+    return register
+
+
+def discover_tasks():
+    """Import the tasks module of every installed app."""
+    autodiscover_modules('tasks')
+
+
+def enqueue(func, owner=None, delay=0, max_attempts=None, **kwargs):
+    """Queue a call of the task func and return its Job.
+
+    The job becomes visible to workers when the current transaction
+    commits, so it never runs against data the caller rolls back.
+    """
+    return Job.objects.create(
+        name=func.task_name,
+        kwargs=kwargs,
+        user=owner,
+        run_after=timezone.now() + timedelta(seconds=delay),
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )
+
+
+def report_progress(job, **progress):
+    """Record progress on a running job; this also renews its lease."""
+    job.progress.update(progress)
+    job.locked_at = timezone.now()
+    Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(
+        progress=job.progress, locked_at=job.locked_at,
+    )
+
+
+def retry_delay(attempts):
+    """Return the seconds to wait before the next attempt."""
+    delays = backoff_delays(
+        settings.JOB_RETRY_DELAY, settings.JOB_RETRY_MAX_DELAY,
+    )
+    return next(islice(delays, attempts - 1, None))
+
+
+def claim(worker, limit=1):
+    """Lock up to limit runnable jobs for worker and return them."""
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            Job.objects.select_for_update(skip_locked=True).filter(
+                status=Job.Status.QUEUED, run_after__lte=now,
+            ).order_by('run_after', 'id')[:limit]
+        )
+        Job.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status=Job.Status.RUNNING,
+            locked_by=worker,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+        )
+    for job in jobs:
+        job.status = Job.Status.RUNNING
+        job.locked_by = worker
+        job.locked_at = now
+        job.attempts += 1
+    return jobs
+
+
+def reclaim_stale():
+    """Requeue running jobs whose worker stopped renewing the lease."""
+    cutoff = timezone.now() - timedelta(seconds=settings.JOB_LEASE_SECONDS)
+    stale = Job.objects.filter(
+        status=Job.Status.RUNNING, locked_at__lt=cutoff,
+    )
+    stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.Status.FAILED, error='Worker lost.', locked_by='',
+    )
+    return stale.update(status=Job.Status.QUEUED, locked_by='')
+
+
+def _finish(job, **fields):
+    # Matching locked_by means a worker whose lease expired and whose job
+    # was handed to another worker can't overwrite the newer outcome.
+    for name, value in fields.items():
+        setattr(job, name, value)
+    Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(
+        locked_at=None, updated_at=timezone.now(), **fields,
+    )
+
+
+def run_job(job):
+    """Run a claimed job and record its outcome."""
+    func = TASKS.get(job.name)
+    try:
+        if func is None:
+            raise LookupError(f'No task is registered as {job.name!r}.')
+        result = func(job, **job.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning('Job %s failed: %s', job.pk, error)
+        if job.attempts < job.max_attempts:
+            _finish(
+                job,
+                status=Job.Status.QUEUED,
+                error=error,
+                run_after=timezone.now() + timedelta(
+                    seconds=retry_delay(job.attempts),
+                ),
+            )
+        else:
+            _finish(job, status=Job.Status.FAILED, error=error)
+    else:
+        _finish(job, status=Job.Status.SUCCEEDED, result=result, error='')
+    return job
+
+
+class Worker:
+    """Claim and run jobs with up to concurrency threads.
+
+    A concurrency of 0 runs jobs one at a time in the calling thread.
+    """
+
+    def __init__(self, concurrency=1, poll_interval=1.0, name=None):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.name = name or f'{socket.gethostname()}:{os.getpid()}'
+        self.processed = 0
+        self._stopping = threading.Event()
+
+    def stop(self):
+        """Finish the running jobs and then return from run()."""
+        self._stopping.set()
+
+    def run(self, burst=False, max_jobs=None):
+        """Process jobs until stopped, or until idle when burst is set."""
+        discover_tasks()
+        reclaim_stale()
+        if self.concurrency <= 0:
+            self._run_inline(burst, max_jobs)
+        else:
+            self._run_threaded(burst, max_jobs)
+        return self.processed
+
+    def _budget(self, max_jobs, free):
+        if max_jobs is None:
+            return free
+        return min(free, max_jobs - self.processed)
+
+    def _run_inline(self, burst, max_jobs):
+        while not self._stopping.is_set():
+            limit = self._budget(max_jobs, 1)
+            jobs = claim(self.name, limit) if limit > 0 else []
+            if not jobs:
+                if burst or limit <= 0:
+                    return
+                reclaim_stale()
+                self._stopping.wait(self.poll_interval)
+                continue
+            run_job(jobs[0])
+            self.processed += 1
+
+    def _run_threaded(self, burst, max_jobs):
+        running = set()
+        with ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix='job',
+        ) as pool:
+            while not self._stopping.is_set():
+                limit = self._budget(
+                    max_jobs, self.concurrency - len(running),
+                )
+                jobs = claim(self.name, limit) if limit > 0 else []
+                for job in jobs:
+                    running.add(pool.submit(self._run_in_thread, job))
+                    self.processed += 1
+                if not jobs and not running:
+                    if burst or (max_jobs is not None and limit <= 0):
+                        return
+                    reclaim_stale()
+                if running:
+                    done, running = wait(
+                        running,
+                        timeout=self.poll_interval,
+                        return_when=FIRST_COMPLETED,
+                    )
+                elif not jobs:
+                    self._stopping.wait(self.poll_interval)
+            wait(running)
+
+    @staticmethod
+    def _run_in_thread(job):
+        try:
+            run_job(job)
+        except Exception:
+            # The outcome wasn't saved; the lease expiring requeues the job.
+            logger.exception('Could not record the outcome of job %s', job.pk)
+        finally:
+            connection.close()  # one connection per job thread otherwise
@@ -0,0 +1,304 @@
+"""
+Django command to benchmark every recipe and user API endpoint.
+"""
+import itertools
+import json
+import subprocess
+import time
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    CaptureQueriesContext,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+
+from core import benchmarks, deletion
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+
+
+PASSWORD = 'benchmark-pass123'
+
+
+class Endpoint:
+    """An API call to time, with optional untimed per-run setup."""
+
+    def __init__(self, name, call, setup=None):
+        self.name = name
+        self.call = call
+        self.setup = setup or (lambda: None)
+
+
+class Command(BaseCommand):
+    """Seed a throwaway database and time every API endpoint."""
+
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1)
+        parser.add_argument('--recipes', type=int, default=1000)
+        parser.add_argument('--tags', type=int, default=50)
+        parser.add_argument('--ingredients', type=int, default=100)
+        parser.add_argument('--tags-per-recipe', type=int, default=3)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=5)
+        parser.add_argument('--runs', type=int, default=50)
+        parser.add_argument(
+            '--endpoints', nargs='+', default=None,
+            help='Only run these endpoints (see the output for names).',
+        )
+        parser.add_argument(
+            '--cached', action='store_true',
+            help='Keep the response cache warm instead of clearing it.',
+        )
+        parser.add_argument('--output', help='Write the results as JSON.')
+        parser.add_argument(
+            '--compare', help='Baseline JSON to report differences against.',
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=20,
+            help='Median slowdown in percent reported as a regression.',
+        )
+        parser.add_argument(
+            '--fail-on-regression', action='store_true',
+            help='Exit with an error when any endpoint regressed.',
+        )
+        parser.add_argument(
+            '--in-place', action='store_true',
+            help='Use the configured database instead of a test database.',
+        )
+        parser.add_argument('--keepdb', action='store_true')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        # As under the test runner: DEBUG off and the test client's host
+        # allowed. Already the case when called from a test.
+        try:
+            setup_test_environment(debug=False)
+        except RuntimeError:
+            teardown = False
+        else:
+            teardown = True
+        try:
+            if options['in_place']:
+                results = self._run(options)
+            else:
+                with benchmarks.throwaway_database(options['keepdb']):
+                    results = self._run(options)
+        finally:
+            if teardown:
+                teardown_test_environment()
+
+        report = {'meta': self._meta(options), 'results': results}
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2, sort_keys=True)
+        if options['compare']:
+            self._compare(results, options)
+
+    def _run(self, options):
+        """Seed the database and time each endpoint."""
+        users = get_user_model().objects
+        for pk in users.filter(
+            email__endswith='@benchmark.example.com',
+        ).values_list('pk', flat=True):
+            deletion.delete_user(pk)
+        user = None
+        for index in range(options['users']):
+            seeded = users.create_user(
+                email=f'user{index}@benchmark.example.com',
+                password=PASSWORD,
+            )
+            start = time.perf_counter()
+            benchmarks.seed_user(
+                seeded, options['recipes'], options['tags'],
+                options['ingredients'], options['tags_per_recipe'],
+                options['ingredients_per_recipe'], seed=index,
+            )
+            self.stdout.write(
+                f'Seeded {seeded.email} in {time.perf_counter() - start:.1f}s'
+            )
+            user = user or seeded
+
+        client = APIClient()
+        client.force_authenticate(user)
+        results = {}
+        for endpoint in self._endpoints(user, client):
+            if options['endpoints'] and (
+                    endpoint.name not in options['endpoints']):
+                continue
+            results[endpoint.name] = stats = self._measure(
+                endpoint, options['runs'], options['cached'],
+            )
+            self.stdout.write(
+                f'{endpoint.name:28} median={stats["median_ms"]:9.3f}ms '
+                f'p95={stats["p95_ms"]:9.3f}ms p99={stats["p99_ms"]:9.3f}ms '
+                f'{stats["throughput_rps"]:8.1f}/s '
+                f'queries={stats["queries"]}'
+            )
+        return results
+
+    def _measure(self, endpoint, runs, cached):
+        """Time runs calls of endpoint after one warm-up call."""
+        cache = caches['api']
+        endpoint.call(endpoint.setup())
+        timings = []
+        queries = []
+        for _ in range(runs):
+            arg = endpoint.setup()
+            if not cached:
+                cache.clear()
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                res = endpoint.call(arg)
+                timings.append((time.perf_counter() - start) * 1000)
+            if res.status_code >= 400:
+                raise CommandError(
+                    f'{endpoint.name} returned {res.status_code}: '
+                    f'{getattr(res, "data", res.content[:200])}'
+                )
+            queries.append(len(captured))
+        stats = benchmarks.summarize(timings)
+        stats['throughput_rps'] = round(runs * 1000 / sum(timings), 1)
+        stats['queries'] = max(queries)
+        return stats
+
+    def _endpoints(self, user, client):
+        """Return the endpoints to benchmark for user."""
+        recipe = Recipe.objects.filter(user=user).order_by('id').first()
+        tag = Tag.objects.filter(user=user).order_by('id').first()
+        ingredient = Ingredient.objects.filter(user=user).first()
+        recipes_url = reverse('recipe:recipe-list')
+        recipe_url = reverse('recipe:recipe-detail', args=[recipe.id])
+        tag_url = reverse('recipe:tag-detail', args=[tag.id])
+        ingredient_url = reverse(
+            'recipe:ingredient-detail', args=[ingredient.id],
+        )
+        emails = (f'new{i}@benchmark.example.com' for i in itertools.count())
+        payload = {
+            'title': 'Benchmark recipe', 'time_minutes': 10,
+            'price': '5.00', 'tags': [{'name': tag.name}],
+            'ingredients': [{'name': ingredient.name}],
+        }
+
+        def new_recipe():
+            return Recipe.objects.create(
+                user=user, title='Doomed', time_minutes=1, price='1.00',
+            ).id
+
+        def new_tag():
+            return Tag.objects.create(user=user, name='Doomed').id
+
+        def export(_):
+            res = client.get(reverse('recipe:recipe-export'))
+            b''.join(res.streaming_content)
+            return res
+
+        return [
+            Endpoint('recipe.list', lambda _: client.get(recipes_url)),
+            Endpoint('recipe.list.filtered', lambda _: client.get(
+                recipes_url, {'tags': tag.id, 'ingredients': ingredient.id},
+            )),
+            Endpoint('recipe.list.search', lambda _: client.get(
+                recipes_url, {'search': tag.name.split()[0]},
+            )),
+            Endpoint('recipe.retrieve', lambda _: client.get(recipe_url)),
+            Endpoint('recipe.create', lambda _: client.post(
+                recipes_url, payload, format='json',
+            )),
+            Endpoint('recipe.partial_update', lambda _: client.patch(
+                recipe_url, {'title': 'Renamed', 'tags': [{'name': 'Fresh'}]},
+                format='json',
+            )),
+            Endpoint('recipe.destroy', lambda pk: client.delete(
+                reverse('recipe:recipe-detail', args=[pk]),
+            ), setup=new_recipe),
+            Endpoint('recipe.export', export),
+            Endpoint('tag.list', lambda _: client.get(
+                reverse('recipe:tag-list'),
+            )),
+            Endpoint('tag.partial_update', lambda _: client.patch(
+                tag_url, {'name': tag.name},
+            )),
+            Endpoint('tag.destroy', lambda pk: client.delete(
+                reverse('recipe:tag-detail', args=[pk]),
+            ), setup=new_tag),
+            Endpoint('ingredient.list', lambda _: client.get(
+                reverse('recipe:ingredient-list'),
+            )),
+            Endpoint('ingredient.partial_update', lambda _: client.patch(
+                ingredient_url, {'name': ingredient.name},
+            )),
+            Endpoint('user.create', lambda _: APIClient().post(
+                reverse('user:create'),
+                {'email': next(emails), 'password': PASSWORD, 'name': 'New'},
+            )),
+            Endpoint('user.token', lambda _: APIClient().post(
+                reverse('user:token'),
+                {'email': user.email, 'password': PASSWORD},
+            )),
+            Endpoint('user.me', lambda _: client.get(reverse('user:me'))),
+            Endpoint('user.me.partial_update', lambda _: client.patch(
+                reverse('user:me'), {'name': 'Benchmark'},
+            )),
+        ]
+
+    def _meta(self, options):
+        """Describe the environment the results were measured in."""
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                capture_output=True, text=True, check=True,
+                cwd=settings.BASE_DIR,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        keys = (
+            'users', 'recipes', 'tags', 'ingredients', 'tags_per_recipe',
+            'ingredients_per_recipe', 'runs', 'cached',
+        )
+        return {
+            'commit': commit,
+            'timestamp': timezone.now().isoformat(),
+            'vendor': connection.vendor,
+            'django': django.get_version(),
+            'options': {key: options[key] for key in keys},
+        }
+
+    def _compare(self, current, options):
+        """Print median and query changes against a baseline report."""
+        with open(options['compare']) as baseline_file:
+            baseline = json.load(baseline_file)['results']
+        regressions = []
+        for name, stats in current.items():
+            before = baseline.get(name)
+            if before is None:
+                continue
+            change = (
+                (stats['median_ms'] - before['median_ms'])
+                / before['median_ms'] * 100
+            )
+            flag = ''
+            if (change > options['threshold'] or
+                    stats['queries'] > before['queries']):
+                flag = '  REGRESSION'
+                regressions.append(name)
+            self.stdout.write(
+                f'{name:28} {before["median_ms"]:9.3f}ms -> '
+                f'{stats["median_ms"]:9.3f}ms ({change:+6.1f}%) '
+                f'queries {before["queries"]} -> {stats["queries"]}{flag}'
+            )
+        if regressions and options['fail_on_regression']:
+            raise CommandError(f'Regressed: {", ".join(regressions)}')
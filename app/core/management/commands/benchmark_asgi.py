@@ -0,0 +1,151 @@
+"""
+Django command to compare WSGI and ASGI serving under slow clients.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+
+from core import benchmarks, deletion
+
+
+BENCHMARK_EMAIL = 'benchmark-asgi@example.com'
+HOST = 'localhost'
+
+
+class Command(BaseCommand):
+    """Serve the recipe list over WSGI threads and over ASGI."""
+
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument(
+            '--threads', type=int, default=4,
+            help='WSGI worker threads.',
+        )
+        parser.add_argument(
+            '--client-delay', type=float, default=0.2,
+            help='Seconds a slow client takes to read each response.',
+        )
+        parser.add_argument('--recipes', type=int, default=100)
+        parser.add_argument(
+            '--in-place', action='store_true',
+            help='Use the configured database instead of a test database.',
+        )
+        parser.add_argument('--keepdb', action='store_true')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if options['in_place']:
+            self._run(options)
+        else:
+            with benchmarks.throwaway_database(options['keepdb']):
+                self._run(options)
+
+    def _run(self, options):
+        """Seed the benchmark user and time both server models."""
+        users = get_user_model().objects
+        for pk in users.filter(email=BENCHMARK_EMAIL).values_list(
+            'pk', flat=True,
+        ):
+            deletion.delete_user(pk)
+        user = users.create_user(email=BENCHMARK_EMAIL)
+        benchmarks.seed_recipes(user, options['recipes'])
+        self.auth = f'Token {Token.objects.create(user=user)}'
+        try:
+            self._report('wsgi', self._run_wsgi, options)
+            self._report('asgi', self._run_asgi, options)
+        finally:
+            deletion.delete_user(user.pk)
+
+    def _report(self, name, run, options):
+        """Run one server model and print its throughput and latency."""
+        start = time.perf_counter()
+        timings = run(options)
+        elapsed = time.perf_counter() - start
+        stats = benchmarks.summarize(timings)
+        self.stdout.write(
+            f'{name} {stats["runs"]} requests in {elapsed:.2f}s '
+            f'({stats["runs"] / elapsed:.1f}/s) '
+            f'median={stats["median_ms"]}ms p99={stats["p99_ms"]}ms'
+        )
+
+    def _run_wsgi(self, options):
+        """Serve requests from a fixed number of WSGI worker threads."""
+        handler = WSGIHandler()
+        workers = threading.BoundedSemaphore(options['threads'])
+        path = reverse('recipe:recipe-list')
+        delay = options['client_delay']
+
+        def request(_):
+            start = time.perf_counter()
+            environ = {
+                'REQUEST_METHOD': 'GET',
+                'PATH_INFO': path,
+                'QUERY_STRING': '',
+                'SERVER_NAME': HOST,
+                'SERVER_PORT': '80',
+                'HTTP_HOST': HOST,
+                'HTTP_AUTHORIZATION': self.auth,
+                'wsgi.url_scheme': 'http',
+                'wsgi.input': None,
+            }
+            with workers:
+                response = handler(environ, lambda status, headers: None)
+                for _ in response:
+                    # The worker is held until the client has read it all.
+                    time.sleep(delay)
+                response.close()
+            return (time.perf_counter() - start) * 1000
+
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            return list(pool.map(request, range(options['requests'])))
+
+    def _run_asgi(self, options):
+        """Serve requests concurrently from the ASGI application."""
+        from app.asgi import application
+
+        path = reverse('recipe:async-recipe-list')
+        delay = options['client_delay']
+        headers = [
+            (b'host', HOST.encode()),
+            (b'authorization', self.auth.encode()),
+        ]
+
+        async def request(limit):
+            async with limit:
+                start = time.perf_counter()
+                scope = {
+                    'type': 'http',
+                    'method': 'GET',
+                    'path': path,
+                    'query_string': b'',
+                    'headers': headers,
+                }
+
+                async def receive():
+                    return {'type': 'http.request', 'body': b''}
+
+                async def send(message):
+                    if message['type'] == 'http.response.body':
+                        await asyncio.sleep(delay)
+
+                await application(scope, receive, send)
+                return (time.perf_counter() - start) * 1000
+
+        async def run_all():
+            limit = asyncio.Semaphore(options['concurrency'])
+            return await asyncio.gather(*(
+                request(limit) for _ in range(options['requests'])
+            ))
+
+        return asyncio.run(run_all())
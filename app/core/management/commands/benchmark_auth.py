@@ -0,0 +1,66 @@
+"""
+Django command to benchmark token authentication.
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from core import benchmarks
+from user.authentication import CACHE_ALIAS, CachedTokenAuthentication
+
+
+class Rollback(Exception):
+    """Raised to discard the benchmark fixture."""
+
+
+class Command(BaseCommand):
+    """Compare plain and cached token authentication per request."""
+
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        try:
+            with transaction.atomic():
+                user = get_user_model().objects.create_user(
+                    email='benchmark-auth@example.com',
+                    password='benchmark-pass',
+                )
+                key = Token.objects.create(user=user).key
+                self._compare(key, options['runs'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _compare(self, key, runs):
+        """Time both authentication classes against one token."""
+        caches[CACHE_ALIAS].clear()
+        if isinstance(caches[CACHE_ALIAS], DummyCache):
+            self.stdout.write(self.style.WARNING(
+                'The auth cache is off; set AUTH_CACHE_BACKEND to compare.'
+            ))
+        backends = {
+            'token': TokenAuthentication(),
+            'cached token': CachedTokenAuthentication(),
+        }
+        for name, backend in backends.items():
+            backend.authenticate_credentials(key)
+            with CaptureQueriesContext(connection) as queries:
+                timings = benchmarks.time_call(
+                    lambda: backend.authenticate_credentials(key), runs,
+                )
+            stats = benchmarks.summarize(timings)
+            self.stdout.write(
+                f'{name:13} median={stats["median_ms"] * 1000:.1f}us '
+                f'p95={stats["p95_ms"] * 1000:.1f}us '
+                f'queries/request={len(queries) / runs:.2f}'
+            )
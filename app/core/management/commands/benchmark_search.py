@@ -0,0 +1,87 @@
+"""
+Django command to benchmark recipe full-text search.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchQuery
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Q
+
+from core import benchmarks, deletion
+from core.models import Recipe
+
+
+BENCHMARK_EMAIL = 'benchmark-search@example.com'
+
+
+class Command(BaseCommand):
+    """Compare the GIN-indexed search against an icontains scan."""
+
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000)
+        parser.add_argument('--runs', type=int, default=20)
+        parser.add_argument(
+            '--terms', nargs='+', default=['curry', 'smoked salmon', 'tofu'],
+        )
+        parser.add_argument(
+            '--in-place', action='store_true',
+            help='Use the configured database instead of a test database.',
+        )
+        parser.add_argument(
+            '--keepdb', action='store_true',
+            help='Keep the test database and its fixture for the next run.',
+        )
+        parser.add_argument(
+            '--drop', action='store_true',
+            help='Delete the seeded fixture instead of keeping it for reuse.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if connection.vendor != 'postgresql':
+            raise CommandError('Full-text search needs PostgreSQL.')
+
+        if options['in_place']:
+            self._run(options)
+        else:
+            with benchmarks.throwaway_database(options['keepdb']):
+                self._run(options)
+
+    def _run(self, options):
+        """Seed the fixture if needed and time each term."""
+        user, _ = get_user_model().objects.get_or_create(
+            email=BENCHMARK_EMAIL,
+        )
+        recipes = Recipe.objects.filter(user=user)
+        missing = options['rows'] - recipes.count()
+        if missing > 0:
+            self.stdout.write(f'Seeding {missing} recipes...')
+            benchmarks.seed_recipes(user, missing)
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE core_recipe;')
+
+        for term in options['terms']:
+            self._compare(recipes, term, options['runs'])
+
+        if options['drop']:
+            deletion.delete_user(user.pk)
+
+    def _compare(self, recipes, term, runs):
+        """Time both search strategies for one term."""
+        query = SearchQuery(term, config='english', search_type='websearch')
+        strategies = {
+            'tsvector+gin': lambda: recipes.filter(
+                search_vector=query,
+            ).count(),
+            'icontains scan': lambda: recipes.filter(
+                Q(title__icontains=term) | Q(description__icontains=term)
+            ).count(),
+        }
+        for name, run in strategies.items():
+            stats = benchmarks.summarize(benchmarks.time_call(run, runs))
+            self.stdout.write(
+                f'{term!r:16} {name:15} hits={run():<8} '
+                f'median={stats["median_ms"]}ms p95={stats["p95_ms"]}ms'
+            )
@@ -0,0 +1,83 @@
+"""
+Django command to benchmark the recipe list serialization paths.
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Prefetch
+
+from rest_framework.renderers import JSONRenderer
+
+from core import benchmarks
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+from recipe.serializers import RecipeSerializer
+
+
+class Rollback(Exception):
+    """Raised to discard the benchmark fixture."""
+
+
+class Command(BaseCommand):
+    """Render a large recipe list from instances and from .values() rows."""
+
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--runs', type=int, default=5)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        try:
+            with transaction.atomic():
+                user = get_user_model().objects.create_user(
+                    email='benchmark-serializer@example.com',
+                )
+                benchmarks.seed_user(user, options['recipes'], 50, 100)
+                self._compare(user, options['runs'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _compare(self, user, runs):
+        """Time both paths end to end and check their JSON matches."""
+        recipes = Recipe.objects.filter(user=user).order_by('-id')
+        fields = RecipeSerializer.Meta.fields
+        columns = [f for f in fields if f not in ('tags', 'ingredients')]
+        renderer = JSONRenderer()
+
+        def from_instances():
+            queryset = recipes.only(*columns).prefetch_related(
+                Prefetch('tags', queryset=Tag.objects.only(
+                    'id', 'name',
+                ).order_by('id')),
+                Prefetch('ingredients', queryset=Ingredient.objects.only(
+                    'id', 'name',
+                ).order_by('id')),
+            )
+            return renderer.render(RecipeSerializer(queryset, many=True).data)
+
+        def from_values():
+            queryset = recipes.values(*columns)
+            return renderer.render(RecipeSerializer(queryset, many=True).data)
+
+        if from_instances() != from_values():
+            raise CommandError('The two paths rendered different JSON.')
+
+        medians = {}
+        for name, render in (('instances', from_instances),
+                             ('values', from_values)):
+            stats = benchmarks.summarize(benchmarks.time_call(render, runs))
+            medians[name] = stats['median_ms']
+            self.stdout.write(
+                f'{name:10} median={stats["median_ms"]}ms '
+                f'max={stats["max_ms"]}ms'
+            )
+        self.stdout.write(
+            f'values path is {medians["instances"] / medians["values"]:.1f}x '
+            f'faster; output identical'
+        )
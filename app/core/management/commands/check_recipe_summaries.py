@@ -0,0 +1,67 @@
+"""
+Django command to find and repair drift in the recipe summary columns.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Recipe
+from recipe import bulk
+
+
+class Command(BaseCommand):
+    """Compare each recipe's tag/ingredient summaries with its links."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repair', action='store_true',
+            help='Rewrite summaries that are missing or out of date.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=bulk.SUMMARY_BATCH_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        batch_size = options['batch_size']
+        columns = list(bulk.SUMMARY_FIELDS.items())
+        checked = 0
+        drifted = {field_name: 0 for field_name, _ in columns}
+        last_id = 0
+        while True:
+            rows = list(
+                Recipe.objects.filter(pk__gt=last_id).order_by('pk').values(
+                    'pk', *[column for _, column in columns],
+                )[:batch_size]
+            )
+            if not rows:
+                break
+            last_id = rows[-1]['pk']
+            checked += len(rows)
+            ids = [row['pk'] for row in rows]
+            for field_name, column in columns:
+                expected = bulk.build_summaries(field_name, ids)
+                stale = [
+                    row['pk'] for row in rows
+                    if row[column] != expected[row['pk']]
+                ]
+                drifted[field_name] += len(stale)
+                if stale and options['repair']:
+                    Recipe.objects.bulk_update(
+                        [
+                            Recipe(pk=pk, **{column: expected[pk]})
+                            for pk in stale
+                        ],
+                        [column],
+                    )
+
+        total = sum(drifted.values())
+        summary = ', '.join(f'{n} {f}' for f, n in drifted.items())
+        self.stdout.write(
+            f'Checked {checked} recipes: {total} summaries out of date '
+            f'({summary}).'
+        )
+        if total and options['repair']:
+            self.stdout.write(self.style.SUCCESS('Repaired.'))
+        elif total:
+            raise CommandError(
+                'Run with --repair to fix the summaries.', returncode=1,
+            )
@@ -0,0 +1,47 @@
+"""
+Django command to delete a user and their data in batches.
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core import deletion
+
+
+class Command(BaseCommand):
+    """Deactivate a user and delete everything they own in batches.
+
+    Safe to run again after an interruption; it resumes with the rows
+    that are left.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('email')
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument(
+            '--pause', type=float, default=None,
+            help='Seconds to sleep between batches.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        User = get_user_model()
+        try:
+            user = User.objects.get(email=options['email'])
+        except User.DoesNotExist:
+            raise CommandError(f'No user with email {options["email"]}.')
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+
+        def progress(step, deleted):
+            self.stdout.write(f'{step}: {deleted[step]} deleted')
+
+        deleted = deletion.delete_user(
+            user.pk,
+            batch_size=options['batch_size'],
+            pause=options['pause'],
+            progress=progress,
+        )
+        total = sum(deleted.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {options["email"]} and {total} related rows.'
+        ))
@@ -0,0 +1,99 @@
+"""
+Django command to load test the token login endpoint.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from rest_framework.test import APIRequestFactory
+
+from core import benchmarks
+from user.backends import shutdown_pool
+from user.views import CreateTokenView
+
+
+LOADTEST_EMAIL = 'loadtest-login@example.com'
+LOADTEST_PASSWORD = 'loadtest-pass123'
+
+
+class Command(BaseCommand):
+    """Report token login throughput and latency under concurrency."""
+
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument(
+            '--in-place', action='store_true',
+            help='Use the configured database instead of a test database.',
+        )
+        parser.add_argument('--keepdb', action='store_true')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        try:
+            if options['in_place']:
+                self._run(options)
+            else:
+                with benchmarks.throwaway_database(options['keepdb']):
+                    self._run(options)
+        finally:
+            shutdown_pool()
+
+    def _run(self, options):
+        """Create the login user and load test with it."""
+        users = get_user_model().objects
+        users.filter(email=LOADTEST_EMAIL).delete()
+        user = users.create_user(
+            email=LOADTEST_EMAIL, password=LOADTEST_PASSWORD,
+        )
+        try:
+            self._log_in(options['requests'], options['concurrency'])
+        finally:
+            user.delete()
+
+    def _log_in(self, requests, concurrency):
+        """Fire requests logins from concurrency threads."""
+        view = CreateTokenView.as_view()
+        factory = APIRequestFactory()
+        payload = {'email': LOADTEST_EMAIL, 'password': LOADTEST_PASSWORD}
+
+        def worker(count):
+            timings = []
+            try:
+                for _ in range(count):
+                    request = factory.post('/api/user/token/', payload)
+                    start = time.perf_counter()
+                    res = view(request)
+                    timings.append((time.perf_counter() - start) * 1000)
+                    assert res.status_code == 200, res.data
+            finally:
+                connection.close()
+            return timings
+
+        shares = [requests // concurrency] * concurrency
+        for i in range(requests % concurrency):
+            shares[i] += 1
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(worker, shares))
+        elapsed = time.perf_counter() - start
+
+        stats = benchmarks.summarize([t for ts in results for t in ts])
+        self.stdout.write(
+            f'iterations={settings.PASSWORD_HASH_ITERATIONS} '
+            f'hash_workers={settings.PASSWORD_HASH_WORKERS} '
+            f'concurrency={concurrency}'
+        )
+        self.stdout.write(
+            f'{stats["runs"]} logins in {elapsed:.2f}s '
+            f'({stats["runs"] / elapsed:.1f}/s) '
+            f'median={stats["median_ms"]}ms p99={stats["p99_ms"]}ms '
+            f'max={stats["max_ms"]}ms'
+        )
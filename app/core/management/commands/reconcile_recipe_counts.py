@@ -0,0 +1,67 @@
+"""
+Django command to reconcile tag and ingredient recipe counts.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F
+
+from core.models import Recipe
+from recipe import bulk
+
+
+class Command(BaseCommand):
+    """Recount recipe_count from the links wherever it has drifted."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Report drift without fixing it, exiting 1 if any.',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        total = 0
+        for field_name in ('tags', 'ingredients'):
+            checked, drifted = self.reconcile(
+                field_name, options['batch_size'], options['dry_run'],
+            )
+            total += drifted
+            self.stdout.write(
+                f'{field_name}: {drifted} of {checked} counts out of date'
+            )
+
+        if total and options['dry_run']:
+            raise CommandError(
+                'Run without --dry-run to fix the counts.', returncode=1,
+            )
+        if total:
+            self.stdout.write(self.style.SUCCESS('Reconciled.'))
+
+    def reconcile(self, field_name, batch_size, dry_run):
+        model = Recipe._meta.get_field(field_name).related_model
+        checked = drifted = 0
+        last_id = 0
+        while True:
+            ids = list(
+                model.objects.filter(pk__gt=last_id).order_by(
+                    'pk',
+                ).values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                return checked, drifted
+            last_id = ids[-1]
+            checked += len(ids)
+            stale = list(
+                model.objects.filter(pk__in=ids).annotate(
+                    actual=bulk.counted_recipes(field_name),
+                ).exclude(recipe_count=F('actual')).values_list(
+                    'pk', flat=True,
+                )
+            )
+            drifted += len(stale)
+            if stale and not dry_run:
+                # Recounted in the UPDATE itself, so links changed since
+                # the check are still counted correctly.
+                model.objects.filter(pk__in=stale).update(
+                    recipe_count=bulk.counted_recipes(field_name),
+                )
@@ -0,0 +1,59 @@
+"""
+Django command to run queued background jobs.
+"""
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.jobs import Worker
+
+
+class Command(BaseCommand):
+    """Claim and run jobs from the queue until stopped."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int,
+            default=settings.JOB_WORKER_CONCURRENCY,
+            help='Jobs run at once (0 = one at a time in this thread).',
+        )
+        parser.add_argument(
+            '--poll-interval', type=float,
+            default=settings.JOB_POLL_INTERVAL,
+            help='Seconds between queue checks while idle.',
+        )
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Exit once the queue is empty.',
+        )
+        parser.add_argument(
+            '--max-jobs', type=int, default=None,
+            help='Exit after running this many jobs.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        worker = Worker(
+            concurrency=options['concurrency'],
+            poll_interval=options['poll_interval'],
+        )
+
+        def stop(signum, frame):
+            self.stdout.write('Stopping after the running jobs...')
+            worker.stop()
+
+        previous = signal.signal(signal.SIGTERM, stop)
+        self.stdout.write(
+            f'Worker {worker.name} started '
+            f'(concurrency {options["concurrency"]}).'
+        )
+        try:
+            processed = worker.run(
+                burst=options['burst'], max_jobs=options['max_jobs'],
+            )
+        except KeyboardInterrupt:
+            processed = worker.processed
+        finally:
+            signal.signal(signal.SIGTERM, previous)
+        self.stdout.write(self.style.SUCCESS(f'Ran {processed} job(s).'))
@@ -5,23 +5,46 @@ import time
 
 from psycopg2 import OperationalError as Psycopg2OpError
 
+from django.db import connections
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+
+from core.health import backoff_delays, probe_database
 
 
 class Command(BaseCommand):
     """Django command to wait for database."""
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--timeout', type=float, default=60,
+            help='Seconds to wait before exiting with an error (0 = forever).',
+        )
+        parser.add_argument('--initial-delay', type=float, default=0.01)
+        parser.add_argument('--max-delay', type=float, default=2.0)
+
     def handle(self, *args, **options):
         """Entrypoint for command."""
         self.stdout.write('Waiting for db...')
-        db_up = False
-        while db_up is False:
+        timeout = options['timeout']
+        start = time.monotonic()
+        delays = backoff_delays(options['initial_delay'], options['max_delay'])
+        while True:
             try:
-                self.check(databases=['default'])
-                db_up = True
-            except (Psycopg2OpError, OperationalError):
-                self.stdout.write('Database unavailable, waiting 1 second...')
-                time.sleep(1)
+                probe_database()
+                break
+            except (Psycopg2OpError, OperationalError) as error:
+                connections['default'].close()
+                delay = next(delays)
+                elapsed = time.monotonic() - start
+                if timeout and elapsed + delay > timeout:
+                    raise CommandError(
+                        f'Database unavailable after {elapsed:.1f}s: {error}',
+                        returncode=1,
+                    )
+                self.stdout.write(
+                    f'Database unavailable, waiting {delay * 1000:.0f}ms...'
+                )
+                time.sleep(delay)
 
         self.stdout.write(self.style.SUCCESS('Database available!'))
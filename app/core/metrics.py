@@ -0,0 +1,221 @@
+"""
+In-process request metrics kept as HDR-style histograms.
+
+Values are bucketed log-linearly: each power of two is split into
+2 ** (PRECISION_BITS - 1) equal sub-buckets, so any recorded value is
+known to within about 3% however large it is, in a few hundred sparse
+counters per series.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+PRECISION_BITS = 5
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class Histogram:
+    """Log-linear histogram of non-negative values."""
+
+    def __init__(self, scale=1):
+        # Values are stored as integers of value * scale.
+        self.scale = scale
+        self.counts = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value):
+        index = _bucket_index(int(value * self.scale))
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """Return the value below which a q fraction of records fall."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                low, high = _bucket_bounds(index)
+                value = low if high - low == 1 else (low + high) / 2
+                return min(value / self.scale, self.max)
+        return self.max
+
+
+def _bucket_index(value):
+    sub_buckets = 1 << PRECISION_BITS
+    if value < sub_buckets:
+        return value
+    shift = value.bit_length() - PRECISION_BITS
+    half = sub_buckets >> 1
+    return sub_buckets + (shift - 1) * half + (value >> shift) - half
+
+
+def _bucket_bounds(index):
+    """Return the [low, high) integer range covered by a bucket."""
+    sub_buckets = 1 << PRECISION_BITS
+    if index < sub_buckets:
+        return index, index + 1
+    half = sub_buckets >> 1
+    shift, offset = divmod(index - sub_buckets, half)
+    shift += 1
+    low = (offset + half) << shift
+    return low, low + (1 << shift)
+
+
+class Registry:
+    """Histograms keyed by metric name and endpoint."""
+
+    # name -> (help text, scale of the stored values)
+    METRICS = {
+        'request_seconds': ('Wall time per request.', 1e6),
+        'db_queries': ('Database queries per request.', 1),
+        'db_seconds': ('Database time per request.', 1e6),
+        'serializer_seconds': ('Serializer time per request.', 1e6),
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+
+    def observe(self, endpoint, **values):
+        """Record one request's values for endpoint."""
+        with self._lock:
+            for name, value in values.items():
+                key = (name, endpoint)
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = Histogram(
+                        self.METRICS[name][1],
+                    )
+                histogram.record(value)
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def render(self, prefix='api_'):
+        """Return every series in the Prometheus text format."""
+        with self._lock:
+            lines = []
+            for name, (help_text, _) in self.METRICS.items():
+                series = sorted(
+                    (endpoint, histogram)
+                    for (metric, endpoint), histogram
+                    in self._histograms.items() if metric == name
+                )
+                if not series:
+                    continue
+                metric = prefix + name
+                lines.append(f'# HELP {metric} {help_text}')
+                lines.append(f'# TYPE {metric} summary')
+                for endpoint, histogram in series:
+                    label = f'endpoint="{endpoint}"'
+                    for q in QUANTILES:
+                        lines.append(
+                            f'{metric}{{{label},quantile="{q}"}} '
+                            f'{histogram.quantile(q):.6g}'
+                        )
+                    lines.append(
+                        f'{metric}_sum{{{label}}} {histogram.total:.6g}'
+                    )
+                    lines.append(
+                        f'{metric}_count{{{label}}} {histogram.count}'
+                    )
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+class RequestMetrics:
+    """Counters for the request being served."""
+
+    def __init__(self):
+        self.endpoint = None
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serializer_seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        # Called by record_query() for queries made while serving it.
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - start
+            self.queries += 1
+
+
+# ConnectionPool.stats() key -> (Prometheus type, help text)
+POOL_METRICS = {
+    'in_use': ('gauge', 'Connections checked out of the pool.'),
+    'idle': ('gauge', 'Idle connections in the pool.'),
+    'max_size': ('gauge', 'Most connections the pool holds.'),
+    'acquired': ('counter', 'Connections checked out.'),
+    'created': ('counter', 'Connections opened.'),
+    'reused': ('counter', 'Checkouts served by an idle connection.'),
+    'discarded': ('counter', 'Connections closed by the pool.'),
+    'failed_checks': ('counter', 'Idle connections failing their check.'),
+    'timeouts': ('counter', 'Checkouts that gave up waiting.'),
+    'wait_seconds': ('counter', 'Time spent checking connections out.'),
+}
+
+
+def render_pool_stats(pools, prefix='db_pool_'):
+    """Return {alias: ConnectionPool.stats()} in the Prometheus format."""
+    if not pools:
+        return ''
+    lines = []
+    for name, (kind, help_text) in POOL_METRICS.items():
+        metric = prefix + name + ('_total' if kind == 'counter' else '')
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} {kind}')
+        for alias, stats in sorted(pools.items()):
+            lines.append(f'{metric}{{alias="{alias}"}} {stats[name]:.6g}')
+    return '\n'.join(lines) + '\n'
+
+
+current_request = ContextVar('current_request_metrics', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    """Charge a query to the current request's metrics, if any.
+
+    The request's context is copied to the threads that serve it, such as
+    the async view pool, so this finds it wherever the query runs.
+    """
+    request_metrics = current_request.get()
+    if request_metrics is None:
+        return execute(sql, params, many, context)
+    return request_metrics(execute, sql, params, many, context)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """Add record_query to a new connection (connection_created)."""
+    if record_query not in connection.execute_wrappers:
+        # First, so it outlives wrappers pushed by execute_wrapper().
+        connection.execute_wrappers.insert(0, record_query)
+
+
+@contextmanager
+def time_serializer():
+    """Add the block's wall time to the current request's serializer time."""
+    metrics = current_request.get()
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializer_seconds += time.perf_counter() - start
@@ -0,0 +1,80 @@
+"""
+Middleware for the app.
+"""
+import asyncio
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from core import metrics
+
+
+def endpoint_name(request, view_func):
+    """Name a view by its DRF viewset action, e.g. RecipeViewSet.list."""
+    cls = getattr(view_func, 'cls', None)
+    if cls is None:
+        return view_func.__name__
+    method = request.method.lower()
+    actions = getattr(view_func, 'actions', None) or {}
+    return f'{cls.__name__}.{actions.get(method, method)}'
+
+
+class MetricsMiddleware:
+    """Record wall, DB and serializer time and query counts per endpoint.
+
+    Queries are charged to the request by metrics.record_query, which is
+    on every connection, so work done on other threads is counted too.
+    Under ASGI the middleware runs as a coroutine; a sync-only first
+    middleware would put every request onto one thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Mark the instance as a coroutine function, as Django's
+            # MiddlewareMixin does, so the handler awaits it.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        request_metrics = metrics.RequestMetrics()
+        token = metrics.current_request.set(request_metrics)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.current_request.reset(token)
+        self._observe(request_metrics, start)
+        return response
+
+    async def __acall__(self, request):
+        request_metrics = metrics.RequestMetrics()
+        token = metrics.current_request.set(request_metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.current_request.reset(token)
+        self._observe(request_metrics, start)
+        return response
+
+    def _observe(self, request_metrics, start):
+        if request_metrics.endpoint is not None:
+            metrics.registry.observe(
+                request_metrics.endpoint,
+                request_seconds=time.perf_counter() - start,
+                db_queries=request_metrics.queries,
+                db_seconds=request_metrics.db_seconds,
+                serializer_seconds=request_metrics.serializer_seconds,
+            )
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request_metrics = metrics.current_request.get()
+        request_metrics.endpoint = endpoint_name(request, view_func)
@@ -0,0 +1,66 @@
+# Generated by Django 3.2.25 on 2026-10-18 02:09
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+CREATE_SEARCH_SQL = [
+    """
+    CREATE FUNCTION core_recipe_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('pg_catalog.english',
+                                  coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('pg_catalog.english',
+                                  coalesce(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql;
+    """,
+    """
+    CREATE TRIGGER core_recipe_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description ON core_recipe
+    FOR EACH ROW EXECUTE FUNCTION core_recipe_search_vector_update();
+    """,
+    # Backfill existing rows through the trigger.
+    'UPDATE core_recipe SET title = title;',
+    """
+    CREATE INDEX core_recipe_search_vector_idx
+    ON core_recipe USING gin (search_vector);
+    """,
+]
+
+DROP_SEARCH_SQL = [
+    'DROP INDEX IF EXISTS core_recipe_search_vector_idx;',
+    'DROP TRIGGER IF EXISTS core_recipe_search_vector_trigger ON core_recipe;',
+    'DROP FUNCTION IF EXISTS core_recipe_search_vector_update();',
+]
+
+
+def _run_on_postgres(statements):
+    """Return a RunPython callable that runs statements on PostgreSQL only."""
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_recipe_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(
+            _run_on_postgres(CREATE_SEARCH_SQL),
+            _run_on_postgres(DROP_SEARCH_SQL),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.25 on 2026-10-18 02:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='ingredient_summary',
+            field=models.JSONField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='tag_summary',
+            field=models.JSONField(editable=False, null=True),
+        ),
+    ]
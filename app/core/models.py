@@ -1,8 +1,13 @@
 """
 Database models.
 """
+import os
+import uuid
+
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
@@ -10,6 +15,12 @@ from django.contrib.auth.models import (
 )
 
 
+def recipe_image_file_path(instance, filename):
+    """Generate file path for new recipe image."""
+    ext = os.path.splitext(filename)[1].lower()
+    return os.path.join('uploads', 'recipe', f'{uuid.uuid4()}{ext}')
+
+
 class UserManager(BaseUserManager):
     """Manager for users."""
 
@@ -58,6 +69,20 @@ class Recipe(models.Model):
     link = models.CharField(max_length = 255, blank = True)
     tags = models.ManyToManyField('Tag')  #bcz we can have many different recipes that have many different tags.
     ingredients = models.ManyToManyField('Ingredient')
+    # Weighted title/description tsvector, kept up to date by a database
+    # trigger and GIN-indexed on PostgreSQL (see migration 0006).
+    search_vector = SearchVectorField(null=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    image = models.ImageField(
+        null=True, blank=True, upload_to=recipe_image_file_path,
+    )
+    # Content address (sha256) of the generated thumbnail, empty while
+    # it is being made.
+    thumbnail = models.CharField(max_length=64, blank=True)
+    # Denormalized [{id, name}, ...] of tags and ingredients for list reads,
+    # kept current by recipe.bulk and recipe.signals (NULL = not computed).
+    tag_summary = models.JSONField(null=True, editable=False)
+    ingredient_summary = models.JSONField(null=True, editable=False)
 # Any of our tags can be associated to any of our recipes and any of our recipes can be associated to any of our tags. run the test fails bcz we haven't created mgrations change yet. Creates model Tag 2. Adds field tags to recipe model that already existed. 0003 new migration file generated.
 
     def __str__(self):
@@ -71,6 +96,21 @@ class Tag(models.Model):    # primary usage of the tag is filtering mechanism so
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,  # if the user is deleted the tags associated will also get deleted
     )
+    updated_at = models.DateTimeField(auto_now=True)
+    # Number of recipes linked to the tag, adjusted with F() on every link
+    # change (see recipe.bulk.adjust_counts).
+    recipe_count = models.IntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'name'], name='core_tag_user_name_idx',
+            ),
+            models.Index(
+                fields=['user', 'recipe_count'],
+                name='core_tag_user_count_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.name  # returns the string representation that we r checking for in our test.
@@ -83,6 +123,65 @@ class Ingredient(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    updated_at = models.DateTimeField(auto_now=True)
+    recipe_count = models.IntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'name'],
+                name='core_ingredient_user_name_idx',
+            ),
+            models.Index(
+                fields=['user', 'recipe_count'],
+                name='core_ingredient_user_count_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return self.name    # run migrations as added a new model : it create model ingredients and added field ingredients to recipe
+
+
+class Job(models.Model):
+    """Unit of background work queued for run_worker."""
+
+    class Status(models.TextChoices):
+        QUEUED = 'queued'
+        RUNNING = 'running'
+        SUCCEEDED = 'succeeded'
+        FAILED = 'failed'
+
+    name = models.CharField(max_length=255)  # registered task name
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(
+        max_length=16, choices=Status.choices, default=Status.QUEUED,
+    )
+    # Whoever may see the job; it outlives the user it deletes.
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='+',
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=255, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    progress = models.JSONField(default=dict, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['status', 'run_after'],
+                name='core_job_status_run_after_idx',
+            ),
+        ]
 
     def __str__(self):
-        return self.name    # run migrations as added a new model : it create model ingredients and added field ingredients to recipe
\ No newline at end of file
+        return f'{self.name} #{self.pk} ({self.status})'
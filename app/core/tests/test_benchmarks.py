@@ -0,0 +1,64 @@
+"""
+Tests for the API benchmark command.
+"""
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+
+from core.models import Recipe
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class BenchmarkApiTests(TestCase):
+    """Test benchmark_api seeds data and reports comparable results."""
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.dir.name, 'results.json')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def benchmark(self, **options):
+        call_command(
+            'benchmark_api', in_place=True, recipes=20, tags=5,
+            ingredients=5, runs=2, output=self.output,
+            stdout=io.StringIO(), **options,
+        )
+        with open(self.output) as output:
+            return json.load(output)
+
+    def test_every_endpoint_measured(self):
+        """Test each endpoint reports latency and query counts."""
+        report = self.benchmark()
+
+        self.assertEqual(Recipe.objects.filter(title='Doomed').count(), 0)
+        self.assertGreaterEqual(
+            Recipe.objects.exclude(title='Benchmark recipe').count(), 20,
+        )
+        self.assertEqual(report['meta']['options']['recipes'], 20)
+        for name in ('recipe.list', 'tag.list', 'ingredient.list',
+                     'recipe.create', 'user.token', 'user.me'):
+            stats = report['results'][name]
+            self.assertEqual(stats['runs'], 2)
+            self.assertGreater(stats['median_ms'], 0)
+            self.assertIn('queries', stats)
+
+    def test_compare_flags_regressions(self):
+        """Test --fail-on-regression fails against a faster baseline."""
+        report = self.benchmark(endpoints=['tag.list'])
+        report['results']['tag.list']['median_ms'] /= 100
+        baseline = os.path.join(self.dir.name, 'baseline.json')
+        with open(baseline, 'w') as output:
+            json.dump(report, output)
+
+        with self.assertRaises(CommandError):
+            self.benchmark(
+                endpoints=['tag.list'], compare=baseline,
+                fail_on_regression=True,
+            )
@@ -2,24 +2,47 @@
 from unittest.mock import patch
 from psycopg2 import OperationalError as Psycopg2OpError
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.db.utils import OperationalError
 from django.test import SimpleTestCase
 
 
-@patch('core.management.commands.wait_for_db.Command.check')
+@patch('core.management.commands.wait_for_db.probe_database')
 class CommandTests(SimpleTestCase):
     """Test commands."""
-    def test_wait_for_db_ready(self, patched_check):
+    def test_wait_for_db_ready(self, patched_probe):
         """Test waiting for db if db ready."""
-        patched_check.return_value = True
+        patched_probe.return_value = None
         call_command('wait_for_db')
-        patched_check.assert_called_once_with(databases=['default'])
+        patched_probe.assert_called_once_with()
 
     @patch('time.sleep')
-    def test_wait_for_db_delay(self, patched_sleep, patched_check):
+    def test_wait_for_db_delay(self, patched_sleep, patched_probe):
         """Test waiting for db when getting OperationalError."""
-        patched_check.side_effect = [Psycopg2OpError] * 2 + \
-            [OperationalError] * 3 + [True]
+        patched_probe.side_effect = [Psycopg2OpError] * 2 + \
+            [OperationalError] * 3 + [None]
         call_command('wait_for_db')
-        self.assertEqual(patched_check.call_count, 6)
-        patched_check.assert_called_with(databases=['default'])
+        self.assertEqual(patched_probe.call_count, 6)
+
+    @patch('time.sleep')
+    def test_wait_for_db_backs_off(self, patched_sleep, patched_probe):
+        """Test retries start in milliseconds and grow up to the cap."""
+        patched_probe.side_effect = [OperationalError] * 12 + [None]
+        call_command('wait_for_db', initial_delay=0.01, max_delay=1)
+
+        delays = [c.args[0] for c in patched_sleep.call_args_list]
+        self.assertLessEqual(delays[0], 0.01)
+        self.assertGreater(delays[-1], delays[0])
+        self.assertLessEqual(max(delays), 1)
+
+    @patch('time.sleep')
+    def test_wait_for_db_timeout(self, patched_sleep, patched_probe):
+        """Test giving up with an error once the timeout is reached."""
+        patched_probe.side_effect = OperationalError
+
+        with patch('time.monotonic', side_effect=[0, 0.5, 2]):
+            with self.assertRaises(CommandError) as cm:
+                call_command('wait_for_db', timeout=1, initial_delay=0.4)
+
+        self.assertEqual(cm.exception.returncode, 1)
+        self.assertEqual(patched_sleep.call_count, 1)
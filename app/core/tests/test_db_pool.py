@@ -0,0 +1,134 @@
+"""
+Tests for the database connection pool.
+"""
+import threading
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from core.db.pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    """Stand-in for a DB-API connection."""
+
+    def __init__(self, number):
+        self.number = number
+        self.closed = False
+        self.healthy = True
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """Test ConnectionPool with an injected connect callable."""
+
+    def setUp(self):
+        self.opened = []
+
+    def connect(self):
+        conn = FakeConnection(len(self.opened))
+        self.opened.append(conn)
+        return conn
+
+    @staticmethod
+    def check(conn):
+        if not conn.healthy:
+            raise RuntimeError('connection lost')
+
+    def make_pool(self, **kwargs):
+        kwargs.setdefault('check', self.check)
+        return ConnectionPool(self.connect, **kwargs)
+
+    def test_released_connection_is_reused(self):
+        """Test a released connection is handed out again."""
+        pool = self.make_pool()
+        conn = pool.acquire()
+        pool.release(conn)
+
+        self.assertIs(pool.acquire(), conn)
+        stats = pool.stats()
+        self.assertEqual(stats['created'], 1)
+        self.assertEqual(stats['reused'], 1)
+        self.assertEqual(stats['in_use'], 1)
+
+    def test_acquire_times_out_when_exhausted(self):
+        """Test acquire raises PoolTimeout once max_size are in use."""
+        pool = self.make_pool(max_size=2, timeout=0.01)
+        pool.acquire()
+        pool.acquire()
+
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+        self.assertEqual(len(self.opened), 2)
+        self.assertEqual(pool.stats()['timeouts'], 1)
+
+    def test_release_unblocks_waiter(self):
+        """Test a waiting acquire gets the connection another releases."""
+        pool = self.make_pool(max_size=1, timeout=5)
+        conn = pool.acquire()
+        got = []
+        waiter = threading.Thread(target=lambda: got.append(pool.acquire()))
+        waiter.start()
+        pool.release(conn)
+        waiter.join(5)
+
+        self.assertEqual(got, [conn])
+
+    def test_discarded_connection_frees_slot(self):
+        """Test discarding closes the connection and frees its slot."""
+        pool = self.make_pool(max_size=1, timeout=0.01)
+        conn = pool.acquire()
+        pool.release(conn, discard=True)
+
+        self.assertTrue(conn.closed)
+        self.assertIsNot(pool.acquire(), conn)
+
+    @patch('core.db.pool.time.monotonic')
+    def test_stale_connection_health_checked(self, patched_monotonic):
+        """Test an idle connection failing its check is replaced."""
+        patched_monotonic.return_value = 100.0
+        pool = self.make_pool(check_after=30)
+        conn = pool.acquire()
+        pool.release(conn)
+        conn.healthy = False
+
+        patched_monotonic.return_value = 200.0
+        fresh = pool.acquire()
+
+        self.assertIsNot(fresh, conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual(pool.stats()['failed_checks'], 1)
+
+    def test_recent_connection_skips_health_check(self):
+        """Test connections idle for less than check_after are not checked."""
+        pool = self.make_pool(check_after=30)
+        conn = pool.acquire()
+        pool.release(conn)
+        conn.healthy = False
+
+        self.assertIs(pool.acquire(), conn)
+
+    def test_prewarm_opens_min_size(self):
+        """Test prewarm leaves min_size idle connections."""
+        pool = self.make_pool(min_size=3)
+
+        self.assertEqual(pool.prewarm(), 3)
+        self.assertEqual(pool.prewarm(), 0)
+        stats = pool.stats()
+        self.assertEqual(stats['idle'], 3)
+        self.assertEqual(stats['in_use'], 0)
+
+    def test_close_all_closes_idle(self):
+        """Test close_all closes idle connections only."""
+        pool = self.make_pool()
+        busy = pool.acquire()
+        idle = pool.acquire()
+        pool.release(idle)
+
+        pool.close_all()
+
+        self.assertTrue(idle.closed)
+        self.assertFalse(busy.closed)
+        self.assertEqual(pool.stats()['idle'], 0)
@@ -0,0 +1,59 @@
+"""
+Tests for the primary/replica database router.
+"""
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+
+from core import db_router, models
+
+
+@override_settings(DATABASE_REPLICAS=['replica0', 'replica1'])
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    """Test where PrimaryReplicaRouter sends queries."""
+
+    def setUp(self):
+        self.router = db_router.PrimaryReplicaRouter()
+
+    def test_recipe_reads_use_replica(self):
+        """Test recipe, tag and ingredient reads go to a replica."""
+        for model in (models.Recipe, models.Tag, models.Ingredient):
+            self.assertIn(
+                self.router.db_for_read(model), ['replica0', 'replica1'],
+            )
+
+    def test_other_reads_use_primary(self):
+        """Test models outside the recipe API stay on the primary."""
+        self.assertIsNone(self.router.db_for_read(models.User))
+
+    def test_writes_use_primary(self):
+        """Test every write goes to the primary."""
+        self.assertEqual(self.router.db_for_write(models.Recipe), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas_configured(self):
+        """Test reads use the primary without replicas."""
+        self.assertIsNone(self.router.db_for_read(models.Recipe))
+
+    def test_pinned_scope_uses_primary(self):
+        """Test pinning lasts until the routing scope exits."""
+        with db_router.routing_scope():
+            db_router.pin_primary()
+            self.assertIsNone(self.router.db_for_read(models.Recipe))
+
+        self.assertIsNotNone(self.router.db_for_read(models.Recipe))
+
+        with db_router.use_primary():
+            self.assertIsNone(self.router.db_for_read(models.Recipe))
+
+    def test_reads_in_transaction_use_primary(self):
+        """Test reads inside a primary transaction see its writes."""
+        with patch.object(
+            db_router.connections['default'], 'in_atomic_block', True,
+        ):
+            self.assertIsNone(self.router.db_for_read(models.Recipe))
+
+    def test_replicas_not_migrated(self):
+        """Test migrations only run on the primary."""
+        self.assertFalse(self.router.allow_migrate('replica0', 'core'))
+        self.assertIsNone(self.router.allow_migrate('default', 'core'))
@@ -0,0 +1,141 @@
+"""
+Tests for chunked deletion.
+"""
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework.authtoken.models import Token
+
+from core import deletion
+from core.models import Ingredient, Recipe, Tag
+
+
+def create_user(email='user@example.com'):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(email, 'testpass123')
+
+
+def create_recipes(user, count, tags=(), ingredients=()):
+    """Create count recipes linked to tags and ingredients."""
+    recipes = []
+    for n in range(count):
+        recipe = Recipe.objects.create(
+            user=user, title=f'Recipe {n}', time_minutes=5,
+            price=Decimal('1.00'),
+        )
+        recipe.tags.add(*tags)
+        recipe.ingredients.add(*ingredients)
+        recipes.append(recipe)
+    return recipes
+
+
+class DeletionTests(TestCase):
+    """Test deleting users and links in batches."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.ingredient = Ingredient.objects.create(
+            user=self.user, name='Salt',
+        )
+        create_recipes(self.user, 5, [self.tag], [self.ingredient])
+        Token.objects.create(user=self.user)
+
+        self.other = create_user('other@example.com')
+        self.other_tag = Tag.objects.create(user=self.other, name='Keto')
+        self.kept = create_recipes(self.other, 2, [self.other_tag])
+
+    def test_delete_user(self):
+        """Test the user and everything they own is deleted in batches."""
+        reports = []
+
+        deleted = deletion.delete_user(
+            self.user.pk,
+            batch_size=2,
+            progress=lambda **kw: reports.append(dict(kw['deleted'])),
+        )
+
+        self.assertEqual(deleted['recipes'], 5)
+        self.assertEqual(deleted['recipe_tags'], 5)
+        self.assertEqual(deleted['recipe_ingredients'], 5)
+        self.assertEqual(deleted['tags'], 1)
+        self.assertEqual(len(reports), 3 + 3 + 3 + 1 + 1)
+        self.assertFalse(
+            get_user_model().objects.filter(pk=self.user.pk).exists()
+        )
+        self.assertFalse(Token.objects.filter(user_id=self.user.pk).exists())
+        self.assertEqual(Recipe.objects.count(), 2)
+        self.assertEqual(Recipe.tags.through.objects.count(), 2)
+
+    def test_delete_user_in_bounded_statements(self):
+        """Test every DELETE is limited to one batch of ids."""
+        steps = deletion.user_steps(self.user.pk)
+
+        with CaptureQueriesContext(connection) as ctx:
+            deletion.Deletion(steps, batch_size=2).run()
+
+        deletes = [
+            q['sql'] for q in ctx.captured_queries
+            if q['sql'].startswith('DELETE')
+        ]
+        self.assertEqual(len(deletes), 3 + 3 + 3 + 1 + 1)
+        self.assertTrue(all(' IN (' in sql for sql in deletes))
+
+    def test_resume_after_interruption(self):
+        """Test a deletion stopped part way finishes when run again."""
+        progress = {}
+
+        def record(step, deleted):
+            progress.update(deleted)
+            if deleted['recipe_tags'] == 2:
+                raise RuntimeError('Worker lost.')
+
+        with self.assertRaises(RuntimeError):
+            deletion.delete_user(self.user.pk, batch_size=2, progress=record)
+
+        self.assertEqual(Recipe.tags.through.objects.filter(
+            recipe__user=self.user,
+        ).count(), 3)
+
+        deleted = deletion.delete_user(
+            self.user.pk, batch_size=2, deleted=progress,
+        )
+
+        self.assertEqual(deleted['recipe_tags'], 5)
+        self.assertEqual(deleted['recipes'], 5)
+        self.assertFalse(Recipe.objects.filter(user=self.user).exists())
+
+    def test_unlink_tag_touches_recipes(self):
+        """Test unlinking a tag marks its recipes as modified."""
+        before = dict(Recipe.objects.values_list('id', 'updated_at'))
+
+        deleted = deletion.Deletion(
+            deletion.link_steps(self.tag), batch_size=2,
+        ).run()
+
+        self.assertEqual(deleted, {'recipe_tags': 5})
+        self.assertFalse(self.tag.recipe_set.exists())
+        for recipe_id, updated_at in Recipe.objects.filter(
+            user=self.user,
+        ).values_list('id', 'updated_at'):
+            self.assertGreater(updated_at, before[recipe_id])
+        self.assertEqual(self.other_tag.recipe_set.count(), 2)
+
+    def test_delete_user_command(self):
+        """Test the delete_user command reports progress."""
+        out = StringIO()
+
+        call_command(
+            'delete_user', 'user@example.com', batch_size=2, stdout=out,
+        )
+
+        self.assertIn('recipes: 5 deleted', out.getvalue())
+        self.assertFalse(
+            get_user_model().objects.filter(pk=self.user.pk).exists()
+        )
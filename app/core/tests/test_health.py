@@ -0,0 +1,51 @@
+"""
+Tests for the health check endpoints.
+"""
+from unittest.mock import patch
+
+from django.db.utils import OperationalError
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+
+from core.db.pool import PoolTimeout
+
+
+HEALTHZ_URL = reverse('healthz')
+READYZ_URL = reverse('readyz')
+
+
+class HealthEndpointTests(TestCase):
+    """Test the liveness and readiness endpoints."""
+
+    def test_healthz(self):
+        """Test the liveness probe needs no database."""
+        with self.assertNumQueries(0):
+            res = self.client.get(HEALTHZ_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), {'status': 'ok'})
+
+    def test_readyz_queries_database(self):
+        """Test the readiness probe runs a query."""
+        with self.assertNumQueries(1):
+            res = self.client.get(READYZ_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('no-cache', res['Cache-Control'])
+
+    @patch('core.views.probe_database', side_effect=OperationalError)
+    def test_readyz_database_down(self, patched_probe):
+        """Test the readiness probe reports 503 when the db is down."""
+        res = self.client.get(READYZ_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(res.json(), {'status': 'unavailable'})
+
+    @patch('core.views.probe_database', side_effect=PoolTimeout)
+    def test_readyz_pool_exhausted(self, patched_probe):
+        """Test the readiness probe reports 503 when no connection frees up."""
+        res = self.client.get(READYZ_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
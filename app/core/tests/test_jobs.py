@@ -0,0 +1,157 @@
+"""
+Tests for the background job queue.
+"""
+from datetime import timedelta
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from core import jobs
+from core.models import Job
+
+
+@jobs.task('tests.add')
+def add(job, a, b):
+    return a + b
+
+
+@jobs.task('tests.fail')
+def fail(job):
+    raise ValueError('Broken.')
+
+
+@jobs.task('tests.progress')
+def progress(job, steps):
+    for step in range(steps):
+        jobs.report_progress(job, done=step + 1)
+    return steps
+
+
+@override_settings(JOB_RETRY_DELAY=0, JOB_RETRY_MAX_DELAY=0)
+class JobTests(TestCase):
+    """Test queueing and running jobs."""
+
+    def run_jobs(self):
+        return jobs.Worker(concurrency=0).run(burst=True)
+
+    def test_run_job(self):
+        """Test a queued job runs and records its result."""
+        job = jobs.enqueue(add, a=1, b=2)
+
+        self.assertEqual(self.run_jobs(), 1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.SUCCEEDED)
+        self.assertEqual(job.result, 3)
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNone(job.locked_at)
+
+    def test_failed_job_retried(self):
+        """Test failures are retried until max_attempts."""
+        job = jobs.enqueue(fail, max_attempts=2)
+
+        worker = jobs.Worker(concurrency=0)
+        with self.assertLogs('core.jobs', 'WARNING'):
+            worker.run(burst=True, max_jobs=1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.QUEUED)
+        self.assertIn('Broken.', job.error)
+
+        with self.assertLogs('core.jobs', 'WARNING'):
+            self.run_jobs()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_retry_backs_off(self):
+        """Test a failed job waits before its next attempt."""
+        job = jobs.enqueue(fail)
+
+        with override_settings(JOB_RETRY_DELAY=60, JOB_RETRY_MAX_DELAY=60):
+            with self.assertLogs('core.jobs', 'WARNING'):
+                self.run_jobs()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.QUEUED)
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertEqual(self.run_jobs(), 0)
+
+    def test_unknown_task_fails(self):
+        """Test a job naming no registered task fails."""
+        job = Job.objects.create(name='tests.missing', max_attempts=1)
+
+        with self.assertLogs('core.jobs', 'WARNING'):
+            self.run_jobs()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.FAILED)
+        self.assertIn('tests.missing', job.error)
+
+    def test_delayed_job_not_claimed(self):
+        """Test jobs are not claimed before run_after."""
+        jobs.enqueue(add, delay=60, a=1, b=2)
+
+        self.assertEqual(jobs.claim('test', limit=5), [])
+
+    def test_report_progress(self):
+        """Test progress reported by a task is stored on the job."""
+        job = jobs.enqueue(progress, steps=3)
+
+        self.run_jobs()
+
+        job.refresh_from_db()
+        self.assertEqual(job.progress, {'done': 3})
+
+    def test_stale_job_reclaimed(self):
+        """Test a job whose worker went away is queued again."""
+        job = jobs.enqueue(add, a=1, b=2)
+        jobs.claim('lost', limit=1)
+        Job.objects.filter(pk=job.pk).update(
+            locked_at=timezone.now() - timedelta(hours=1),
+        )
+
+        self.assertEqual(jobs.reclaim_stale(), 1)
+        self.run_jobs()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.SUCCEEDED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_run_worker_command(self):
+        """Test run_worker runs the queue and exits when empty."""
+        job = jobs.enqueue(add, a=2, b=2)
+        out = StringIO()
+
+        call_command('run_worker', burst=True, concurrency=0, stdout=out)
+
+        self.assertIn('Ran 1 job(s).', out.getvalue())
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.SUCCEEDED)
+
+
+@skipUnless(
+    connection.vendor == 'postgresql',
+    "SQLite's shared in-memory test database locks tables across threads.",
+)
+class ThreadedWorkerTests(TransactionTestCase):
+    """Test running jobs on worker threads."""
+
+    def test_run_jobs_concurrently(self):
+        """Test every queued job runs exactly once."""
+        queued = [jobs.enqueue(add, a=n, b=1) for n in range(5)]
+
+        processed = jobs.Worker(concurrency=2, poll_interval=0.01).run(
+            burst=True,
+        )
+
+        self.assertEqual(processed, 5)
+        results = dict(Job.objects.values_list('id', 'result'))
+        self.assertEqual(
+            results, {job.id: n + 1 for n, job in enumerate(queued)},
+        )
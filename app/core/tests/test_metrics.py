@@ -0,0 +1,213 @@
+"""
+Tests for the request metrics.
+"""
+import asyncio
+import random
+import re
+import threading
+from unittest import mock, skipUnless
+
+from asgiref.sync import async_to_sync
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import metrics
+from core.db.backends.postgresql_pool import base as pool_base
+from core.db.pool import ConnectionPool
+from core.models import Tag
+from recipe import async_views
+
+
+METRICS_URL = reverse('metrics')
+TAGS_URL = reverse('recipe:tag-list')
+ASYNC_TAGS_URL = reverse('recipe:async-tag-list')
+
+
+def recorded_queries(endpoint):
+    """Return the total query count recorded for endpoint."""
+    match = re.search(
+        rf'^api_db_queries_sum{{endpoint="{re.escape(endpoint)}"}} (\S+)$',
+        metrics.registry.render(), re.MULTILINE,
+    )
+    return float(match.group(1)) if match else None
+
+
+class HistogramTests(SimpleTestCase):
+    """Test the HDR-style histogram."""
+
+    def test_quantiles_within_precision(self):
+        """Test quantiles are within a few percent of the exact value."""
+        rng = random.Random(0)
+        values = sorted(rng.expovariate(100) for _ in range(10000))
+        histogram = metrics.Histogram(scale=1e6)
+        for value in values:
+            histogram.record(value)
+
+        for q in metrics.QUANTILES:
+            exact = values[int(q * len(values)) - 1]
+            self.assertAlmostEqual(
+                histogram.quantile(q), exact, delta=exact * 0.05,
+            )
+        self.assertEqual(histogram.count, len(values))
+        self.assertEqual(histogram.max, values[-1])
+
+    def test_small_integers_exact(self):
+        """Test small counts such as query counts are kept exactly."""
+        histogram = metrics.Histogram()
+        for value in (1, 3, 3, 3, 7):
+            histogram.record(value)
+
+        self.assertEqual(histogram.quantile(0.5), 3)
+        self.assertEqual(histogram.quantile(0.99), 7)
+
+
+@override_settings(METRICS_ENABLED=True)
+class MetricsMiddlewareTests(TestCase):
+    """Test per-endpoint metrics are recorded and exposed."""
+
+    def setUp(self):
+        metrics.registry.clear()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com', password='testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_viewset_actions_recorded(self):
+        """Test requests are keyed by viewset and action."""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.client.get(TAGS_URL)
+        self.client.patch(
+            reverse('recipe:tag-detail', args=[tag.id]), {'name': 'Keto'},
+        )
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        body = res.content.decode()
+        self.assertIn('# TYPE api_request_seconds summary', body)
+        self.assertIn(
+            'api_request_seconds_count{endpoint="TagViewSet.list"} 1', body,
+        )
+        self.assertIn(
+            'api_db_queries_count{endpoint="TagViewSet.partial_update"} 1',
+            body,
+        )
+        self.assertIn(
+            'api_serializer_seconds_count{endpoint="TagViewSet.list"} 1',
+            body,
+        )
+
+    def test_query_count_recorded(self):
+        """Test the DB query count of a request is recorded."""
+        self.client.get(TAGS_URL)
+
+        body = self.client.get(METRICS_URL).content.decode()
+
+        self.assertIn(
+            'api_db_queries{endpoint="TagViewSet.list",quantile="0.5"} 1',
+            body,
+        )
+
+    def test_pool_stats_exported(self):
+        """Test connection pool gauges and counters are served."""
+        key = ('pooled', 'test')
+        self.addCleanup(pool_base._pools.pop, key, None)
+        pool = pool_base.get_pool(
+            key, lambda: ConnectionPool(object, max_size=3, timeout=0),
+        )
+        pool.acquire()
+
+        body = self.client.get(METRICS_URL).content.decode()
+
+        self.assertIn('# TYPE db_pool_in_use gauge', body)
+        self.assertIn('db_pool_in_use{alias="pooled"} 1', body)
+        self.assertIn('db_pool_max_size{alias="pooled"} 3', body)
+        self.assertIn('db_pool_timeouts_total{alias="pooled"} 0', body)
+        self.assertIn('db_pool_wait_seconds_total{alias="pooled"}', body)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled(self):
+        """Test nothing is recorded or served when metrics are off."""
+        client = APIClient()
+        client.force_authenticate(self.user)
+        client.get(TAGS_URL)
+
+        res = client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(metrics.registry.render(), '\n')
+
+    @override_settings(ASYNC_VIEW_THREADS=0)
+    def test_async_view_queries_recorded(self):
+        """Test queries made by an async view are charged to it."""
+        Tag.objects.create(user=self.user, name='Vegan')
+        token = Token.objects.create(user=self.user)
+
+        res = async_to_sync(self.async_client.get)(
+            ASYNC_TAGS_URL, authorization=f'Token {token}',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertGreater(recorded_queries('TagViewSet.list.async'), 0)
+
+
+@skipUnless(
+    connection.vendor == 'postgresql',
+    "SQLite's shared in-memory test database locks tables across threads.",
+)
+@override_settings(METRICS_ENABLED=True, ASYNC_VIEW_THREADS=4)
+class AsyncMetricsMiddlewareTests(TransactionTestCase):
+    """Test the metrics middleware with async views on the view pool."""
+
+    def setUp(self):
+        metrics.registry.clear()
+        user = get_user_model().objects.create_user(
+            email='user@example.com', password='testpass123',
+        )
+        Tag.objects.create(user=user, name='Vegan')
+        self.auth = f'Token {Token.objects.create(user=user)}'
+
+    def get_concurrently(self, count):
+        async def get_all():
+            return await asyncio.gather(*[
+                self.async_client.get(ASYNC_TAGS_URL, authorization=self.auth)
+                for _ in range(count)
+            ])
+        return async_to_sync(get_all)()
+
+    def test_requests_overlap(self):
+        """Test async requests are not run one at a time."""
+        # Every request waits for all the others; served one at a time,
+        # the first would time out.
+        barrier = threading.Barrier(4, timeout=5)
+        dispatch = async_views._dispatch
+
+        def wait_for_all(*args, **kwargs):
+            barrier.wait()
+            return dispatch(*args, **kwargs)
+
+        with mock.patch.object(async_views, '_dispatch', wait_for_all):
+            responses = self.get_concurrently(4)
+
+        self.assertEqual(
+            [res.status_code for res in responses], [status.HTTP_200_OK] * 4,
+        )
+
+    def test_pool_queries_recorded(self):
+        """Test queries run on the view pool are charged to the request."""
+        self.get_concurrently(1)
+
+        self.assertGreater(recorded_queries('TagViewSet.list.async'), 0)
@@ -0,0 +1,172 @@
+"""
+Tests for maintained tag and ingredient recipe counts.
+"""
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import deletion
+from core.models import Ingredient, Recipe, Tag
+from recipe import bulk
+from recipe.serializers import TagSerializer
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {'title': 'Recipe', 'time_minutes': 5, 'price': Decimal('1')}
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class RecipeCountTests(TestCase):
+    """Test recipe_count follows every way links change."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123',
+        )
+        self.tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.other_tag = Tag.objects.create(user=self.user, name='Quick')
+        self.recipes = [create_recipe(self.user) for _ in range(3)]
+
+    def count(self, obj=None):
+        obj = obj or self.tag
+        obj.refresh_from_db()
+        return obj.recipe_count
+
+    def test_forward_changes(self):
+        """Test recipe.tags add, remove and clear."""
+        recipe = self.recipes[0]
+        recipe.tags.add(self.tag, self.other_tag)
+        recipe.tags.add(self.tag)  # already linked
+        self.assertEqual(self.count(), 1)
+        self.assertEqual(self.count(self.other_tag), 1)
+
+        recipe.tags.remove(self.tag)
+        recipe.tags.remove(self.tag)  # no longer linked
+        self.assertEqual(self.count(), 0)
+
+        recipe.tags.clear()
+        self.assertEqual(self.count(self.other_tag), 0)
+
+    def test_reverse_changes(self):
+        """Test tag.recipe_set add, remove and clear."""
+        self.tag.recipe_set.add(*self.recipes)
+        self.assertEqual(self.count(), 3)
+
+        self.tag.recipe_set.remove(self.recipes[0], self.recipes[0])
+        self.assertEqual(self.count(), 2)
+
+        self.tag.recipe_set.clear()
+        self.assertEqual(self.count(), 0)
+
+    def test_bulk_helpers(self):
+        """Test the batched link writers used by the API and importer."""
+        bulk.add_links(
+            Recipe, 'tags', [(r.pk, self.tag.pk) for r in self.recipes],
+        )
+        self.assertEqual(self.count(), 3)
+
+        bulk.set_related(self.recipes[0], 'tags', [self.other_tag])
+        self.assertEqual(self.count(), 2)
+        self.assertEqual(self.count(self.other_tag), 1)
+
+    def test_recipe_deleted(self):
+        """Test deleting a recipe takes it off its tags' counts."""
+        ingredient = Ingredient.objects.create(user=self.user, name='Salt')
+        for recipe in self.recipes:
+            recipe.tags.add(self.tag)
+        self.recipes[0].ingredients.add(ingredient)
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        res = client.delete(
+            reverse('recipe:recipe-detail', args=[self.recipes[0].id]),
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.count(), 2)
+        self.assertEqual(self.count(ingredient), 0)
+
+    def test_recipes_deleted_in_admin(self):
+        """Test the admin delete action uncounts every selected recipe."""
+        admin = get_user_model().objects.create_superuser(
+            'admin@example.com', 'testpass123',
+        )
+        self.tag.recipe_set.add(*self.recipes)
+        self.client.force_login(admin)
+
+        self.client.post(reverse('admin:core_recipe_changelist'), {
+            'action': 'delete_selected',
+            '_selected_action': [r.pk for r in self.recipes[:2]],
+            'post': 'yes',
+        })
+
+        self.assertEqual(Recipe.objects.count(), 1)
+        self.assertEqual(self.count(), 1)
+
+    def test_queryset_and_cascade_deletes(self):
+        """Test ORM deletes of recipes uncount them, however made."""
+        other = get_user_model().objects.create_user(
+            'other@example.com', 'testpass123',
+        )
+        ingredient = Ingredient.objects.create(user=self.user, name='Salt')
+        self.tag.recipe_set.add(*self.recipes, create_recipe(other))
+        ingredient.recipe_set.add(self.recipes[0])
+
+        Recipe.objects.filter(pk=self.recipes[0].pk).delete()
+        self.assertEqual(self.count(), 3)
+        self.assertEqual(self.count(ingredient), 0)
+
+        other.delete()
+        self.assertEqual(self.count(), 2)
+
+    def test_update_keeps_concurrent_count(self):
+        """Test saving a tag keeps links made after it was loaded."""
+        serializer = TagSerializer(self.tag, data={'name': 'Vegetarian'})
+        self.assertTrue(serializer.is_valid())
+        self.recipes[0].tags.add(self.tag)
+
+        serializer.save()
+
+        self.assertEqual(self.count(), 1)
+        self.assertEqual(self.tag.name, 'Vegetarian')
+
+    def test_user_deleted_in_batches(self):
+        """Test chunked user deletion uncounts other users' tags."""
+        other = get_user_model().objects.create_user(
+            'other@example.com', 'testpass123',
+        )
+        shared = Tag.objects.create(user=other, name='Shared')
+        shared.recipe_set.add(*self.recipes)
+        shared.recipe_set.add(create_recipe(other))
+
+        deletion.delete_user(self.user.pk, batch_size=2)
+
+        self.assertEqual(self.count(shared), 1)
+
+    def test_reconcile(self):
+        """Test drifted counts are reported and recounted."""
+        self.tag.recipe_set.add(*self.recipes)
+        Tag.objects.filter(pk=self.tag.pk).update(recipe_count=7)
+
+        with self.assertRaises(CommandError):
+            call_command(
+                'reconcile_recipe_counts', dry_run=True, stdout=StringIO(),
+            )
+        self.assertEqual(self.count(), 7)
+
+        out = StringIO()
+        call_command('reconcile_recipe_counts', batch_size=1, stdout=out)
+
+        self.assertIn('tags: 1 of 2 counts out of date', out.getvalue())
+        self.assertEqual(self.count(), 3)
+        self.assertEqual(self.count(self.other_tag), 0)
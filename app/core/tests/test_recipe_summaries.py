@@ -0,0 +1,74 @@
+"""
+Tests for the check_recipe_summaries command.
+"""
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from core.models import Ingredient, Recipe, Tag
+
+
+class CheckRecipeSummariesTests(TestCase):
+    """Test finding and repairing summary drift."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123',
+        )
+        self.tag = Tag.objects.create(user=user, name='Vegan')
+        ingredient = Ingredient.objects.create(user=user, name='Salt')
+        self.recipes = []
+        for n in range(3):
+            recipe = Recipe.objects.create(
+                user=user, title=f'Recipe {n}', time_minutes=5,
+                price=Decimal('1.00'),
+            )
+            recipe.tags.add(self.tag)
+            recipe.ingredients.add(ingredient)
+            self.recipes.append(recipe)
+
+    def test_no_drift(self):
+        """Test maintained summaries pass the check."""
+        out = StringIO()
+
+        call_command('check_recipe_summaries', batch_size=2, stdout=out)
+
+        self.assertIn('Checked 3 recipes: 0 summaries out of date', (
+            out.getvalue()
+        ))
+
+    def test_drift_reported(self):
+        """Test drift fails the check without changing anything."""
+        # A rename that bypasses the signals.
+        Tag.objects.filter(pk=self.tag.pk).update(name='Keto')
+
+        with self.assertRaises(CommandError):
+            call_command('check_recipe_summaries', stdout=StringIO())
+
+        self.recipes[0].refresh_from_db()
+        self.assertEqual(self.recipes[0].tag_summary[0]['name'], 'Vegan')
+
+    def test_drift_repaired(self):
+        """Test --repair rewrites stale and missing summaries."""
+        Tag.objects.filter(pk=self.tag.pk).update(name='Keto')
+        Recipe.objects.filter(pk=self.recipes[1].pk).update(
+            ingredient_summary=None,
+        )
+        out = StringIO()
+
+        call_command(
+            'check_recipe_summaries', repair=True, batch_size=2, stdout=out,
+        )
+
+        self.assertIn('4 summaries out of date (3 tags, 1 ingredients)', (
+            out.getvalue()
+        ))
+        for recipe in Recipe.objects.all():
+            self.assertEqual(
+                recipe.tag_summary, [{'id': self.tag.id, 'name': 'Keto'}],
+            )
+            self.assertEqual(len(recipe.ingredient_summary), 1)
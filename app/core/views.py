@@ -1,3 +1,45 @@
-from django.shortcuts import render  # noqa
+"""
+Health check and metrics views.
+"""
+from psycopg2 import OperationalError as Psycopg2OpError
 
-# Create your views here.
+from django.conf import settings
+from django.db.utils import OperationalError
+from django.http import Http404, HttpResponse, JsonResponse
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_GET
+
+from core import metrics
+from core.db.backends.postgresql_pool.base import pool_stats
+from core.db.pool import PoolTimeout
+from core.health import probe_database
+
+
+@never_cache
+@require_GET
+def healthz(request):
+    """Report that the process is up and serving requests."""
+    return JsonResponse({'status': 'ok'})
+
+
+@never_cache
+@require_GET
+def readyz(request):
+    """Report whether the database accepts queries."""
+    try:
+        probe_database()
+    except (Psycopg2OpError, OperationalError, PoolTimeout):
+        return JsonResponse({'status': 'unavailable'}, status=503)
+    return JsonResponse({'status': 'ok'})
+
+
+@never_cache
+@require_GET
+def prometheus_metrics(request):
+    """Serve the request histograms and pool stats for Prometheus."""
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    return HttpResponse(
+        metrics.registry.render() + metrics.render_pool_stats(pool_stats()),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
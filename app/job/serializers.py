@@ -0,0 +1,18 @@
+"""
+Serializers for the job API.
+"""
+from rest_framework import serializers
+
+from core.models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """Serializer for background job status."""
+
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'name', 'status', 'attempts', 'max_attempts', 'progress',
+            'result', 'created_at', 'updated_at',
+        ]
+        read_only_fields = fields
@@ -0,0 +1,84 @@
+"""
+Tests for the job API.
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Job
+
+
+JOBS_URL = reverse('job:job-list')
+
+
+def detail_url(job_id):
+    """Create and return a job detail URL."""
+    return reverse('job:job-detail', args=[job_id])
+
+
+def create_user(**params):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(**params)
+
+
+class PublicJobApiTests(TestCase):
+    """Test unauthenticated API requests."""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        """Test auth is required for retrieving jobs."""
+        res = self.client.get(JOBS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateJobApiTests(TestCase):
+    """Test authenticated API requests."""
+
+    def setUp(self):
+        self.user = create_user(email='user@example.com', password='test123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_retrieve_jobs(self):
+        """Test listing jobs is limited to the authenticated user."""
+        other = create_user(email='other@example.com', password='test123')
+        job = Job.objects.create(name='example', user=self.user)
+        Job.objects.create(name='example', user=other)
+
+        res = self.client.get(JOBS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([j['id'] for j in res.data['results']], [job.id])
+
+    def test_job_status(self):
+        """Test retrieving the status of a job."""
+        job = Job.objects.create(
+            name='example',
+            user=self.user,
+            status=Job.Status.SUCCEEDED,
+            progress={'done': 2},
+            result={'deleted': 2},
+        )
+
+        res = self.client.get(detail_url(job.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['status'], 'succeeded')
+        self.assertEqual(res.data['progress'], {'done': 2})
+        self.assertEqual(res.data['result'], {'deleted': 2})
+        self.assertNotIn('error', res.data)
+
+    def test_other_users_job_not_found(self):
+        """Test jobs of other users are not visible."""
+        other = create_user(email='other@example.com', password='test123')
+        job = Job.objects.create(name='example', user=other)
+
+        res = self.client.get(detail_url(job.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,23 @@
+"""
+Views for the job API.
+"""
+from rest_framework import viewsets
+from rest_framework.permissions import IsAuthenticated
+
+from core.models import Job
+from job import serializers
+from recipe.pagination import RecipeCursorPagination
+from user.authentication import CachedTokenAuthentication
+
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Report the status of the authenticated user's background jobs."""
+    serializer_class = serializers.JobSerializer
+    queryset = Job.objects.all()
+    pagination_class = RecipeCursorPagination
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        """Filter queryset to authenticated user."""
+        return self.queryset.filter(user=self.request.user).order_by('-id')
@@ -0,0 +1,87 @@
+"""
+Async views for the read-only recipe APIs.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from recipe import views
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return this process's view thread pool, None if it has no threads."""
+    global _pool, _pool_pid
+    if settings.ASYNC_VIEW_THREADS <= 0:
+        return None
+    with _pool_lock:
+        # A forked server worker must not inherit its parent's threads.
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ThreadPoolExecutor(
+                max_workers=settings.ASYNC_VIEW_THREADS,
+                thread_name_prefix='async-view',
+            )
+            _pool_pid = os.getpid()
+    return _pool
+
+
+def _dispatch(view, request, *args, **kwargs):
+    """Run a DRF view and render its response."""
+    response = view(request, *args, **kwargs)
+    if hasattr(response, 'render'):
+        response.render()
+    return response
+
+
+def _dispatch_in_pool(view, request, *args, **kwargs):
+    """Run _dispatch on a pool thread, tidying its connection like Django.
+
+    request_started/finished only close connections on Django's own
+    thread, so do it here; with CONN_MAX_AGE each pool thread keeps one.
+    """
+    close_old_connections()
+    try:
+        return _dispatch(view, request, *args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def as_async_view(viewset, actions):
+    """Return an async view serving actions of viewset.
+
+    Django 3.2 has no async ORM, so authentication, the queries and
+    serialization run as one sync_to_async call on the shared, bounded
+    pool; the request is held by the event loop, not a thread, for the
+    rest of its lifetime. Without a pool the call is thread-sensitive.
+    """
+    view = viewset.as_view(actions)
+
+    async def async_view(request, *args, **kwargs):
+        pool = get_pool()
+        if pool is None:
+            dispatch = sync_to_async(_dispatch)
+        else:
+            dispatch = sync_to_async(
+                _dispatch_in_pool, thread_sensitive=False, executor=pool,
+            )
+        return await dispatch(view, request, *args, **kwargs)
+
+    async_view.csrf_exempt = True
+    # Labels the view in the request metrics, e.g. RecipeViewSet.list.async.
+    async_view.__name__ = f'{viewset.__name__}.{actions["get"]}.async'
+    return async_view
+
+
+recipe_list = as_async_view(views.RecipeViewSet, {'get': 'list'})
+recipe_detail = as_async_view(views.RecipeViewSet, {'get': 'retrieve'})
+tag_list = as_async_view(views.TagViewSet, {'get': 'list'})
+ingredient_list = as_async_view(views.IngredientViewSet, {'get': 'list'})
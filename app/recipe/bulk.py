@@ -0,0 +1,195 @@
+"""
+Batched helpers for writing recipes and their tags/ingredients.
+"""
+from collections import Counter, defaultdict
+
+from django.db import connection
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from core.models import Recipe
+
+
+# Recipe columns holding a denormalized [{id, name}, ...] copy of each M2M
+# field, ordered by id, so list reads need no through-table lookups. NULL
+# means not computed yet; readers then fall back to the through table.
+SUMMARY_FIELDS = {
+    'tags': 'tag_summary',
+    'ingredients': 'ingredient_summary',
+}
+
+SUMMARY_BATCH_SIZE = 1000
+
+
+def resolve_by_name(model, user, names):
+    """Return {name: obj} for the user's objects, creating missing ones."""
+    names = list(dict.fromkeys(names))
+    if not names:
+        return {}
+
+    resolved = {}
+    for obj in model.objects.filter(user=user, name__in=names).order_by('id'):
+        resolved.setdefault(obj.name, obj)
+
+    missing = [name for name in names if name not in resolved]
+    if missing:
+        created = model.objects.bulk_create(
+            [model(user=user, name=name) for name in missing]
+        )
+        if not connection.features.can_return_rows_from_bulk_insert:
+            # Backends such as SQLite don't hand back primary keys from a
+            # bulk insert, so read the new rows back in one query.
+            created = model.objects.filter(
+                user=user, name__in=missing,
+            ).order_by('id')
+        for obj in created:
+            resolved.setdefault(obj.name, obj)
+
+    return resolved
+
+
+def create_all(model, objs):
+    """Insert objs in one statement and return them with primary keys."""
+    if connection.features.can_return_rows_from_bulk_insert:
+        return model.objects.bulk_create(objs)
+    # Without RETURNING support bulk_create leaves pk unset, which the
+    # through-table writes need, so fall back to one insert per row.
+    for obj in objs:
+        obj.save(force_insert=True)
+    return objs
+
+
+def _get_through(model, field_name):
+    """Return the through model and its two FK column names."""
+    field = model._meta.get_field(field_name)
+    return (
+        field.remote_field.through,
+        f'{field.m2m_field_name()}_id',
+        f'{field.m2m_reverse_field_name()}_id',
+    )
+
+
+def add_links(model, field_name, pairs):
+    """Insert (model pk, related pk) pairs for an M2M field at once."""
+    through, source, target = _get_through(model, field_name)
+    through.objects.bulk_create([
+        through(**{source: pk, target: related_pk})
+        for pk, related_pk in pairs
+    ])
+    if model is Recipe:
+        adjust_counts(field_name, [related_pk for _, related_pk in pairs])
+        return refresh_summaries(field_name, {pk for pk, _ in pairs})
+    return {}
+
+
+def add_related(instance, field_name, objs):
+    """Link objs to instance's M2M field with a single insert."""
+    summaries = add_links(
+        type(instance), field_name, [(instance.pk, obj.pk) for obj in objs],
+    )
+    if instance.pk in summaries:
+        # Keep the instance in step so a later save() doesn't undo it.
+        setattr(instance, SUMMARY_FIELDS[field_name], summaries[instance.pk])
+
+
+def set_related(instance, field_name, objs):
+    """Make instance's M2M field hold exactly objs, writing only the diff.
+
+    Unchanged links are left alone, so at most one DELETE and one INSERT
+    are issued and none at all when nothing changed.
+    """
+    through, source, target = _get_through(type(instance), field_name)
+    links = through.objects.filter(**{source: instance.pk})
+    current = set(links.values_list(target, flat=True))
+    wanted = {obj.pk: obj for obj in objs}
+
+    stale = current - wanted.keys()
+    if stale:
+        links.filter(**{f'{target}__in': stale}).delete()
+        if type(instance) is Recipe:
+            adjust_counts(field_name, stale, -1)
+    added = [obj for pk, obj in wanted.items() if pk not in current]
+    add_related(instance, field_name, added)
+    if stale and not added and type(instance) is Recipe:
+        summaries = refresh_summaries(field_name, [instance.pk])
+        setattr(instance, SUMMARY_FIELDS[field_name], summaries[instance.pk])
+
+
+def build_summaries(field_name, recipe_ids):
+    """Return {recipe id: [{id, name}, ...]} for a recipe M2M field."""
+    through, source, target = _get_through(Recipe, field_name)
+    related = target[:-len('_id')]
+    links = through.objects.filter(**{f'{source}__in': recipe_ids}).order_by(
+        target,
+    ).values_list(source, target, f'{related}__name')
+    summaries = {pk: [] for pk in recipe_ids}
+    for pk, related_pk, name in links:
+        summaries[pk].append({'id': related_pk, 'name': name})
+    return summaries
+
+
+def refresh_summaries(field_name, recipe_ids):
+    """Recompute the summary column of field_name for the recipes.
+
+    Returns the new summaries by recipe id.
+    """
+    recipe_ids = list(recipe_ids)
+    column = SUMMARY_FIELDS[field_name]
+    summaries = {}
+    for start in range(0, len(recipe_ids), SUMMARY_BATCH_SIZE):
+        chunk = recipe_ids[start:start + SUMMARY_BATCH_SIZE]
+        summaries.update(build_summaries(field_name, chunk))
+        Recipe.objects.bulk_update(
+            [Recipe(pk=pk, **{column: summaries[pk]}) for pk in chunk],
+            [column],
+        )
+    return summaries
+
+
+def linked_recipe_ids(field_name, related_pk):
+    """Return the ids of the recipes linked to a tag or ingredient."""
+    through, source, target = _get_through(Recipe, field_name)
+    return list(through.objects.filter(
+        **{target: related_pk}
+    ).values_list(source, flat=True))
+
+
+def adjust_counts(field_name, related_ids, sign=1):
+    """Add sign for each occurrence of an id to its recipe_count.
+
+    The increments are applied in the database with F(), so concurrent
+    writers never lose each other's changes. Ids sharing a delta are
+    updated together.
+    """
+    model = Recipe._meta.get_field(field_name).related_model
+    by_delta = defaultdict(list)
+    for pk, occurrences in Counter(related_ids).items():
+        by_delta[sign * occurrences].append(pk)
+    for delta, pks in by_delta.items():
+        model.objects.filter(pk__in=pks).update(
+            recipe_count=F('recipe_count') + delta,
+        )
+
+
+def uncount_recipes(recipe_ids):
+    """Take recipes about to be deleted off their related recipe counts.
+
+    Deleting a recipe drops its links without m2m signals, so call this
+    first, in the same transaction. recipe_ids may be a queryset.
+    Model and queryset deletes do so from a pre_delete receiver.
+    """
+    for field_name in SUMMARY_FIELDS:
+        through, source, target = _get_through(Recipe, field_name)
+        adjust_counts(field_name, through.objects.filter(
+            **{f'{source}__in': recipe_ids}
+        ).values_list(target, flat=True), -1)
+
+
+def counted_recipes(field_name):
+    """Return an expression counting the recipes linked to each row."""
+    through, _, target = _get_through(Recipe, field_name)
+    return Coalesce(Subquery(
+        through.objects.filter(**{target: OuterRef('pk')}).order_by().values(
+            target,
+        ).annotate(n=Count('pk')).values('n')
+    ), 0)
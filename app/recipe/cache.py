@@ -0,0 +1,157 @@
+"""
+Per-user response cache and conditional GET support for the recipe APIs.
+
+Cached responses and ETags are keyed on the user's generation, a counter
+that every write bumps, so invalidating a user is a single increment and
+stale entries simply age out of the cache.
+"""
+import hashlib
+import math
+import random
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from rest_framework import status
+from rest_framework.response import Response
+
+
+CACHE_ALIAS = 'api'
+
+
+def _generation_key(user_id):
+    return f'recipe-api:generation:{user_id}'
+
+
+def _modified_key(user_id):
+    return f'recipe-api:modified:{user_id}'
+
+
+def _start_generation(cache, user_id):
+    # A random start means a generation lost to eviction can't be reused
+    # by accident and resurrect responses cached under it.
+    cache.add(_generation_key(user_id), random.getrandbits(48), None)
+    cache.set(_modified_key(user_id), time.time(), None)
+
+
+def get_generation(user_id):
+    """Return the user's current cache generation."""
+    cache = caches[CACHE_ALIAS]
+    generation = cache.get(_generation_key(user_id))
+    if generation is None:
+        _start_generation(cache, user_id)
+        generation = cache.get(_generation_key(user_id))
+    return generation
+
+
+def is_shared():
+    """Return True if the cache is one every worker process sees."""
+    return not isinstance(caches[CACHE_ALIAS], (DummyCache, LocMemCache))
+
+
+def get_last_modified(user_id):
+    """Return the time of the user's last write as a timestamp."""
+    cache = caches[CACHE_ALIAS]
+    modified = cache.get(_modified_key(user_id))
+    if modified is None:
+        # Unknown after eviction; now is the only safe answer.
+        modified = time.time()
+        cache.add(_modified_key(user_id), modified, None)
+    return modified
+
+
+def _increment(user_id):
+    cache = caches[CACHE_ALIAS]
+    try:
+        cache.incr(_generation_key(user_id))
+    except ValueError:
+        _start_generation(cache, user_id)
+    else:
+        cache.set(_modified_key(user_id), time.time(), None)
+
+
+def bump_generation(user_id):
+    """Invalidate every cached response and ETag for the user.
+
+    The generation is bumped straight away so the writer's own reads miss,
+    and again on commit so anything cached from pre-commit data by a
+    concurrent reader is dropped as well.
+    """
+    _increment(user_id)
+    transaction.on_commit(lambda: _increment(user_id))
+
+
+class CachedResponseMixin:
+    """Serve list responses from the per-user cache with validators.
+
+    A request with a matching If-None-Match, or a fresh If-Modified-Since,
+    gets a 304 before the queryset or serializer is touched.
+    """
+
+    def _get_request_digest(self, request):
+        query = sorted(request.query_params.lists())
+        raw = (
+            f'{get_generation(request.user.id)}:'
+            f'{request.get_host()}{request.path}?{query}'
+        )
+        return hashlib.md5(raw.encode()).hexdigest()
+
+    def get_last_modified(self, request):
+        """Return the Last-Modified timestamp for the response."""
+        return get_last_modified(request.user.id)
+
+    def _get_http_last_modified(self, request):
+        last_modified = self.get_last_modified(request)
+        if last_modified is None:
+            return None
+        # HTTP dates are whole seconds. Round up, and send none until that
+        # second is over, so a later write always has a later date.
+        last_modified = math.ceil(last_modified)
+        return last_modified if last_modified <= time.time() else None
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        """Return a 304, the cached response or a freshly cached one."""
+        digest = self._get_request_digest(request)
+        etag = '"%s"' % hashlib.md5(
+            f'{digest}:{request.accepted_media_type}'.encode()
+        ).hexdigest()
+        # If-Modified-Since is ignored alongside If-None-Match, so don't
+        # pay for a Last-Modified lookup the check won't use.
+        last_modified = None
+        if 'HTTP_IF_NONE_MATCH' not in request.META:
+            last_modified = self._get_http_last_modified(request)
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified,
+        )
+        if response is None:
+            cache = caches[CACHE_ALIAS]
+            key = f'recipe-api:response:{request.user.id}:{digest}'
+            data = cache.get(key)
+            if data is not None:
+                response = Response(data)
+            else:
+                response = handler(request, *args, **kwargs)
+                if response.status_code == status.HTTP_200_OK:
+                    cache.set(key, response.data)
+
+        if response.status_code == status.HTTP_200_OK:
+            if last_modified is None:
+                last_modified = self._get_http_last_modified(request)
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        if response.status_code in (
+            status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED,
+        ):
+            response['ETag'] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().list, request, *args, **kwargs
+        )
@@ -0,0 +1,88 @@
+"""
+Streaming NDJSON/CSV export of recipes.
+"""
+import csv
+import json
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from core.models import Recipe
+
+
+EXPORT_FIELDS = [
+    'id', 'title', 'description', 'time_minutes', 'price', 'link',
+]
+RELATED_FIELDS = ['tags', 'ingredients']
+
+
+class Echo:
+    """File-like object that hands back what is written to it."""
+
+    def write(self, value):
+        return value
+
+
+def _get_related(recipe_ids, field_name):
+    """Return {recipe id: [{id, name}, ...]} for one M2M field."""
+    field = Recipe._meta.get_field(field_name)
+    source = f'{field.m2m_field_name()}_id'
+    target = field.m2m_reverse_field_name()
+    links = field.remote_field.through.objects.filter(
+        **{f'{source}__in': recipe_ids}
+    ).order_by(f'{target}_id').values_list(
+        source, f'{target}__id', f'{target}__name',
+    )
+
+    related = {}
+    for recipe_id, related_id, name in links:
+        related.setdefault(recipe_id, []).append(
+            {'id': related_id, 'name': name}
+        )
+    return related
+
+
+def iter_recipes(queryset, chunk_size):
+    """Yield recipe dicts with their tags and ingredients.
+
+    Rows are read through a server-side cursor and tags/ingredients are
+    fetched for one chunk of recipes at a time, so memory use depends on
+    chunk_size and not on the size of the collection.
+    """
+    rows = queryset.values(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        ids = [row['id'] for row in chunk]
+        related = {name: _get_related(ids, name) for name in RELATED_FIELDS}
+        for row in chunk:
+            for name in RELATED_FIELDS:
+                row[name] = related[name].get(row['id'], [])
+            yield row
+
+
+def export_ndjson(queryset, chunk_size):
+    """Yield the recipes as newline-delimited JSON."""
+    for row in iter_recipes(queryset, chunk_size):
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+
+def export_csv(queryset, chunk_size):
+    """Yield the recipes as CSV, with related names joined by ';'."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS + RELATED_FIELDS)
+    for row in iter_recipes(queryset, chunk_size):
+        yield writer.writerow(
+            [row[name] for name in EXPORT_FIELDS]
+            + [
+                ';'.join(item['name'] for item in row[name])
+                for name in RELATED_FIELDS
+            ]
+        )
+
+
+EXPORT_FORMATS = {
+    'ndjson': (export_ndjson, 'application/x-ndjson'),
+    'csv': (export_csv, 'text/csv'),
+}
@@ -0,0 +1,186 @@
+"""
+Recipe image uploads and the background thumbnail pipeline.
+
+Uploads are streamed to a temporary file, never held in memory, and
+thumbnails are made on a thread pool once the upload has committed. A
+thumbnail is stored under the sha256 of its bytes, so its URL never
+changes meaning and can be cached forever.
+"""
+import hashlib
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.db import connection, router, transaction
+
+from PIL import Image, ImageOps
+
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from core.models import Recipe
+from recipe.cache import bump_generation
+
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_QUALITY = 85
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+class ImageTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'Image is too large.'
+    default_code = 'image_too_large'
+
+
+class LimitedTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """Stream uploads to disk and give up past RECIPE_IMAGE_MAX_BYTES."""
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.RECIPE_IMAGE_MAX_BYTES:
+            self.file.close()
+            raise ImageTooLarge()
+        return super().receive_data_chunk(raw_data, start)
+
+
+def get_thumbnail_storage():
+    """Return the storage thumbnails are kept in."""
+    return FileSystemStorage(location=settings.RECIPE_THUMBNAIL_ROOT)
+
+
+def thumbnail_name(digest):
+    """Return the storage name of the thumbnail with this digest."""
+    return os.path.join(digest[:2], f'{digest}.jpg')
+
+
+def make_thumbnail(source):
+    """Return JPEG thumbnail bytes for the image file source."""
+    size = settings.RECIPE_THUMBNAIL_SIZE
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        image.thumbnail((size, size))
+        output = io.BytesIO()
+        image.save(
+            output, 'JPEG', quality=THUMBNAIL_QUALITY, optimize=True,
+        )
+    return output.getvalue()
+
+
+def store_thumbnail(content):
+    """Save thumbnail bytes under their digest and return the digest."""
+    digest = hashlib.sha256(content).hexdigest()
+    storage = get_thumbnail_storage()
+    name = thumbnail_name(digest)
+    if not storage.exists(name):  # identical images share one file
+        storage.save(name, ContentFile(content))
+    return digest
+
+
+def generate_thumbnail(recipe_id, user_id, image_name):
+    """Thumbnail image_name and record it on the recipe."""
+    with default_storage.open(image_name) as source:
+        digest = store_thumbnail(make_thumbnail(source))
+    # Only if the image is unchanged; a newer upload has its own job.
+    updated = Recipe.objects.filter(
+        pk=recipe_id, image=image_name,
+    ).update(thumbnail=digest)
+    if updated:
+        bump_generation(user_id)  # update() sends no signals
+    return digest
+
+
+def _run_job(recipe_id, user_id, image_name):
+    try:
+        generate_thumbnail(recipe_id, user_id, image_name)
+    except Exception:
+        logger.exception('Thumbnail failed for recipe %s', recipe_id)
+    finally:
+        connection.close()  # pool threads would otherwise leak one each
+
+
+def get_pool():
+    """Return this process's thumbnail pool, or None to run inline."""
+    global _pool, _pool_pid
+    if settings.RECIPE_IMAGE_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        # A pool inherited across fork() has no live threads.
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ThreadPoolExecutor(
+                max_workers=settings.RECIPE_IMAGE_WORKERS,
+                thread_name_prefix='thumbnail',
+            )
+            _pool_pid = os.getpid()
+    return _pool
+
+
+def shutdown_pool():
+    """Wait for queued thumbnails and stop the pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.shutdown()
+        _pool = None
+
+
+def schedule_thumbnail(recipe, using=None):
+    """Thumbnail the recipe's image once the current transaction commits."""
+    args = (recipe.pk, recipe.user_id, recipe.image.name)
+
+    def submit():
+        pool = get_pool()
+        if pool is None:
+            generate_thumbnail(*args)
+        else:
+            pool.submit(_run_job, *args)
+
+    transaction.on_commit(submit, using=using)
+
+
+def delete_image(name, using=None):
+    """Remove a replaced original image once the transaction commits."""
+    if name:
+        transaction.on_commit(
+            lambda: default_storage.delete(name), using=using,
+        )
+
+
+def delete_files(files, using=None):
+    """Remove the files of deleted recipes once the transaction commits.
+
+    files holds (image name, thumbnail digest) pairs. Identical images
+    share a thumbnail, so only digests no recipe still shows are removed.
+    """
+    names = [image for image, _ in files if image]
+    digests = {thumbnail for _, thumbnail in files if thumbnail}
+    if not names and not digests:
+        return
+
+    def delete():
+        for name in names:
+            default_storage.delete(name)
+        in_use = Recipe.objects.using(
+            using or router.db_for_write(Recipe),
+        ).filter(thumbnail__in=digests).values_list('thumbnail', flat=True)
+        storage = get_thumbnail_storage()
+        for digest in digests - set(in_use):
+            storage.delete(thumbnail_name(digest))
+
+    transaction.on_commit(delete, using=using)
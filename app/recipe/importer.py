@@ -0,0 +1,120 @@
+"""
+Streaming NDJSON import of recipes.
+"""
+import json
+import logging
+import tempfile
+
+from django.db import DatabaseError, transaction
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+from recipe import bulk
+from recipe.cache import bump_generation
+from recipe.serializers import RecipeDetailSerializer
+
+
+logger = logging.getLogger(__name__)
+
+# Result rows beyond this many bytes are spooled to a temporary file.
+RESULTS_MEMORY_SIZE = 1024 * 1024
+
+RELATED_FIELDS = (
+    ('tags', Tag),
+    ('ingredients', Ingredient),
+)
+
+
+def _result(line, **fields):
+    """Encode a per-line import result as an NDJSON row."""
+    return (json.dumps({'line': line, **fields}) + '\n').encode()
+
+
+@transaction.atomic
+def _write_batch(user, batch):
+    """Write a batch of validated recipes and their tags/ingredients."""
+    related = {name: [] for name, _ in RELATED_FIELDS}
+    recipes = []
+    for _, data in batch:
+        for name, _ in RELATED_FIELDS:
+            related[name].append(
+                [item['name'] for item in data.pop(name, [])]
+            )
+        recipes.append(Recipe(user=user, **data))
+
+    recipes = bulk.create_all(Recipe, recipes)
+
+    for name, model in RELATED_FIELDS:
+        resolved = bulk.resolve_by_name(
+            model, user, [n for names in related[name] for n in names],
+        )
+        bulk.add_links(Recipe, name, [
+            (recipe.pk, resolved[n].pk)
+            for recipe, names in zip(recipes, related[name])
+            for n in dict.fromkeys(names)
+        ])
+
+    bump_generation(user.id)
+    return [
+        _result(line, status='created', id=recipe.pk)
+        for (line, _), recipe in zip(batch, recipes)
+    ]
+
+
+def _write_or_report(user, batch):
+    """Write a batch, reporting every line in it if the write fails."""
+    try:
+        return _write_batch(user, batch)
+    except DatabaseError:
+        logger.exception(
+            'Could not import lines %s-%s', batch[0][0], batch[-1][0],
+        )
+        return [
+            _result(line, status='error', errors='Could not save recipe.')
+            for line, _ in batch
+        ]
+
+
+def import_recipes(lines, user, batch_size, context):
+    """Import recipes from NDJSON lines, yielding one result per line.
+
+    Lines are consumed lazily and written batch_size recipes at a time,
+    so memory use is bounded by the batch and not by the upload.
+    """
+    batch = []
+    for line, raw in enumerate(lines, start=1):
+        if not raw.strip():
+            continue
+        try:
+            data = json.loads(raw)
+        except ValueError as exc:
+            yield _result(line, status='error', errors=str(exc))
+            continue
+
+        serializer = RecipeDetailSerializer(data=data, context=context)
+        if not serializer.is_valid():
+            yield _result(line, status='error', errors=serializer.errors)
+            continue
+
+        batch.append((line, serializer.validated_data))
+        if len(batch) >= batch_size:
+            yield from _write_or_report(user, batch)
+            batch = []
+
+    if batch:
+        yield from _write_or_report(user, batch)
+
+
+def spool_results(results):
+    """Run an import to the end and return its rows as a rewound file.
+
+    The writes then happen while the view is handling the request, and
+    memory stays bounded however many result rows there are.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=RESULTS_MEMORY_SIZE)
+    spool.writelines(results)
+    spool.seek(0)
+    return spool
@@ -0,0 +1,28 @@
+"""
+Pagination for the recipe APIs.
+"""
+from django.conf import settings
+
+from rest_framework.pagination import CursorPagination
+
+
+class RecipeCursorPagination(CursorPagination):
+    """Keyset pagination for recipes, newest first."""
+    ordering = '-id'
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+
+    def get_ordering(self, request, queryset, view):
+        """Use the view's cursor ordering when it provides one."""
+        get_cursor_ordering = getattr(view, 'get_cursor_ordering', None)
+        ordering = get_cursor_ordering() if get_cursor_ordering else None
+        if ordering:
+            return ordering
+        return super().get_ordering(request, queryset, view)
+
+
+class NameCursorPagination(RecipeCursorPagination):
+    """Keyset pagination for tags and ingredients, ordered by name."""
+    # Names repeat; id keeps tied rows in one order across requests.
+    ordering = ('-name', '-id')
@@ -0,0 +1,35 @@
+"""
+Replica routing for the recipe APIs.
+"""
+import time
+
+from django.conf import settings
+
+from rest_framework.permissions import SAFE_METHODS
+
+from core import db_router
+from recipe import cache
+
+
+class ReplicaRoutingMixin:
+    """Pin writes and the user's recent-write window to the primary."""
+
+    def dispatch(self, request, *args, **kwargs):
+        with db_router.routing_scope():
+            return super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method not in SAFE_METHODS or self.wrote_recently():
+            db_router.pin_primary()
+
+    def wrote_recently(self):
+        """Return True while replicas may not have the user's last write."""
+        user = self.request.user
+        if not user.is_authenticated:
+            return False
+        if not cache.is_shared():
+            # A write served by another worker would not show up here.
+            return True
+        age = time.time() - cache.get_last_modified(user.id)
+        return age < settings.DB_REPLICA_STICKY_SECONDS
@@ -1,19 +1,147 @@
 """
 Serializers for recipe APIs
 """
+from typing import Optional
+
+from django.db import models, transaction
+from django.urls import reverse
+
 from rest_framework import serializers
 
+from core import metrics
 from core.models import (
     Recipe,
     Tag,
     Ingredient,
 )
+from recipe import bulk
+from recipe.cache import bump_generation
+
+
+class TimedListSerializer(serializers.ListSerializer):
+    """List serializer that reports its time to the request metrics."""
+
+    def to_representation(self, data):
+        if self.parent is not None:  # nested; the outer serializer times it
+            return super().to_representation(data)
+        with metrics.time_serializer():
+            return super().to_representation(data)
+
+
+class ValuesListSerializer(TimedListSerializer):
+    """List serializer with a fast path for .values() rows.
+
+    Dict rows are rendered straight from their columns, and nested
+    many=True fields from one through-table query each, instead of field
+    by field. The output is identical to rendering the model instances
+    with the nested objects ordered by id.
+    """
+
+    def to_representation(self, data):
+        if isinstance(data, models.Manager):
+            data = data.all()
+        rows = list(data)
+        if not rows or not isinstance(rows[0], dict):
+            return super().to_representation(rows)
+        if self.parent is not None:
+            return self._represent_rows(rows)
+        with metrics.time_serializer():
+            return self._represent_rows(rows)
+
+    def _represent_rows(self, rows):
+        model = self.child.Meta.model
+        summary_fields = getattr(self.child.Meta, 'summary_fields', {})
+        # (name, converter, related) in field order; plain columns need no
+        # converter and many=True fields are read from their summary column
+        # when the row has one, or else looked up by row id.
+        spec = []
+        for name, field in self.child.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.ListSerializer):
+                column = summary_fields.get(name)
+                ids = [
+                    row['id'] for row in rows if row.get(column) is None
+                ]
+                links = self._get_related(model, name, field, ids)
+                spec.append((name, column, links))
+            elif isinstance(field, PLAIN_FIELDS):
+                spec.append((name, None, None))
+            else:
+                spec.append((name, field.to_representation, None))
+
+        represented = []
+        for row in rows:
+            item = {}
+            for name, convert, links in spec:
+                if links is not None:
+                    summary = row.get(convert)
+                    if summary is None:
+                        summary = links.get(row['id'], [])
+                    item[name] = summary
+                    continue
+                value = row[name]
+                if convert is not None and value is not None:
+                    value = convert(value)
+                item[name] = value
+            represented.append(item)
+        return represented
+
+    @staticmethod
+    def _get_related(model, name, list_field, ids):
+        """Return {pk: [nested dict, ...]} for a many=True field."""
+        if not ids:
+            return {}
+        field = model._meta.get_field(name)
+        source = f'{field.m2m_field_name()}_id'
+        target = field.m2m_reverse_field_name()
+        keys = [n for n, f in list_field.child.fields.items()
+                if not f.write_only]
+        links = field.remote_field.through.objects.filter(
+            **{f'{source}__in': ids}
+        ).order_by(f'{target}_id').values_list(
+            source, *[f'{target}__{key}' for key in keys]
+        )
+        related = {}
+        for pk, *values in links:
+            related.setdefault(pk, []).append(dict(zip(keys, values)))
+        return related
+
+
+PLAIN_FIELDS = (serializers.IntegerField, serializers.CharField)
+
+
+class TimedSerializerMixin:
+    """Report top-level to_representation() time to the request metrics."""
 
+    def to_representation(self, instance):
+        if self.parent is not None:
+            return super().to_representation(instance)
+        with metrics.time_serializer():
+            return super().to_representation(instance)
 
-class IngredientSerializer(serializers.ModelSerializer):   # need to be defined before recipe serializer
+
+class UpdateFieldsSerializerMixin:
+    """Save only the validated fields on update.
+
+    A full save would write back columns other writers maintain, such as
+    recipe_count or the recipe summaries, as they were when the instance
+    was loaded.
+    """
+
+    def update(self, instance, validated_data):
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=[*validated_data, 'updated_at'])
+        return instance
+
+
+class IngredientSerializer(TimedSerializerMixin, UpdateFieldsSerializerMixin,
+                           serializers.ModelSerializer):   # need to be defined before recipe serializer
     """Serializer for ingredients."""
 
     class Meta:
+        list_serializer_class = ValuesListSerializer
         model = Ingredient  # telling w/c model to represent
         fields = ['id', 'name']  # fields of the model that we wanna control or atleast view through the serializer
         read_only_fields = ['id']  # => we can't change the id field
@@ -21,40 +149,64 @@ class IngredientSerializer(serializers.ModelSerializer):   # need to be defined
 
 # We first move thetag serilizer above the recipe serializer bcz we nee to assign the tag serializer as a nested serializer to our recipe serializer. defing tag serializer at the bottom of the file won't work bcz we try and referenceit before it is actually been assigned
 # now we can use this tag serlzr as a nested serlzr to our recipe serlzr
-class TagSerializer(serializers.ModelSerializer):  # we will have a list of tags assigned to our recipe
+class TagSerializer(TimedSerializerMixin, UpdateFieldsSerializerMixin,
+                    serializers.ModelSerializer):  # we will have a list of tags assigned to our recipe
     """Serializer for tags."""
 
     class Meta:
+        list_serializer_class = ValuesListSerializer
         model = Tag
         fields = ['id', 'name']     # these are the fields that we want to co nvert from our model to our serializer.
         read_only_fields = ['id']  # we don't want them to be able to modify the ID , we just want to view it. Now set views in views.py
 
 # Define serializer for recipe objects.
-class RecipeSerializer(serializers.ModelSerializer):   # we'll use model serlzr. bcz this serlzr will represent a specific model in the system w/c is our recipe model.
+class RecipeSerializer(TimedSerializerMixin,
+                       serializers.ModelSerializer):   # we'll use model serlzr. bcz this serlzr will represent a specific model in the system w/c is our recipe model.
     """Serializer for recipes."""
     tags = TagSerializer(many = True, required = False)  # We make tags an optional part of our recipe but we can provide them if we want, many =true bcz this will be a list of items
+    ingredients = IngredientSerializer(many=True, required=False)
 
     class Meta:  # We need to set the model.
+        list_serializer_class = ValuesListSerializer
         model = Recipe  # tells DRF that we'll use Recipe model with this serializer
-        fields = ['id', 'title', 'time_minutes', 'price', 'link', 'tags']   # list all the fields that we want to use with this serializer.
+        summary_fields = bulk.SUMMARY_FIELDS
+        fields = [
+            'id', 'title', 'time_minutes', 'price', 'link', 'tags',
+            'ingredients',
+        ]   # list all the fields that we want to use with this serializer.
         read_only_fields = ['id']   # bcz we don't want them to change the db id of a recipe. we only want them to be able to change the other fields that we'he listed in fields.
 # rerun the test it'll still fail but the reason => no reverse match bcz we haven't added the URL for the recipe endpt.
 # Before we add the URL , we will crete a view bcz u need to have view before u configure your app to point to it. After this open views.py created inside recipe app.
 
+    def _get_or_create_related(self, model, field_name, items, recipe):
+        """Resolve items by name and link them to the recipe in batches."""
+        auth_user = self.context['request'].user  # gets the authenticated user , we r using self.context request bcz we r doing this in a serializer and not the view. The context is passed to the serializer by the view when u r using the serializer for that particular view. That's a way to get the context of the request from the actual serializer code.
+        # Resolve every submitted name with one lookup and one bulk insert
+        # for the missing ones, then link them all with a single insert.
+        resolved = bulk.resolve_by_name(
+            model, auth_user, [item['name'] for item in items],
+        )
+        if self.instance is None:  # a new recipe has no links to diff
+            bulk.add_related(recipe, field_name, resolved.values())
+        else:
+            bulk.set_related(recipe, field_name, resolved.values())
+        bump_generation(auth_user.id)  # the bulk writes above send no signals
+
     def _get_or_create_tags(self, tags, recipe):  # refactpring the code to reduce duplication b/w create and update method.
         """Handle getting or creating tags as needed."""     # took auth user out of create to ensure that any new tags are assigned to the correct user that is authenticated.
-        auth_user = self.context['request'].user  # gets the authenticated user , we r using self.context request bcz we r doing this in a serializer and not the view. The context is passed to the serializer by the view when u r using the serializer for that particular view. That's a way to get the context of the request from the actual serializer code.
-        # took this functionality out of create bcz we need this for both updating and creating
-        for tag in tags:  # looping through all of the tags that we popped from the validated data and gets all of the tags if they exist or creates them and add if they don't exist.
-            tag_obj, created = Tag.objects.get_or_create(  # helper method available for your model manager, gets the value if it already exists or if it doesn't exist then it creates a value with the values that we pass in, Giving us a functionality not to create duplicate tags in the system
-                user=auth_user,
-                **tag,  # we could write name = tag['name], but we put ** as we want to remove or take all of the values that are passed into the tag to ensure if we add any additional functionality to our tag in future, so the fields to the tag will be supported w/o having to modify the code here. run test and it passes.
-            )
-            recipe.tags.add(tag_obj)
+        self._get_or_create_related(Tag, 'tags', tags, recipe)
+
+    def _get_or_create_ingredients(self, ingredients, recipe):
+        """Handle getting or creating ingredients as needed."""
+        self._get_or_create_related(
+            Ingredient, 'ingredients', ingredients, recipe,
+        )
 
     # add feature to be able to create them by adding some custom logic to RecipeSerializer class by adding new method to the class that allows us to override the behaviour of the create functionality
+    @transaction.atomic
     def create(self, validated_data):  # custom logic that we add to create recipes via the serializer
         """Create a recipe."""
+        ingredients = validated_data.pop('ingredients', [])
         tags = validated_data.pop('tags', [])  #  getting all th etags here, => remove the tags object from the validated data and assign it to the tags variable here(get would do the same except that it would keep the tags inside validate data, but we wanna remove it if it exists.)
         # We r using pop bcz we want to ensure we remove the tags before we create recipe using []
         #  if tags exist in validated data, we remove validated data and assign it to new variable called tags, and if it doesn't exist we will defualt this empty list => [] as written in tags
@@ -69,25 +221,60 @@ class RecipeSerializer(serializers.ModelSerializer):   # we'll use model serlzr.
         #     )
         #     recipe.tags.add(tag_obj)  # the above commented code is shifted to _get_or_create_tags method above.
         self._get_or_create_tags(tags, recipe)   # either creating or assigning tags as needed.
+        self._get_or_create_ingredients(ingredients, recipe)
         return recipe
     # Abstracted the feature to get or create tags into a separate method and for create we call that method
 
 
+    @transaction.atomic
     def update(self, instance, validated_data):  # same as create method except that u get the instance as well. So we an insatnce an validsated data that we want to update as parameters        """Update recipe."""
         tags = validated_data.pop('tags', None)  # getting the tags and if there is no tag provide none(=>we get None as default)
         if tags is not None:   # if tags was an empty list, then it would be assigned as an empty list in above line tags. (an empty list is not the same as none)
-            instance.tags.clear()  # clears the existing tags that are assigned. [An empty list is not none, so it supports the ability to be able to clear all of the tags that are assinged to the recipe.]
-            self._get_or_create_tags(tags, instance)  # if they provide an empty list, then noneed to create any tags and for loop won't be executed and u won't have any tags.
+            # Only the links that actually changed are deleted or inserted;
+            # an empty list still clears all the tags of the recipe.
+            self._get_or_create_tags(tags, instance)
+        ingredients = validated_data.pop('ingredients', None)
+        if ingredients is not None:
+            self._get_or_create_ingredients(ingredients, instance)
 
         for attr, value in validated_data.items():  # THisi srest of the validated data, everything outside of the tag, nested value, we r jst going to assign to our instance here
             setattr(instance, attr, value)   # takes an instance and assigns the attribute, the value that is provided here
 
-        instance.save()   # saves all the updates chnages to the instance
+        # Saves only the updated fields, so summaries another request
+        # refreshed meanwhile aren't overwritten with this stale copy;
+        # set_related and the signals keep the summaries current.
+        instance.save(update_fields=[*validated_data, 'updated_at'])
         return instance   # returning the instance from the update method.  run the test and check it passes.
 
 class RecipeDetailSerializer(RecipeSerializer):  # using RecipeSerializer as the base class bcz the detail serializer will be and extension of RecipeSerializer, so we want to take allthe functionality of Rec.Serlzr. and add some extra fields for detail serializer. Thus we can aviod duplicatimg the code where we define the model and all of different fields.
     """Serializer for recipe detail view."""
 
+    # The digest of the stored thumbnail, rendered as its URL.
+    thumbnail = serializers.SerializerMethodField()
+
     class Meta(RecipeSerializer.Meta):  # passing the meta class to that we get all meta values that were provided to the recipe serializer.
-        fields = RecipeSerializer.Meta.fields + ['description']
+        fields = RecipeSerializer.Meta.fields + [
+            'description', 'image', 'thumbnail',
+        ]
+        read_only_fields = RecipeSerializer.Meta.read_only_fields + [
+            'image',
+        ]
+
+    def get_thumbnail(self, obj) -> Optional[str]:
+        if not obj.thumbnail:
+            return None
+        url = reverse('recipe:recipe-thumbnail', args=[obj.thumbnail])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+
+class RecipeImageSerializer(UpdateFieldsSerializerMixin,
+                            serializers.ModelSerializer):
+    """Serializer for uploading images to recipes."""
+
+    class Meta:
+        model = Recipe
+        fields = ['id', 'image']
+        read_only_fields = ['id']
+        extra_kwargs = {'image': {'required': True}}
 # now create view open views.py
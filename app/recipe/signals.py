@@ -0,0 +1,180 @@
+"""
+Signal handlers that keep recipe timestamps and the API cache current.
+"""
+from django.conf import settings
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.jobs import enqueue
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+from recipe import bulk, tasks
+from recipe.cache import bump_generation
+
+
+RELATED_FIELDS = {
+    Tag: 'tags',
+    Ingredient: 'ingredients',
+}
+
+
+def touch_recipes(**filters):
+    """Bump updated_at on the recipes matching filters."""
+    Recipe.objects.filter(**filters).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_owner(sender, instance, **kwargs):
+    """Invalidate the owner's cached responses when an object changes."""
+    bump_generation(instance.user_id)
+
+
+@receiver(pre_save, sender=Tag)
+@receiver(pre_save, sender=Ingredient)
+def note_renamed(sender, instance, using, update_fields=None, **kwargs):
+    """Remember whether a save changes the name recipes show."""
+    instance._renamed = (
+        not instance._state.adding and
+        (update_fields is None or 'name' in update_fields) and
+        sender._base_manager.using(using).filter(pk=instance.pk).exclude(
+            name=instance.name,
+        ).exists()
+    )
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def touch_renamed(sender, instance, created, **kwargs):
+    """Refresh the recipes showing a renamed tag or ingredient.
+
+    Like deletes, a heavily used one is left to a background job.
+    """
+    if created or not getattr(instance, '_renamed', False):
+        return
+    if instance.recipe_count > settings.DELETION_BATCH_SIZE:
+        enqueue(
+            tasks.refresh_linked,
+            owner=instance.user,
+            model=sender._meta.model_name,
+            pk=instance.pk,
+        )
+    else:
+        tasks.refresh_recipes(instance)
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def touch_unlinked(sender, instance, **kwargs):
+    """Mark recipes about to lose a tag or ingredient as modified."""
+    field_name = RELATED_FIELDS[sender]
+    touch_recipes(**{field_name: instance})
+    # The links are gone by post_delete, so remember whose summary to fix.
+    instance._unlinked_recipe_ids = bulk.linked_recipe_ids(
+        field_name, instance.pk,
+    )
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def refresh_unlinked(sender, instance, **kwargs):
+    """Drop a deleted tag or ingredient from its recipes' summaries."""
+    recipe_ids = getattr(instance, '_unlinked_recipe_ids', None)
+    if recipe_ids:
+        bulk.refresh_summaries(RELATED_FIELDS[sender], recipe_ids)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def recipe_links_changed(sender, instance, action, reverse, model, pk_set,
+                         **kwargs):
+    """Track tag/ingredient link changes made through the related managers.
+
+    instance is the recipe, or the tag/ingredient when the change comes
+    from the reverse side, e.g. tag.recipe_set.add(...).
+    """
+    field_name = RELATED_FIELDS[type(instance) if reverse else model]
+    if reverse and action == 'pre_clear':
+        touch_recipes(**{field_name: instance})
+        instance._unlinked_recipe_ids = bulk.linked_recipe_ids(
+            field_name, instance.pk,
+        )
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        if not reverse:
+            touch_recipes(pk=instance.pk)
+            summaries = bulk.refresh_summaries(field_name, [instance.pk])
+            setattr(
+                instance,
+                bulk.SUMMARY_FIELDS[field_name],
+                summaries[instance.pk],
+            )
+        elif action == 'post_clear':
+            bulk.refresh_summaries(
+                field_name, getattr(instance, '_unlinked_recipe_ids', []),
+            )
+        elif pk_set:
+            touch_recipes(pk__in=pk_set)
+            bulk.refresh_summaries(field_name, pk_set)
+    if action.startswith('post_'):
+        bump_generation(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def count_links(sender, instance, action, reverse, model, pk_set, **kwargs):
+    """Keep recipe_count in step with link changes.
+
+    Only links that exist are counted off, so removals are looked up
+    before the change and applied after it.
+    """
+    field_name = RELATED_FIELDS[type(instance) if reverse else model]
+    field = Recipe._meta.get_field(field_name)
+    source = f'{field.m2m_field_name()}_id'
+    target = f'{field.m2m_reverse_field_name()}_id'
+    if action in ('pre_remove', 'pre_clear'):
+        links = sender.objects.filter(
+            **{target if reverse else source: instance.pk}
+        )
+        if action == 'pre_remove':
+            links = links.filter(
+                **{f'{source if reverse else target}__in': pk_set}
+            )
+        instance._removed_links = list(links.values_list(target, flat=True))
+    elif action == 'post_add' and pk_set:
+        related = [instance.pk] * len(pk_set) if reverse else pk_set
+        bulk.adjust_counts(field_name, related)
+    elif action in ('post_remove', 'post_clear'):
+        bulk.adjust_counts(
+            field_name, getattr(instance, '_removed_links', []), -1,
+        )
+
+
+@receiver(pre_delete, sender=Recipe)
+def uncount_deleted_recipe(sender, instance, **kwargs):
+    """Take a recipe off its tags' and ingredients' counts.
+
+    The delete drops its links without m2m signals. Runs inside the
+    delete's transaction; core.deletion's _raw_delete batches send no
+    signals and uncount their links themselves.
+    """
+    bulk.uncount_recipes([instance.pk])
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_user(sender, instance, **kwargs):
+    """Start new users, and changed ones, on a fresh generation."""
+    bump_generation(instance.id)
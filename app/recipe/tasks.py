@@ -0,0 +1,65 @@
+"""
+Background tasks for the recipe app.
+"""
+from django.utils import timezone
+
+from core.deletion import Deletion, link_steps
+from core.jobs import report_progress, task
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+from recipe import bulk
+from recipe.cache import bump_generation
+
+
+LINKED_MODELS = {
+    'tag': Tag,
+    'ingredient': Ingredient,
+}
+
+
+@task('recipe.delete_linked')
+def delete_linked(job, model, pk):
+    """Unlink a tag or ingredient from its recipes in batches, then delete it.
+
+    Retries pick up where the failed attempt stopped.
+    """
+    instance = LINKED_MODELS[model].objects.filter(pk=pk).first()
+    if instance is None:
+        return {'deleted': job.progress.get('deleted', {})}
+    deleted = Deletion(
+        link_steps(instance),
+        progress=lambda **progress: report_progress(job, **progress),
+        deleted=job.progress.get('deleted'),
+    ).run()
+    instance.delete()
+    return {'deleted': deleted}
+
+
+def refresh_recipes(instance):
+    """Show a renamed tag or ingredient in the recipes linked to it.
+
+    Marks them as modified and rewrites their summaries; returns how many
+    there were.
+    """
+    field_name = 'tags' if isinstance(instance, Tag) else 'ingredients'
+    Recipe.objects.filter(**{field_name: instance}).update(
+        updated_at=timezone.now(),
+    )
+    recipe_ids = bulk.linked_recipe_ids(field_name, instance.pk)
+    bulk.refresh_summaries(field_name, recipe_ids)
+    return len(recipe_ids)
+
+
+@task('recipe.refresh_linked')
+def refresh_linked(job, model, pk):
+    """Run refresh_recipes for a tag or ingredient with many recipes."""
+    instance = LINKED_MODELS[model].objects.filter(pk=pk).first()
+    if instance is None:
+        return {'refreshed': 0}
+    refreshed = refresh_recipes(instance)
+    # The rename invalidated the cache before the summaries changed.
+    bump_generation(instance.user_id)
+    return {'refreshed': refreshed}
@@ -0,0 +1,168 @@
+"""
+Tests for the async recipe API views.
+"""
+import json
+import threading
+from decimal import Decimal
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+from recipe import async_views
+
+
+ASYNC_RECIPES_URL = reverse('recipe:async-recipe-list')
+ASYNC_TAGS_URL = reverse('recipe:async-tag-list')
+ASYNC_INGREDIENTS_URL = reverse('recipe:async-ingredient-list')
+
+
+def async_detail_url(recipe_id):
+    """Create and return an async recipe detail URL."""
+    return reverse('recipe:async-recipe-detail', args=[recipe_id])
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        'title': 'Sample recipe title',
+        'time_minutes': 22,
+        'price': Decimal('5.25'),
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+# Run the views on the test's own thread, which holds the test transaction.
+@override_settings(ASYNC_VIEW_THREADS=0)
+class PublicAsyncApiTests(TestCase):
+    """Test unauthenticated async API requests."""
+
+    def test_auth_required(self):
+        """Test auth is required to call the async API."""
+        res = async_to_sync(self.async_client.get)(ASYNC_RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(ASYNC_VIEW_THREADS=0)
+class PrivateAsyncApiTests(TestCase):
+    """Test authenticated async API requests."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.headers = {
+            'authorization': f'Token {Token.objects.create(user=self.user)}',
+        }
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        recipe = create_recipe(self.user, title='Thai curry')
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Thai'))
+        recipe.ingredients.add(
+            Ingredient.objects.create(user=self.user, name='Lime'),
+        )
+        self.recipe = recipe
+        create_recipe(self.user, title='Porridge')
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        create_recipe(other)
+
+    def async_get(self, url, **extra):
+        """GET url through the ASGI handler as the test user."""
+        return async_to_sync(self.async_client.get)(
+            url, **self.headers, **extra,
+        )
+
+    def get_json(self, url):
+        """GET url from the async view and return the decoded body."""
+        res = self.async_get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return json.loads(res.content)
+
+    def test_list_matches_sync_view(self):
+        """Test the async list endpoints return the sync payloads."""
+        for name in ('recipe', 'tag', 'ingredient'):
+            with self.subTest(name=name):
+                data = self.get_json(
+                    reverse(f'recipe:async-{name}-list'),
+                )
+                res = self.client.get(reverse(f'recipe:{name}-list'))
+
+                self.assertEqual(data, json.loads(res.content))
+
+    def test_retrieve_matches_sync_view(self):
+        """Test the async detail endpoint returns the sync payload."""
+        data = self.get_json(async_detail_url(self.recipe.id))
+        res = self.client.get(
+            reverse('recipe:recipe-detail', args=[self.recipe.id]),
+        )
+
+        self.assertEqual(data, json.loads(res.content))
+        self.assertEqual(data['title'], 'Thai curry')
+
+    def test_list_filters_by_search(self):
+        """Test query parameters are honoured by the async list."""
+        data = self.get_json(f'{ASYNC_RECIPES_URL}?search=curry')
+
+        self.assertEqual(
+            [r['title'] for r in data['results']], ['Thai curry'],
+        )
+
+    def test_conditional_get(self):
+        """Test the async detail answers If-None-Match with a 304."""
+        url = async_detail_url(self.recipe.id)
+        res = self.async_get(url)
+
+        res = self.async_get(url, if_none_match=res['ETag'])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+@override_settings(ASYNC_VIEW_THREADS=2)
+class PooledAsyncApiTests(TransactionTestCase):
+    """Test the async views on the shared view thread pool."""
+
+    def test_list_runs_on_pool(self):
+        """Test the sync work of an async view runs on a pool thread."""
+        user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        create_recipe(user, title='Thai curry')
+        token = Token.objects.create(user=user)
+        threads = []
+        dispatch = async_views._dispatch
+
+        def record_thread(*args, **kwargs):
+            threads.append(threading.current_thread().name)
+            return dispatch(*args, **kwargs)
+
+        with mock.patch.object(async_views, '_dispatch', record_thread):
+            res = async_to_sync(self.async_client.get)(
+                ASYNC_RECIPES_URL, authorization=f'Token {token}',
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [r['title'] for r in json.loads(res.content)['results']],
+            ['Thai curry'],
+        )
+        self.assertEqual(len(threads), 1)
+        self.assertTrue(threads[0].startswith('async-view'))
@@ -0,0 +1,290 @@
+"""
+Tests for the recipe API response cache and conditional requests.
+"""
+import math
+import time
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+from recipe.cache import CACHE_ALIAS, _modified_key
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        'title': 'Sample recipe title',
+        'time_minutes': 22,
+        'price': Decimal('5.25'),
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+TEST_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    CACHE_ALIAS: {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'recipe-cache-tests',
+    },
+}
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ResponseCacheTests(TestCase):
+    """Test list/retrieve responses are cached and invalidated."""
+
+    def setUp(self):
+        caches[CACHE_ALIAS].clear()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com', password='testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_served_from_cache(self):
+        """Test a repeated list call runs no queries."""
+        create_recipe(user=self.user)
+        res = self.client.get(RECIPES_URL)
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(RECIPES_URL)
+
+        self.assertEqual(cached.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached.data, res.data)
+
+    def test_query_params_cached_separately(self):
+        """Test different query parameters get different entries."""
+        create_recipe(user=self.user)
+        create_recipe(user=self.user)
+        self.client.get(RECIPES_URL)
+
+        res = self.client.get(RECIPES_URL, {'page_size': 1})
+
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_create_through_api_invalidates(self):
+        """Test creating a recipe drops the cached list."""
+        self.client.get(RECIPES_URL)
+        payload = {
+            'title': 'Soup',
+            'time_minutes': 10,
+            'price': Decimal('2.00'),
+        }
+        self.client.post(RECIPES_URL, payload)
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_tag_rename_invalidates_recipe_detail(self):
+        """Test renaming a tag refreshes recipes showing it."""
+        recipe = create_recipe(user=self.user)
+        tag = Tag.objects.create(user=self.user, name='Lunch')
+        recipe.tags.add(tag)
+        url = reverse('recipe:recipe-detail', args=[recipe.id])
+        self.client.get(url)
+
+        self.client.patch(
+            reverse('recipe:tag-detail', args=[tag.id]), {'name': 'Brunch'},
+        )
+        res = self.client.get(url)
+
+        self.assertEqual(res.data['tags'][0]['name'], 'Brunch')
+
+    def test_orm_writes_invalidate(self):
+        """Test writes outside the API also invalidate the cache."""
+        recipe = create_recipe(user=self.user)
+        self.client.get(TAGS_URL)
+        self.client.get(RECIPES_URL)
+
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+
+        self.assertEqual(len(self.client.get(TAGS_URL).data['results']), 1)
+        res = self.client.get(RECIPES_URL)
+        self.assertEqual(res.data['results'][0]['tags'][0]['name'], 'Vegan')
+
+    def test_cache_is_per_user(self):
+        """Test users never see each other's cached responses."""
+        create_recipe(user=self.user)
+        self.client.get(RECIPES_URL)
+        other = get_user_model().objects.create_user(
+            email='other@example.com', password='testpass123',
+        )
+        self.client.force_authenticate(other)
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.data['results'], [])
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ConditionalRequestTests(TestCase):
+    """Test ETag and Last-Modified handling."""
+
+    def setUp(self):
+        caches[CACHE_ALIAS].clear()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com', password='testpass123',
+        )
+        # Last-Modified is only sent once the second of the write is over.
+        caches[CACHE_ALIAS].set(
+            _modified_key(self.user.id), time.time() - 2, None,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_sends_validators(self):
+        """Test list responses carry ETag and Last-Modified."""
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res['ETag'].startswith('"'))
+        self.assertIn('Last-Modified', res)
+
+    def test_if_none_match_not_modified(self):
+        """Test a matching ETag gets a 304 without touching the db."""
+        create_recipe(user=self.user)
+        etag = self.client.get(RECIPES_URL)['ETag']
+
+        with self.assertNumQueries(0):
+            res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+        self.assertEqual(res.content, b'')
+
+    def test_etag_changes_after_write(self):
+        """Test a write makes the old ETag stale."""
+        recipe = create_recipe(user=self.user)
+        url = reverse('recipe:recipe-detail', args=[recipe.id])
+        etag = self.client.get(url)['ETag']
+
+        self.client.patch(url, {'title': 'New title'})
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+        self.assertEqual(res.data['title'], 'New title')
+
+    def test_etag_differs_per_query(self):
+        """Test pages of the same list have different ETags."""
+        etag = self.client.get(TAGS_URL)['ETag']
+
+        res = self.client.get(
+            TAGS_URL, {'page_size': 1}, HTTP_IF_NONE_MATCH=etag,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_if_modified_since(self):
+        """Test If-Modified-Since is answered from the last write time."""
+        self.client.get(INGREDIENTS_URL)
+        future = http_date(time.time() + 60)
+        past = http_date(time.time() - 3600)
+
+        res = self.client.get(INGREDIENTS_URL, HTTP_IF_MODIFIED_SINCE=future)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        res = self.client.get(INGREDIENTS_URL, HTTP_IF_MODIFIED_SINCE=past)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_write_in_same_second_is_modified(self):
+        """Test a write in the same second as a GET is not missed."""
+        start = math.floor(time.time())
+        clock = [start + 0.2]
+        with mock.patch('time.time', lambda: clock[0]):
+            create_recipe(user=self.user)
+            clock[0] += 0.3
+            res = self.client.get(RECIPES_URL)
+            self.assertNotIn('Last-Modified', res)
+
+            clock[0] += 0.3
+            create_recipe(user=self.user)
+            clock[0] += 0.3
+            res = self.client.get(
+                RECIPES_URL, HTTP_IF_MODIFIED_SINCE=http_date(start),
+            )
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(res.data['results']), 2)
+
+            clock[0] += 1
+            res = self.client.get(RECIPES_URL)
+            self.assertEqual(res['Last-Modified'], http_date(start + 1))
+
+
+class UpdatedAtTests(TestCase):
+    """Test updated_at is maintained on every write path."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com', password='testpass123',
+        )
+        self.recipe = create_recipe(user=self.user)
+        self.tag = Tag.objects.create(user=self.user, name='Lunch')
+        self._backdate()
+
+    def _backdate(self):
+        self.past = timezone.now() - timedelta(days=1)
+        Recipe.objects.update(updated_at=self.past)
+
+    def _assert_touched(self):
+        self.recipe.refresh_from_db()
+        self.assertGreater(self.recipe.updated_at, self.past)
+
+    def test_add_tag_touches_recipe(self):
+        """Test linking a tag updates the recipe timestamp."""
+        self.recipe.tags.add(self.tag)
+
+        self._assert_touched()
+
+    def test_reverse_clear_touches_recipe(self):
+        """Test clearing from the tag side updates the recipe timestamp."""
+        self.recipe.tags.add(self.tag)
+        self._backdate()
+
+        self.tag.recipe_set.clear()
+
+        self._assert_touched()
+
+    def test_rename_ingredient_touches_recipe(self):
+        """Test renaming a linked ingredient updates the recipe timestamp."""
+        ingredient = Ingredient.objects.create(user=self.user, name='Salt')
+        self.recipe.ingredients.add(ingredient)
+        self._backdate()
+
+        ingredient.name = 'Sea salt'
+        ingredient.save()
+
+        self._assert_touched()
+
+    def test_delete_tag_touches_recipe(self):
+        """Test deleting a linked tag updates the recipe timestamp."""
+        self.recipe.tags.add(self.tag)
+        self._backdate()
+
+        self.tag.delete()
+
+        self._assert_touched()
@@ -1,6 +1,8 @@
 """
 Tests for the ingredients API.
 """
+from decimal import Decimal
+
 from django.contrib.auth import get_user_model  # to get the model
 from django.urls import reverse
 from django.test import TestCase
@@ -8,7 +10,7 @@ from django.test import TestCase
 from rest_framework import status     # for checking the status code
 from rest_framework.test import APIClient
 
-from core.models import Ingredient
+from core.models import Ingredient, Recipe
 
 from recipe.serializers import IngredientSerializer
 
@@ -16,6 +18,11 @@ from recipe.serializers import IngredientSerializer
 INGREDIENTS_URL = reverse('recipe:ingredient-list')  # URL of API that we r testing
 
 
+def detail_url(ingredient_id):
+    """Create and return an ingredient detail URL."""
+    return reverse('recipe:ingredient-detail', args=[ingredient_id])
+
+
 def create_user(email='user@example.com', password='testpass123'):   # helper funtion to create a user
     """Create and return user."""
     return get_user_model().objects.create_user(email=email, password=password)
@@ -29,7 +36,7 @@ class PublicIngredientsApiTests(TestCase):  # Tests that authentication is requi
 
     def test_auth_required(self):
         """Test auth is required for retrieving ingredients."""
-        res = self.client.get(INGREDIENTS_URL)  ,   # we r making a request to the endpt. before we r authenticated  and checking it returns unauthorised response.
+        res = self.client.get(INGREDIENTS_URL)   # we r making a request to the endpt. before we r authenticated  and checking it returns unauthorised response.
 
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
@@ -52,7 +59,7 @@ class PrivateIngredientsApiTests(TestCase):
         ingredients = Ingredient.objects.all().order_by('-name')  # retrieve the ingredients from the db and for evry test run, db is entirely refreshed, can pass it to the serializer and can use it to validate that the API is returning correct result
         serializer = IngredientSerializer(ingredients, many=True)  # passing in all the ingredients that we returned from above line and passing many = true to say that we want to serialize many different items instead of a single item.
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_ingredients_limited_to_user(self):
         """Test list of ingredients is limited to authenticated user."""
@@ -63,6 +70,49 @@ class PrivateIngredientsApiTests(TestCase):
         res = self.client.get(INGREDIENTS_URL)   # calling the get method to do HTTP get on the ingredients URL to  get a list of all the ingredients for the authenticated user
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)  # checking that the length of result was 1. Since we created two different ingredients but only one was assigned to the authenticated user, we would expect only one to be returned
-        self.assertEqual(res.data[0]['name'], ingredient.name)   # checking that it's not returning the ingredient linked to another user. Now runthe test and it fails for inmgredient serializer not found.
-        self.assertEqual(res.data[0]['id'], ingredient.id)
\ No newline at end of file
+        self.assertEqual(len(res.data['results']), 1)  # checking that the length of result was 1. Since we created two different ingredients but only one was assigned to the authenticated user, we would expect only one to be returned
+        self.assertEqual(res.data['results'][0]['name'], ingredient.name)   # checking that it's not returning the ingredient linked to another user. Now runthe test and it fails for inmgredient serializer not found.
+        self.assertEqual(res.data['results'][0]['id'], ingredient.id)
+
+    def test_update_ingredient(self):
+        """Test updating an ingredient."""
+        ingredient = Ingredient.objects.create(user=self.user, name='Cilantro')
+
+        payload = {'name': 'Coriander'}
+        res = self.client.patch(detail_url(ingredient.id), payload)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ingredient.refresh_from_db()
+        self.assertEqual(ingredient.name, payload['name'])
+
+    def test_delete_ingredient(self):
+        """Test deleting an ingredient."""
+        ingredient = Ingredient.objects.create(user=self.user, name='Lettuce')
+
+        res = self.client.delete(detail_url(ingredient.id))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        ingredients = Ingredient.objects.filter(user=self.user)
+        self.assertFalse(ingredients.exists())
+
+    def test_filter_ingredients_assigned_to_recipes(self):
+        """Test listing ingredients by use, assigned ones only."""
+        salt = Ingredient.objects.create(user=self.user, name='Salt')
+        pepper = Ingredient.objects.create(user=self.user, name='Pepper')
+        Ingredient.objects.create(user=self.user, name='Saffron')
+        for n in range(2):
+            recipe = Recipe.objects.create(
+                user=self.user, title=f'Recipe {n}', time_minutes=5,
+                price=Decimal('1.00'),
+            )
+            recipe.ingredients.add(salt)
+        recipe.ingredients.add(pepper)
+
+        res = self.client.get(
+            INGREDIENTS_URL, {'assigned_only': 1, 'ordering': '-recipe_count'},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [i['id'] for i in res.data['results']], [salt.id, pepper.id],
+        )
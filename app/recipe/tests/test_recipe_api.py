@@ -1,28 +1,49 @@
 """
 Tests for recipe APIs.
 """
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
 from decimal import Decimal
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from unittest import mock, skipUnless
+
+from django.db import DatabaseError, connection
+from django.db.models import Prefetch
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient
 
+from PIL import Image
+
+from core import deletion
 from core.models import (
     Recipe,
     Tag,  # to import our new Tag model.
+    Ingredient,
 )
 
+from recipe import bulk, images
+from recipe.cache import bump_generation
 from recipe.serializers import (
     RecipeSerializer,
     RecipeDetailSerializer,
+    RecipeImageSerializer,
 )
 # We'll have one serializer that has recipe kind of preview that is written in the listing and then we'll have another serializer that adds a few more fields and gives more details about a specific recipe.
 
 
 RECIPES_URL = reverse('recipe:recipe-list')   #  Gives recipe api thta we can use later on.
+BULK_URL = reverse('recipe:recipe-bulk-import')
+EXPORT_URL = reverse('recipe:recipe-export')
 
 
 # Why defining detail URL as a function when we have the recipes URL  as a variable above? Reason=>we need to pass in the recipe id to the URL. So each detail will be different always conatining the unique id for recipe that we want to test with.
@@ -30,6 +51,12 @@ def detail_url(recipe_id):
     """Create and return a recipe detail URL."""
     return reverse('recipe:recipe-detail', args=[recipe_id])  # Used to generate aunique URL for a specific recipes detail endpt.
 
+
+def image_upload_url(recipe_id):
+    """Create and return an image upload URL."""
+    return reverse('recipe:recipe-upload-image', args=[recipe_id])
+
+
 def create_recipe(user, **params):             #  helper fun. to create a recipe & will bw used to create test recipes w/c we can use with our API.
     """Create and return a sample recipe."""    #  gives dynamic params **params is a dictionary of all params that were passed to create recipe fun.
     defaults = {                             #  Default values if we don't pass any param.
@@ -88,7 +115,7 @@ class PrivateRecipeApiTests(TestCase):
         # many= true tells that we want it to pass in a list of items bcz serializer intends to return details w/c is just one item or we can returns list of items.
         self.assertEqual(res.status_code, status.HTTP_200_OK)   # check correct status and then we can check if it returned the correct data.
         # check the data returned matches th edata of al l recipes form serializer.
-        self.assertEqual(res.data, serializer.data)   # Want to ensure that res.data that's the data dictionary that was returned in response is equal to serializer.data This is the data dictionary of th eobjects passed through the serializer.
+        self.assertEqual(res.data['results'], serializer.data)   # Want to ensure that res.data that's the data dictionary that was returned in response is equal to serializer.data This is the data dictionary of th eobjects passed through the serializer.
 
 # reason for below test is even though the above test retrieves recipes for users, we don't know whether it would return all the recipes w/c we don't want, we only want to return the recipes forthe authenticated user that's currently logged in.
 #we will add receipes for another user and check that they don;t exist in the response
@@ -107,7 +134,7 @@ class PrivateRecipeApiTests(TestCase):
         recipes = Recipe.objects.filter(user=self.user) # filter the recipes just for the authenticated user.
         serializer = RecipeSerializer(recipes, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)  # compare response data with serializer data
+        self.assertEqual(res.data['results'], serializer.data)  # compare response data with serializer data
         # No worries for the order here bcz we'll return a single recipe in this test
         # Its expected for this test to fail on import error because we imported serializer w/c we will create later on => no module named recipe.serializers.
 # Now add the test to the authnticated tests.
@@ -318,4 +345,787 @@ class PrivateRecipeApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(recipe.tags.count(), 0)
 
-# run the test fails as DRF doesn't support writing test for nested fields. We need to override the update method in order to provide this functionality.
\ No newline at end of file
+# run the test fails as DRF doesn't support writing test for nested fields. We need to override the update method in order to provide this functionality.
+
+    def _create_tagged_recipes(self, count):
+        """Create recipes that each have a tag and an ingredient."""
+        for i in range(count):
+            recipe = create_recipe(user=self.user, title=f'Recipe {i}')
+            recipe.tags.add(
+                Tag.objects.create(user=self.user, name=f'Tag {i}')
+            )
+            recipe.ingredients.add(
+                Ingredient.objects.create(user=self.user, name=f'Ing {i}')
+            )
+
+    def test_list_recipes_query_count_is_constant(self):
+        """Test listing recipes does not query tags per recipe."""
+        self._create_tagged_recipes(2)
+        with self.assertNumQueries(1):
+            res = self.client.get(RECIPES_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self._create_tagged_recipes(10)
+        with self.assertNumQueries(1):
+            res = self.client.get(RECIPES_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_list_recipes_without_summaries(self):
+        """Test recipes with no summary yet read the through tables."""
+        self._create_tagged_recipes(3)
+        res = self.client.get(RECIPES_URL)
+        Recipe.objects.update(tag_summary=None, ingredient_summary=None)
+        bump_generation(self.user.id)  # update() skips the invalidation
+
+        with self.assertNumQueries(3):
+            fallback = self.client.get(RECIPES_URL)
+
+        self.assertEqual(fallback.data['results'], res.data['results'])
+
+    def test_summaries_follow_tag_changes(self):
+        """Test summaries track tag writes through every path."""
+        recipe = create_recipe(user=self.user)
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+
+        def summary():
+            recipe.refresh_from_db()
+            return recipe.tag_summary
+
+        tag.recipe_set.add(recipe)
+        self.assertEqual(summary(), [{'id': tag.id, 'name': 'Vegan'}])
+
+        tag.name = 'Vegetarian'
+        tag.save()
+        self.assertEqual(summary(), [{'id': tag.id, 'name': 'Vegetarian'}])
+
+        self.client.patch(
+            detail_url(recipe.id),
+            {'tags': [{'name': 'Vegetarian'}, {'name': 'Lunch'}]},
+            format='json',
+        )
+        lunch = Tag.objects.get(name='Lunch')
+        self.assertEqual(summary(), [
+            {'id': tag.id, 'name': 'Vegetarian'},
+            {'id': lunch.id, 'name': 'Lunch'},
+        ])
+
+        self.client.delete(reverse('recipe:tag-detail', args=[tag.id]))
+        self.assertEqual(summary(), [{'id': lunch.id, 'name': 'Lunch'}])
+
+        lunch.recipe_set.clear()
+        self.assertEqual(summary(), [])
+
+    def test_update_keeps_concurrent_summary(self):
+        """Test saving a recipe doesn't write back a stale summary."""
+        recipe = create_recipe(user=self.user)
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        recipe.tags.add(tag)
+        serializer = RecipeDetailSerializer(
+            recipe, data={'title': 'Renamed'}, partial=True,
+        )
+        serializer.is_valid(raise_exception=True)
+
+        # Renamed by another request after the recipe was loaded.
+        tag.name = 'Vegetarian'
+        tag.save()
+        serializer.save()
+
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'Renamed')
+        self.assertEqual(
+            recipe.tag_summary, [{'id': tag.id, 'name': 'Vegetarian'}],
+        )
+
+    def test_get_recipe_detail_query_count(self):
+        """Test recipe detail fetches tags with a single prefetch."""
+        self._create_tagged_recipes(1)
+        recipe = Recipe.objects.get(user=self.user)
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Extra'))
+
+        with self.assertNumQueries(3):
+            res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['tags']), 2)
+
+    def test_list_recipes_matches_instance_serialization(self):
+        """Test the .values() list path renders the same JSON."""
+        tags = [Tag.objects.create(user=self.user, name=n) for n in 'bca']
+        lime = Ingredient.objects.create(user=self.user, name='Lime')
+        first = create_recipe(user=self.user, price=Decimal('5.10'))
+        first.tags.add(tags[2], tags[0])
+        first.ingredients.add(lime)
+        create_recipe(user=self.user, title='Bare', link='')
+
+        res = self.client.get(RECIPES_URL)
+
+        recipes = Recipe.objects.filter(user=self.user).order_by(
+            '-id',
+        ).prefetch_related(
+            Prefetch('tags', queryset=Tag.objects.order_by('id')),
+            Prefetch(
+                'ingredients', queryset=Ingredient.objects.order_by('id'),
+            ),
+        )
+        serializer = RecipeSerializer(recipes, many=True)
+        renderer = JSONRenderer()
+        self.assertEqual(
+            renderer.render(res.data['results']),
+            renderer.render(serializer.data),
+        )
+        self.assertEqual(res.data['results'][1]['price'], '5.10')
+
+    def test_list_recipes_cursor_pagination(self):
+        """Test recipes are paginated with opaque cursors."""
+        recipes = [create_recipe(user=self.user) for _ in range(3)]
+
+        res = self.client.get(RECIPES_URL, {'page_size': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [r['id'] for r in res.data['results']],
+            [recipes[2].id, recipes[1].id],
+        )
+        self.assertIsNone(res.data['previous'])
+        self.assertIn('cursor=', res.data['next'])
+
+        res = self.client.get(res.data['next'])
+
+        self.assertEqual(
+            [r['id'] for r in res.data['results']],
+            [recipes[0].id],
+        )
+        self.assertIsNone(res.data['next'])
+
+    def _count_create_queries(self, tag_names):
+        """Create a recipe with tag_names and return the queries it ran."""
+        Tag.objects.create(user=self.user, name=tag_names[0])
+        payload = {
+            'title': 'Tagged recipe',
+            'time_minutes': 10,
+            'price': Decimal('1.00'),
+            'tags': [{'name': name} for name in tag_names],
+        }
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.post(RECIPES_URL, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return len(ctx.captured_queries)
+
+    def test_create_recipe_tag_queries_are_batched(self):
+        """Test the number of queries doesn't grow with the tag count."""
+        few = self._count_create_queries(['A', 'B'])
+        many = self._count_create_queries([f'Tag {i}' for i in range(20)])
+
+        self.assertEqual(few, many)
+        recipe = Recipe.objects.filter(user=self.user).latest('id')
+        self.assertEqual(recipe.tags.count(), 20)
+
+    def test_create_recipe_duplicate_tag_names(self):
+        """Test repeated tag names in a payload are linked once."""
+        payload = {
+            'title': 'Pancakes',
+            'time_minutes': 15,
+            'price': Decimal('3.00'),
+            'tags': [{'name': 'Breakfast'}, {'name': 'Breakfast'}],
+        }
+        res = self.client.post(RECIPES_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe = Recipe.objects.get(id=res.data['id'])
+        self.assertEqual(recipe.tags.count(), 1)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 1)
+
+    def _through_writes(self, queries):
+        """Return the INSERT/DELETE statements run on recipe_tags."""
+        table = Recipe.tags.through._meta.db_table
+        return [
+            q['sql'] for q in queries
+            if table in q['sql']
+            and q['sql'].lstrip().upper().startswith(('INSERT', 'DELETE'))
+        ]
+
+    def test_update_recipe_unchanged_tags_no_writes(self):
+        """Test patching the same tags leaves the through table alone."""
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(
+            Tag.objects.create(user=self.user, name='Lunch'),
+            Tag.objects.create(user=self.user, name='Quick'),
+        )
+
+        payload = {'tags': [{'name': 'Quick'}, {'name': 'Lunch'}]}
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.patch(
+                detail_url(recipe.id), payload, format='json',
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._through_writes(ctx.captured_queries), [])
+        self.assertEqual(recipe.tags.count(), 2)
+
+    def test_update_recipe_tags_writes_only_diff(self):
+        """Test changing one tag issues one delete and one insert."""
+        recipe = create_recipe(user=self.user)
+        tag_lunch = Tag.objects.create(user=self.user, name='Lunch')
+        tag_quick = Tag.objects.create(user=self.user, name='Quick')
+        recipe.tags.add(tag_lunch, tag_quick)
+
+        payload = {'tags': [{'name': 'Lunch'}, {'name': 'Vegan'}]}
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.patch(
+                detail_url(recipe.id), payload, format='json',
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        writes = self._through_writes(ctx.captured_queries)
+        self.assertEqual(len(writes), 2)
+        self.assertEqual(
+            set(recipe.tags.values_list('name', flat=True)),
+            {'Lunch', 'Vegan'},
+        )
+
+    def test_create_recipe_with_new_ingredients(self):
+        """Test creating a recipe with new ingredients."""
+        payload = {
+            'title': 'Cauliflower Tacos',
+            'time_minutes': 60,
+            'price': Decimal('4.30'),
+            'ingredients': [{'name': 'Cauliflower'}, {'name': 'Salt'}],
+        }
+        res = self.client.post(RECIPES_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe = Recipe.objects.get(user=self.user)
+        self.assertEqual(recipe.ingredients.count(), 2)
+        for ingredient in payload['ingredients']:
+            exists = recipe.ingredients.filter(
+                name=ingredient['name'],
+                user=self.user,
+            ).exists()
+            self.assertTrue(exists)
+
+    def test_create_recipe_with_existing_ingredient(self):
+        """Test creating a new recipe with existing ingredient."""
+        ingredient = Ingredient.objects.create(user=self.user, name='Lemon')
+        payload = {
+            'title': 'Vietnamese Soup',
+            'time_minutes': 25,
+            'price': '2.55',
+            'ingredients': [{'name': 'Lemon'}, {'name': 'Fish Sauce'}],
+        }
+        res = self.client.post(RECIPES_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe = Recipe.objects.get(user=self.user)
+        self.assertEqual(recipe.ingredients.count(), 2)
+        self.assertIn(ingredient, recipe.ingredients.all())
+        self.assertEqual(
+            Ingredient.objects.filter(user=self.user).count(), 2,
+        )
+
+    def test_create_ingredient_on_update(self):
+        """Test creating an ingredient when updating a recipe."""
+        recipe = create_recipe(user=self.user)
+
+        payload = {'ingredients': [{'name': 'Limes'}]}
+        res = self.client.patch(
+            detail_url(recipe.id), payload, format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        new_ingredient = Ingredient.objects.get(user=self.user, name='Limes')
+        self.assertIn(new_ingredient, recipe.ingredients.all())
+
+    def test_update_recipe_assign_ingredient(self):
+        """Test assigning an existing ingredient when updating a recipe."""
+        ingredient1 = Ingredient.objects.create(user=self.user, name='Pepper')
+        recipe = create_recipe(user=self.user)
+        recipe.ingredients.add(ingredient1)
+
+        ingredient2 = Ingredient.objects.create(user=self.user, name='Chili')
+        payload = {'ingredients': [{'name': 'Chili'}]}
+        res = self.client.patch(
+            detail_url(recipe.id), payload, format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn(ingredient2, recipe.ingredients.all())
+        self.assertNotIn(ingredient1, recipe.ingredients.all())
+
+    def test_clear_recipe_ingredients(self):
+        """Test clearing a recipes ingredients."""
+        ingredient = Ingredient.objects.create(user=self.user, name='Garlic')
+        recipe = create_recipe(user=self.user)
+        recipe.ingredients.add(ingredient)
+
+        payload = {'ingredients': []}
+        res = self.client.patch(
+            detail_url(recipe.id), payload, format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(recipe.ingredients.count(), 0)
+
+    def test_create_recipe_ingredient_queries_are_batched(self):
+        """Test ingredient resolution doesn't query per ingredient."""
+        def create(names):
+            payload = {
+                'title': 'Stew',
+                'time_minutes': 90,
+                'price': Decimal('6.00'),
+                'ingredients': [{'name': name} for name in names],
+            }
+            with CaptureQueriesContext(connection) as ctx:
+                res = self.client.post(RECIPES_URL, payload, format='json')
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(
+            create(['Beef']),
+            create([f'Veg {i}' for i in range(15)]),
+        )
+
+    def _bulk_import(self, records, **params):
+        """Post records as NDJSON and return the decoded result rows."""
+        body = '\n'.join(
+            r if isinstance(r, str) else json.dumps(r) for r in records
+        )
+        url = BULK_URL
+        if params:
+            url += '?' + '&'.join(f'{k}={v}' for k, v in params.items())
+        res = self.client.generic(
+            'POST', url, body, content_type='application/x-ndjson',
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        content = b''.join(res.streaming_content).decode()
+        return [json.loads(row) for row in content.splitlines()]
+
+    def test_bulk_import_recipes(self):
+        """Test importing recipes with shared tags and ingredients."""
+        Tag.objects.create(user=self.user, name='Dinner')
+        records = [
+            {
+                'title': 'Curry',
+                'time_minutes': 40,
+                'price': '7.00',
+                'tags': [{'name': 'Dinner'}, {'name': 'Spicy'}],
+                'ingredients': [{'name': 'Rice'}],
+            },
+            {
+                'title': 'Chili',
+                'time_minutes': 50,
+                'price': '6.50',
+                'tags': [{'name': 'Spicy'}],
+                'ingredients': [{'name': 'Rice'}, {'name': 'Beans'}],
+            },
+        ]
+
+        results = self._bulk_import(records)
+
+        self.assertEqual([r['status'] for r in results], ['created'] * 2)
+        self.assertEqual([r['line'] for r in results], [1, 2])
+        curry = Recipe.objects.get(id=results[0]['id'], user=self.user)
+        chili = Recipe.objects.get(id=results[1]['id'], user=self.user)
+        self.assertEqual(curry.title, 'Curry')
+        self.assertEqual(
+            set(curry.tags.values_list('name', flat=True)),
+            {'Dinner', 'Spicy'},
+        )
+        self.assertEqual(
+            set(chili.ingredients.values_list('name', flat=True)),
+            {'Rice', 'Beans'},
+        )
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(
+            Ingredient.objects.filter(user=self.user).count(), 2,
+        )
+
+    def test_bulk_import_reports_invalid_lines(self):
+        """Test invalid lines are reported without stopping the import."""
+        records = [
+            {'title': 'Soup', 'time_minutes': 10, 'price': '2.00'},
+            '{not json',
+            {'title': 'No price', 'time_minutes': 5},
+            '',
+            {'title': 'Salad', 'time_minutes': 5, 'price': '3.00'},
+        ]
+
+        results = self._bulk_import(records, batch_size=1)
+
+        self.assertEqual(
+            [(r['line'], r['status']) for r in results],
+            [(1, 'created'), (2, 'error'), (3, 'error'), (5, 'created')],
+        )
+        self.assertIn('price', results[2]['errors'])
+        self.assertEqual(
+            set(Recipe.objects.filter(user=self.user).values_list(
+                'title', flat=True,
+            )),
+            {'Soup', 'Salad'},
+        )
+
+    def test_bulk_import_reports_failed_batches(self):
+        """Test a batch that fails to save is reported line by line."""
+        records = [
+            {'title': 'Soup', 'time_minutes': 10, 'price': '2.00'},
+            {'title': 'Salad', 'time_minutes': 5, 'price': '3.00'},
+        ]
+        create_all = bulk.create_all
+
+        def fail_first(model, objs):
+            if objs[0].title == 'Soup':
+                raise DatabaseError('Connection lost.')
+            return create_all(model, objs)
+
+        with mock.patch.object(bulk, 'create_all', side_effect=fail_first):
+            with self.assertLogs('recipe.importer', 'ERROR'):
+                results = self._bulk_import(records, batch_size=1)
+
+        self.assertEqual(
+            [(r['line'], r['status']) for r in results],
+            [(1, 'error'), (2, 'created')],
+        )
+        self.assertEqual(
+            list(Recipe.objects.values_list('title', flat=True)), ['Salad'],
+        )
+
+    def test_bulk_import_empty_body_error(self):
+        """Test an empty import body is rejected."""
+        res = self.client.generic(
+            'POST', BULK_URL, '', content_type='application/x-ndjson',
+            CONTENT_LENGTH='0',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_import_requires_content_length(self):
+        """Test a body sent without Content-Length is refused."""
+        res = self.client.generic(
+            'POST', BULK_URL, '{"title": "Soup"}',
+            content_type='application/x-ndjson', CONTENT_LENGTH='',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_411_LENGTH_REQUIRED)
+        self.assertFalse(Recipe.objects.exists())
+
+    def _export(self, **params):
+        """Call the export endpoint and return the decoded body."""
+        res = self.client.get(EXPORT_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return b''.join(res.streaming_content).decode()
+
+    @override_settings(RECIPE_EXPORT_CHUNK_SIZE=2)
+    def test_export_recipes_ndjson(self):
+        """Test exporting recipes with their tags as NDJSON."""
+        other_user = create_user(email='other@example.com', password='x12345')
+        create_recipe(user=other_user)
+        recipes = [
+            create_recipe(user=self.user, title=f'Recipe {i}')
+            for i in range(3)
+        ]
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        recipes[2].tags.add(tag)
+
+        rows = [json.loads(line) for line in self._export().splitlines()]
+
+        self.assertEqual([r['id'] for r in rows], [r.id for r in recipes])
+        self.assertEqual(rows[0]['price'], '5.25')
+        self.assertEqual(rows[0]['tags'], [])
+        self.assertEqual(rows[2]['tags'], [{'id': tag.id, 'name': 'Vegan'}])
+        self.assertEqual(rows[2]['ingredients'], [])
+
+    def test_export_recipes_csv(self):
+        """Test exporting recipes as CSV."""
+        recipe = create_recipe(user=self.user, title='Toast')
+        recipe.ingredients.add(
+            Ingredient.objects.create(user=self.user, name='Bread'),
+            Ingredient.objects.create(user=self.user, name='Butter'),
+        )
+
+        rows = list(csv.DictReader(io.StringIO(self._export(output='csv'))))
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['title'], 'Toast')
+        self.assertEqual(rows[0]['ingredients'], 'Bread;Butter')
+
+    def test_export_unknown_output_error(self):
+        """Test an unsupported export format is rejected."""
+        res = self.client.get(EXPORT_URL, {'output': 'xml'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_by_tags(self):
+        """Test filtering recipes by tags."""
+        r1 = create_recipe(user=self.user, title='Thai Vegetable Curry')
+        r2 = create_recipe(user=self.user, title='Aubergine with Tahini')
+        tag1 = Tag.objects.create(user=self.user, name='Vegan')
+        tag2 = Tag.objects.create(user=self.user, name='Vegetarian')
+        r1.tags.add(tag1)
+        r2.tags.add(tag1, tag2)
+        r3 = create_recipe(user=self.user, title='Fish and chips')
+
+        params = {'tags': f'{tag1.id},{tag2.id}'}
+        res = self.client.get(RECIPES_URL, params)
+
+        # The API lists tags by id; compare against the same order.
+        recipes = Recipe.objects.prefetch_related(
+            Prefetch('tags', queryset=Tag.objects.order_by('id')),
+        ).in_bulk([r1.id, r2.id, r3.id])
+        s1 = RecipeSerializer(recipes[r1.id])
+        s2 = RecipeSerializer(recipes[r2.id])
+        s3 = RecipeSerializer(recipes[r3.id])
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertIn(s1.data, res.data['results'])
+        self.assertIn(s2.data, res.data['results'])
+        self.assertNotIn(s3.data, res.data['results'])
+
+    def test_filter_by_ingredients(self):
+        """Test filtering recipes by ingredients."""
+        r1 = create_recipe(user=self.user, title='Posh Beans on Toast')
+        r2 = create_recipe(user=self.user, title='Chicken Cacciatore')
+        in1 = Ingredient.objects.create(user=self.user, name='Feta Cheese')
+        in2 = Ingredient.objects.create(user=self.user, name='Chicken')
+        r1.ingredients.add(in1)
+        r2.ingredients.add(in2)
+        r3 = create_recipe(user=self.user, title='Red Lentil Daal')
+
+        params = {'ingredients': f'{in1.id},{in2.id}'}
+        res = self.client.get(RECIPES_URL, params)
+
+        ids = [r['id'] for r in res.data['results']]
+        self.assertCountEqual(ids, [r1.id, r2.id])
+        self.assertNotIn(r3.id, ids)
+
+    def test_filter_by_tags_and_ingredients(self):
+        """Test tag and ingredient filters must both match."""
+        tag = Tag.objects.create(user=self.user, name='Quick')
+        ingredient = Ingredient.objects.create(user=self.user, name='Egg')
+        both = create_recipe(user=self.user, title='Omelette')
+        both.tags.add(tag)
+        both.ingredients.add(ingredient)
+        tag_only = create_recipe(user=self.user, title='Toast')
+        tag_only.tags.add(tag)
+
+        params = {'tags': str(tag.id), 'ingredients': str(ingredient.id)}
+        res = self.client.get(RECIPES_URL, params)
+
+        self.assertEqual([r['id'] for r in res.data['results']], [both.id])
+
+    def test_filter_invalid_ids_error(self):
+        """Test non-numeric filter IDs are rejected."""
+        res = self.client.get(RECIPES_URL, {'tags': '1,abc'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_recipes(self):
+        """Test searching recipes by title and description."""
+        r1 = create_recipe(user=self.user, title='Green Curry')
+        r2 = create_recipe(
+            user=self.user,
+            title='Weeknight dinner',
+            description='A quick curry with chickpeas.',
+        )
+        create_recipe(user=self.user, title='Pancakes')
+        other_user = create_user(email='other@example.com', password='x12345')
+        create_recipe(user=other_user, title='Curry for someone else')
+
+        res = self.client.get(RECIPES_URL, {'search': 'curry'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertCountEqual(
+            [r['id'] for r in res.data['results']], [r1.id, r2.id],
+        )
+
+    @skipUnless(connection.vendor == 'postgresql', 'Needs PostgreSQL.')
+    def test_search_recipes_ranked_by_relevance(self):
+        """Test title matches rank above description matches."""
+        in_description = create_recipe(
+            user=self.user, title='Dinner', description='Lamb curry.',
+        )
+        in_title = create_recipe(
+            user=self.user, title='Lamb curry', description='Slow cooked.',
+        )
+
+        res = self.client.get(RECIPES_URL, {'search': 'lamb curry'})
+
+        self.assertEqual(
+            [r['id'] for r in res.data['results']],
+            [in_title.id, in_description.id],
+        )
+
+        res = self.client.get(
+            RECIPES_URL, {'search': 'lamb curry', 'page_size': 1},
+        )
+        self.assertEqual(res.data['results'][0]['id'], in_title.id)
+        res = self.client.get(res.data['next'])
+        self.assertEqual(
+            [r['id'] for r in res.data['results']], [in_description.id],
+        )
+
+
+class ImageUploadTests(TestCase):
+    """Tests for the image upload API."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        media_settings = override_settings(
+            MEDIA_ROOT=self.media_root,
+            RECIPE_THUMBNAIL_ROOT=os.path.join(self.media_root, 'thumbs'),
+            RECIPE_IMAGE_WORKERS=0,
+            RECIPE_THUMBNAIL_SIZE=32,
+        )
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        self.addCleanup(shutil.rmtree, self.media_root)
+
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='test123')
+        self.client.force_authenticate(self.user)
+        self.recipe = create_recipe(user=self.user)
+
+    def upload(self, size=(64, 48), **kwargs):
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as image_file:
+            Image.new('RGB', size, 'red').save(image_file, format='JPEG')
+            image_file.seek(0)
+            with self.captureOnCommitCallbacks(execute=True):
+                return self.client.post(
+                    image_upload_url(self.recipe.id),
+                    {'image': image_file},
+                    format='multipart',
+                    **kwargs,
+                )
+
+    def test_upload_image(self):
+        """Test uploading an image stores it and makes a thumbnail."""
+        res = self.upload()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('image', res.data)
+        self.recipe.refresh_from_db()
+        self.assertTrue(os.path.exists(self.recipe.image.path))
+        self.assertEqual(len(self.recipe.thumbnail), 64)
+
+        storage = images.get_thumbnail_storage()
+        with storage.open(images.thumbnail_name(self.recipe.thumbnail)) as f:
+            with Image.open(f) as thumbnail:
+                self.assertEqual(thumbnail.size, (32, 24))
+
+        res = self.client.get(detail_url(self.recipe.id))
+        self.assertTrue(res.data['thumbnail'].endswith(
+            f'/thumbnails/{self.recipe.thumbnail}.jpg'
+        ))
+
+    def test_upload_replaces_image(self):
+        """Test a new upload removes the old image and shares thumbnails."""
+        self.upload()
+        self.recipe.refresh_from_db()
+        first = self.recipe.image.path
+        thumbnail = self.recipe.thumbnail
+
+        self.upload()
+
+        self.recipe.refresh_from_db()
+        self.assertFalse(os.path.exists(first))
+        self.assertTrue(os.path.exists(self.recipe.image.path))
+        self.assertEqual(self.recipe.thumbnail, thumbnail)
+
+    def test_upload_keeps_concurrent_summary(self):
+        """Test an upload doesn't write back the summaries it loaded."""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        is_valid = RecipeImageSerializer.is_valid
+
+        def tag_meanwhile(serializer, **kwargs):
+            self.recipe.tags.add(tag)  # by another request
+            return is_valid(serializer, **kwargs)
+
+        with mock.patch.object(
+            RecipeImageSerializer, 'is_valid', tag_meanwhile,
+        ):
+            res = self.upload()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.recipe.refresh_from_db()
+        self.assertTrue(self.recipe.image)
+        self.assertEqual(
+            self.recipe.tag_summary, [{'id': tag.id, 'name': 'Vegan'}],
+        )
+
+    def test_upload_image_bad_request(self):
+        """Test uploading an invalid image."""
+        url = image_upload_url(self.recipe.id)
+        payload = {'image': io.BytesIO(b'notanimage')}
+        res = self.client.post(url, payload, format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
+
+    def test_upload_image_too_large(self):
+        """Test uploads past the size limit are rejected."""
+        with override_settings(RECIPE_IMAGE_MAX_BYTES=100):
+            res = self.upload()
+
+        self.assertEqual(
+            res.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        )
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
+
+    def test_thumbnail_served_with_cache_headers(self):
+        """Test thumbnails are public and cacheable forever."""
+        self.upload()
+        self.recipe.refresh_from_db()
+        url = reverse('recipe:recipe-thumbnail', args=[self.recipe.thumbnail])
+
+        res = APIClient().get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'image/jpeg')
+        self.assertIn('immutable', res['Cache-Control'])
+        self.assertEqual(res['ETag'], f'"{self.recipe.thumbnail}"')
+
+        res = APIClient().get(url, HTTP_IF_NONE_MATCH=res['ETag'])
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_delete_recipe_removes_files(self):
+        """Test deleting recipes removes images and unused thumbnails."""
+        self.upload()
+        first = Recipe.objects.get(id=self.recipe.id)
+        self.recipe = create_recipe(user=self.user)
+        self.upload()
+        second = Recipe.objects.get(id=self.recipe.id)
+        storage = images.get_thumbnail_storage()
+        thumbnail = images.thumbnail_name(first.thumbnail)
+        self.assertEqual(first.thumbnail, second.thumbnail)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(detail_url(first.id))
+
+        self.assertFalse(os.path.exists(first.image.path))
+        self.assertTrue(storage.exists(thumbnail))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(detail_url(second.id))
+
+        self.assertFalse(os.path.exists(second.image.path))
+        self.assertFalse(storage.exists(thumbnail))
+
+    def test_delete_user_removes_files(self):
+        """Test batch deleting a user removes their recipes' files."""
+        self.upload()
+        self.recipe.refresh_from_db()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            deletion.delete_user(self.user.id)
+
+        self.assertFalse(os.path.exists(self.recipe.image.path))
+        self.assertFalse(images.get_thumbnail_storage().exists(
+            images.thumbnail_name(self.recipe.thumbnail),
+        ))
+
+    def test_missing_thumbnail(self):
+        """Test an unknown thumbnail digest is a 404."""
+        url = reverse('recipe:recipe-thumbnail', args=['0' * 64])
+
+        res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,73 @@
+"""
+Tests for replica routing of the recipe APIs.
+"""
+import time
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from recipe.cache import get_last_modified
+
+
+TAGS_URL = reverse('recipe:tag-list')
+
+
+@override_settings(DB_REPLICA_STICKY_SECONDS=5)
+@patch('recipe.routing.db_router.pin_primary')
+class ReplicaRoutingTests(TestCase):
+    """Test when requests are pinned to the primary."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com', password='testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        shared = patch('recipe.routing.cache.is_shared', return_value=True)
+        self.is_shared = shared.start()
+        self.addCleanup(shared.stop)
+
+    def get_tags_later(self, seconds):
+        """List tags as if seconds had passed since the user's last write."""
+        now = get_last_modified(self.user.id) + seconds
+        with patch('recipe.routing.time.time', return_value=now):
+            return self.client.get(TAGS_URL)
+
+    def test_read_after_sticky_window_uses_replica(self, patched_pin):
+        """Test reads are not pinned once the user's writes are old."""
+        res = self.get_tags_later(60)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        patched_pin.assert_not_called()
+
+    def test_read_after_write_pinned(self, patched_pin):
+        """Test reads right after a write are pinned to the primary."""
+        res = self.client.post(reverse('recipe:recipe-list'), {
+            'title': 'Sample', 'time_minutes': 5, 'price': '1.00',
+        })
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        patched_pin.reset_mock()
+
+        self.get_tags_later(1)
+
+        patched_pin.assert_called_once_with()
+
+    def test_writes_pinned(self, patched_pin):
+        """Test unsafe methods are always pinned to the primary."""
+        with patch('recipe.routing.time.time', return_value=time.time() + 60):
+            self.client.post(reverse('recipe:recipe-list'), {})
+
+        patched_pin.assert_called_once_with()
+
+    def test_process_local_cache_pinned(self, patched_pin):
+        """Test reads stay on the primary without a shared api cache."""
+        self.is_shared.return_value = False
+
+        self.get_tags_later(60)
+
+        patched_pin.assert_called_once_with()
@@ -1,14 +1,19 @@
 """
 Tests for the tags API.
 """
+from decimal import Decimal
+
 from django.contrib.auth import get_user_model  # fun. for gettimg user model
 from django.urls import reverse  # so that we can configure our URLS that we need to test.
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 
 from rest_framework import status  # status code so that we can have user friendly names for the status codes that we're testing against.
 from rest_framework.test import APIClient  # thtas our testing client
 
-from core.models import Tag
+from core.jobs import Worker
+from core.models import Job, Recipe, Tag
 
 from recipe.serializers import TagSerializer  # we will create after we write the test in next lesson.
 
@@ -59,7 +64,7 @@ class PrivateTagsApiTests(TestCase):
         tags = Tag.objects.all().order_by('-name')  # Check the result, depending on db used, items maybe returned in different order, so to ensure we r db agnostic (different order returned in different versions of same db), we explicitly mention in the test what order we expect to see the API return results.
         serializer = TagSerializer(tags, many=True)  # we'll serialize the result from our query here, setting many=true bcz its not only one object , it will be multiple objects(list of objects.)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)  #so that data of response matches the serializer that we created
+        self.assertEqual(res.data['results'], serializer.data)  #so that data of response matches the serializer that we created
 
     def test_tags_limited_to_user(self):
         """Test list of tags is limited to authenticated user."""
@@ -70,9 +75,9 @@ class PrivateTagsApiTests(TestCase):
         res = self.client.get(TAGS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], tag.name)
-        self.assertEqual(res.data[0]['id'], tag.id)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], tag.name)
+        self.assertEqual(res.data['results'][0]['id'], tag.id)
 # in the test above we created two tags , one was assigned to a different user, we called the API as the user that we authenticated with (in th esetup above), then we check that when we retrieve the tags=>aucessful 200 response, then we check there's only one result returned bcz we wouldn't expect the first user's tag to be returned bcz we r not authenticated as user, we r authenticated as other user, so we expect to see only one tag returned in the response. Then maybe one tag was returned but we r filtering the wrong user, so check that name and ID mtch the tag that we created for the authenticated user.
 # run the test , fails on import TagSerailezer bcz not yet implemented.
 
@@ -89,6 +94,52 @@ class PrivateTagsApiTests(TestCase):
         self.assertEqual(tag.name, payload['name'])  # we r checking that the name of the tag after we refreshed from db is now the name that we specified in the payload.(after that it should be renamed to Desert)
 # Run the test w/c fails as we haven't implemented the feature yet. => no reverse match.
 
+    def test_update_same_name_leaves_recipes(self):
+        """Test saving a tag without renaming it doesn't touch recipes."""
+        tag = Tag.objects.create(user=self.user, name='Dessert')
+        Recipe.objects.create(
+            user=self.user, title='Cake', time_minutes=5,
+            price=Decimal('1.00'),
+        ).tags.add(tag)
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.patch(detail_url(tag.id), {'name': 'Dessert'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse([
+            q['sql'] for q in ctx.captured_queries
+            if q['sql'].startswith('UPDATE "core_recipe"')
+        ])
+
+    @override_settings(DELETION_BATCH_SIZE=1)
+    def test_rename_heavily_used_tag_in_job(self):
+        """Test renaming a tag used by many recipes is done by a job."""
+        tag = Tag.objects.create(user=self.user, name='Dessert')
+        recipes = [
+            Recipe.objects.create(
+                user=self.user, title=f'Recipe {n}', time_minutes=5,
+                price=Decimal('1.00'),
+            ) for n in range(2)
+        ]
+        tag.recipe_set.add(*recipes)
+
+        res = self.client.patch(detail_url(tag.id), {'name': 'Pudding'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        recipes[0].refresh_from_db()
+        self.assertEqual(recipes[0].tag_summary[0]['name'], 'Dessert')
+
+        Worker(concurrency=0).run(burst=True)
+
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.Status.SUCCEEDED)
+        self.assertEqual(job.result, {'refreshed': 2})
+        for recipe in recipes:
+            recipe.refresh_from_db()
+            self.assertEqual(
+                recipe.tag_summary, [{'id': tag.id, 'name': 'Pudding'}],
+            )
+
     def test_delete_tag(self):
         """Test deleting a tag."""
         tag = Tag.objects.create(user=self.user, name='Breakfast')  # Creating a new tag called breakfast
@@ -99,4 +150,124 @@ class PrivateTagsApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)  # Checkimg the result is HTTP 204 W/h is defualt response for calling the HTTP delete method.
         tags = Tag.objects.filter(user=self.user)  # retrieving all tags in system assigned to the authenticated user
         self.assertFalse(tags.exists())  # then we r asserting that the result does not exist, tags that exist =False, so there are not tags in the system, this is the case when the tags gets deleted.
-        # Run the tes w/c fails bcz HTTP method not supported response=> AssertionError : 405! 204 as expected.
\ No newline at end of file
+        # Run the tes w/c fails bcz HTTP method not supported response=> AssertionError : 405! 204 as expected.
+
+    def test_order_tags_by_recipe_count(self):
+        """Test ordering tags by how many recipes use them."""
+        popular = Tag.objects.create(user=self.user, name='Dinner')
+        used = Tag.objects.create(user=self.user, name='Lunch')
+        unused = Tag.objects.create(user=self.user, name='Brunch')
+        for n in range(3):
+            recipe = Recipe.objects.create(
+                user=self.user, title=f'Recipe {n}', time_minutes=5,
+                price=Decimal('1.00'),
+            )
+            recipe.tags.add(popular)
+            if n == 0:
+                recipe.tags.add(used)
+
+        res = self.client.get(TAGS_URL, {'ordering': '-recipe_count'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [t['id'] for t in res.data['results']],
+            [popular.id, used.id, unused.id],
+        )
+        self.assertEqual(set(res.data['results'][0]), {'id', 'name'})
+
+        res = self.client.get(
+            TAGS_URL, {'ordering': '-recipe_count', 'page_size': 2},
+        )
+        res = self.client.get(res.data['next'])
+        self.assertEqual([t['id'] for t in res.data['results']], [unused.id])
+
+    def test_filter_tags_assigned_to_recipes(self):
+        """Test listing only tags assigned to recipes."""
+        tag = Tag.objects.create(user=self.user, name='Breakfast')
+        Tag.objects.create(user=self.user, name='Lunch')
+        recipe = Recipe.objects.create(
+            user=self.user, title='Eggs', time_minutes=5,
+            price=Decimal('1.00'),
+        )
+        recipe.tags.add(tag)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(TAGS_URL, {'assigned_only': 1})
+
+        self.assertEqual([t['id'] for t in res.data['results']], [tag.id])
+
+    def test_invalid_ordering_error(self):
+        """Test unknown orderings are rejected."""
+        res = self.client.get(TAGS_URL, {'ordering': 'user'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(DELETION_BATCH_SIZE=2)
+    def test_delete_tag_unlinks_recipes_in_batches(self):
+        """Test deleting a heavily used tag is done by a batching job."""
+        tag = Tag.objects.create(user=self.user, name='Breakfast')
+        for n in range(5):
+            recipe = Recipe.objects.create(
+                user=self.user, title=f'Recipe {n}', time_minutes=5,
+                price=Decimal('1.00'),
+            )
+            recipe.tags.add(tag)
+
+        res = self.client.delete(detail_url(tag.id))
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(res.data['status'], Job.Status.QUEUED)
+        self.assertTrue(res['Location'].endswith(f'/{res.data["id"]}/'))
+        self.assertTrue(Tag.objects.filter(id=tag.id).exists())
+
+        with CaptureQueriesContext(connection) as ctx:
+            Worker(concurrency=0).run(burst=True)
+
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.Status.SUCCEEDED)
+        self.assertEqual(job.result, {'deleted': {'recipe_tags': 5}})
+        self.assertFalse(Tag.objects.filter(id=tag.id).exists())
+        self.assertFalse(Recipe.tags.through.objects.exists())
+        unlinks = [
+            q['sql'] for q in ctx.captured_queries
+            if q['sql'].startswith('DELETE FROM "core_recipe_tags"')
+            and '"core_recipe_tags"."id" IN' in q['sql']
+        ]
+        self.assertEqual(len(unlinks), 3)
+
+    def test_tags_cursor_pagination(self):
+        """Test tags are paginated by name with opaque cursors."""
+        for name in ['Breakfast', 'Lunch', 'Dinner']:
+            Tag.objects.create(user=self.user, name=name)
+
+        res = self.client.get(TAGS_URL, {'page_size': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [t['name'] for t in res.data['results']],
+            ['Lunch', 'Dinner'],
+        )
+
+        res = self.client.get(res.data['next'])
+
+        self.assertEqual(
+            [t['name'] for t in res.data['results']],
+            ['Breakfast'],
+        )
+        self.assertIsNone(res.data['next'])
+
+    def test_tags_with_same_name_paginated_once(self):
+        """Test tags sharing a name are each listed exactly once."""
+        tags = [
+            Tag.objects.create(user=self.user, name='Lunch') for _ in range(3)
+        ]
+
+        ids = []
+        res = self.client.get(TAGS_URL, {'page_size': 1})
+        while True:
+            ids += [t['id'] for t in res.data['results']]
+            if res.data['next'] is None:
+                break
+            res = self.client.get(res.data['next'])
+
+        self.assertEqual(ids, sorted((tag.id for tag in tags), reverse=True))
@@ -3,12 +3,13 @@ URL mappings for the recipe app.
 """
 from django.urls import (
     path,  # function to define a path
+    re_path,
     include,  # function to include urls by url names
 )
 
 from rest_framework.routers import DefaultRouter  #  default router provided by DRF. u can use this with an API View to automatically create routes for all of the different options availabe for that view.
 
-from recipe import views
+from recipe import async_views, views
 
 
 router = DefaultRouter()  # create default router
@@ -21,6 +22,27 @@ router.register('ingredients', views.IngredientViewSet)
 app_name = 'recipe'  # define the name w/c is used to identify the name when we do the reverse lookup of URLs
 
 urlpatterns = [
+    path(
+        'async/recipes/',
+        async_views.recipe_list,
+        name='async-recipe-list',
+    ),
+    path(
+        'async/recipes/<int:pk>/',
+        async_views.recipe_detail,
+        name='async-recipe-detail',
+    ),
+    path('async/tags/', async_views.tag_list, name='async-tag-list'),
+    path(
+        'async/ingredients/',
+        async_views.ingredient_list,
+        name='async-ingredient-list',
+    ),
+    re_path(
+        r'^thumbnails/(?P<digest>[0-9a-f]{64})\.jpg$',
+        views.recipe_thumbnail,
+        name='recipe-thumbnail',
+    ),
     path('', include(router.urls)),  # to include the URLs that are generated automatically by the router.
 ]
 # so URL gives u the URL s options and u can use that to retrieve the URLs that r available.
@@ -2,25 +2,81 @@ from django.shortcuts import render
 """
 Views for the recipe APIs
 """
+from drf_spectacular.utils import (
+    extend_schema_view,
+    extend_schema,
+    OpenApiParameter,
+    OpenApiTypes,
+)
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection, transaction
+from django.db.models import Exists, F, FloatField, OuterRef, Prefetch, Q
+from django.db.models.functions import Cast
+from django.http import FileResponse, Http404, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.views.decorators.http import require_safe
+
 from rest_framework import (
     viewsets,
     mixins,   # jst a thing that we can mixin to a view to add additional functionality
+    status,
 )
-from rest_framework.authentication import TokenAuthentication
+from rest_framework.decorators import action
+from rest_framework.exceptions import ParseError, ValidationError
 from rest_framework.permissions import IsAuthenticated   # bcz that is the permission that we want to check before users can use the recipe end point.
+from rest_framework.response import Response
 
 # Create your views here.
+from core.deletion import Deletion, link_steps
+from core.jobs import enqueue
 from core.models import (
     Recipe,
     Tag,
     Ingredient,
 ) # imports our Recipe model and serializers w/c we can use to get our recipe serializers.
-from recipe import serializers
+from recipe import images, serializers
+from recipe.cache import CachedResponseMixin
+from recipe.exporter import EXPORT_FORMATS
+from recipe.importer import import_recipes, spool_results
+from recipe.pagination import (
+    RecipeCursorPagination,
+    NameCursorPagination,
+)
+from job.serializers import JobSerializer
+from recipe.routing import ReplicaRoutingMixin
+from recipe.tasks import delete_linked
+from user.authentication import CachedTokenAuthentication
 
 
 # We need to modify the view set and we need to tell it that we're calling the detail endpoint instead of using the recipe serializer that we defined in serializer class we want to use detail serializer.
 # for this we override the method called get serializer class so that if user calls the detail endpt., we we'll use the detail serializer instead of defualt w/c is configured for the list view. It is the method called when DRF wants to determine the class that's being used for a particular action.
-class RecipeViewSet(viewsets.ModelViewSet):
+@extend_schema_view(
+    list=extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'tags',
+                OpenApiTypes.STR,
+                description='Comma separated list of tag IDs to filter',
+            ),
+            OpenApiParameter(
+                'ingredients',
+                OpenApiTypes.STR,
+                description='Comma separated list of ingredient IDs to filter',
+            ),
+            OpenApiParameter(
+                'search',
+                OpenApiTypes.STR,
+                description='Full-text search over title and description',
+            ),
+        ]
+    )
+)
+class RecipeViewSet(ReplicaRoutingMixin,
+                    CachedResponseMixin,
+                    viewsets.ModelViewSet):
 # there are various different viewsets available 1. model viewset (u specifically set up to work directly with a model.) Wer using it bcz we'll use a lotof the existing logic that is provided by serializer in order to perform CRUD Oprtns.
     """View for manage recipe APIs."""   # APIs bcz viewset will generate different endpoints - list endpt., id endpt. or specific detail endpt. It also able to perform different methods to perform diff. actions on the recipes.
      # Configue our viewset to tell it what we need to use in the system.
@@ -29,58 +85,316 @@ class RecipeViewSet(viewsets.ModelViewSet):
     #  Bcz we have added multiple different endpts. for CRUD on new items. So all the different situations except listing, we wnat to  use the detail serializer.
     queryset = Recipe.objects.all()   # represents the objects that are available for this viewset, bcz this is a model viewset,its expected to work with a model.
     #  above line=>it would return all the objects that we define but
-    authentication_classes = [TokenAuthentication]  # in orderto use any of the endpts. provided by this feature u need to use token authentication
+    pagination_class = RecipeCursorPagination
+    authentication_classes = [CachedTokenAuthentication]  # in orderto use any of the endpts. provided by this feature u need to use token authentication
     permission_classes = [IsAuthenticated]  # and then u need to be aunthenticated ot use the APIs. If u make request to api and u r unauthenticated, it'll give u an error.
 
 # if we implement the view as it is,it would allow us to manage all of the diff. recipes int he system but we want to ensure that those recipes are filtered to the authenticated user.
 #  Therefore we override get_queryset method provided by model viewset.
     def get_queryset(self):  # called in order to get the objects from our quesry set.
         """Retrieve recipes for authenticated user."""
-        return self.queryset.filter(user=self.request.user).order_by('-id')  # but we added an additional filter to filter by the user that is assigned to the request.
+        queryset = self.queryset.filter(user=self.request.user).order_by('-id')  # but we added an additional filter to filter by the user that is assigned to the request.
+        if self.action == 'list':
+            for field_name in ('tags', 'ingredients'):
+                ids = self._params_to_ints(field_name)
+                if ids:
+                    queryset = queryset.filter(
+                        self._has_related(field_name, ids)
+                    )
+            search = self.request.query_params.get('search')
+            if search:
+                queryset = self._search(queryset, search)
+            # Rows rather than instances: the list serializer renders them
+            # directly and looks up tags and ingredients itself.
+            return queryset.values(
+                *self._get_read_fields(),
+                *self.get_serializer_class().Meta.summary_fields.values(),
+                *queryset.query.annotations,
+            )
+        if self.action == 'retrieve':
+            queryset = queryset.only(
+                *self._get_read_fields()
+            ).prefetch_related(
+                Prefetch('tags', queryset=Tag.objects.only(
+                    'id', 'name',
+                ).order_by('id')),
+                Prefetch('ingredients', queryset=Ingredient.objects.only(
+                    'id', 'name',
+                ).order_by('id')),
+            )
+        return queryset
+
+    def _params_to_ints(self, name):
+        """Convert a comma separated query parameter to a list of IDs."""
+        value = self.request.query_params.get(name)
+        if not value:
+            return []
+        try:
+            return [int(str_id) for str_id in value.split(',')]
+        except ValueError:
+            raise ValidationError({name: 'Expected comma separated IDs.'})
+
+    def _has_related(self, field_name, ids):
+        """Return an EXISTS over the through table for any of ids.
+
+        Unlike filtering on tags__id__in this needs no join and no
+        DISTINCT, and it is answered from the through-table indexes.
+        """
+        field = Recipe._meta.get_field(field_name)
+        links = field.remote_field.through.objects.filter(**{
+            field.m2m_field_name(): OuterRef('pk'),
+            f'{field.m2m_reverse_field_name()}_id__in': ids,
+        })
+        return Exists(links)
+
+    def _use_search_rank(self):
+        """Return True if list results are ranked by search relevance."""
+        return (
+            self.action == 'list'
+            and bool(self.request.query_params.get('search'))
+            and connection.vendor == 'postgresql'
+        )
+
+    def _search(self, queryset, search):
+        """Filter to recipes matching search, ranked on PostgreSQL."""
+        if connection.vendor != 'postgresql':
+            # No tsvector outside PostgreSQL, e.g. when testing on SQLite.
+            return queryset.filter(
+                Q(title__icontains=search) | Q(description__icontains=search)
+            )
+
+        query = SearchQuery(search, config='english', search_type='websearch')
+        # ts_rank returns a real; widen it so the cursor position round-
+        # trips exactly through Python floats.
+        return queryset.filter(search_vector=query).annotate(
+            rank=Cast(SearchRank(F('search_vector'), query), FloatField()),
+        )
+
+    def get_cursor_ordering(self):
+        """Page search results by rank instead of by id."""
+        if self._use_search_rank():
+            return ('-rank', '-id')
+        return None
+
+    def _get_read_fields(self):
+        """Return the concrete recipe columns the serializer renders."""
+        fields = self.get_serializer_class().Meta.fields
+        return [
+            name for name in fields
+            if not Recipe._meta.get_field(name).many_to_many
+        ]
 # now configure URLs to this recipe viewset
     def get_serializer_class(self):
         """Return the serializer class for request."""
         if self.action == 'list':  # check if the action is list
             return serializers.RecipeSerializer   #  then we use the recipe serializer. Now its important that u don't call the constructor of this object bcz this expects u to return a reference to a class not object of a class.so don't use (). You just want to return a reference to the class and then DRF instantiate an object and use in the viewset.
+        elif self.action == 'upload_image':
+            return serializers.RecipeImageSerializer
 
         return self.serializer_class  # else we return the configured serializer class that we configured on our recipe.
 
 # rerun the test
 
 # We need to modify or add one method to our existing view in order to tell it to save the correct user to the recipe that are created.
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    @action(methods=['POST'], detail=False, url_path='bulk')
+    def bulk_import(self, request):
+        """Import recipes streamed as newline-delimited JSON."""
+        batch_size = settings.RECIPE_IMPORT_BATCH_SIZE
+        try:
+            batch_size = min(
+                max(int(request.query_params['batch_size']), 1), batch_size,
+            )
+        except (KeyError, ValueError):
+            pass
+
+        stream = request.stream
+        if stream is None:
+            # Django can't read a body sent without Content-Length.
+            if not request.META.get('CONTENT_LENGTH'):
+                return Response(
+                    {'detail': 'Content-Length is required.'},
+                    status=status.HTTP_411_LENGTH_REQUIRED,
+                )
+            raise ParseError('Request body is empty.')
+
+        results = spool_results(import_recipes(
+            iter(stream.readline, b''),
+            request.user,
+            batch_size,
+            self.get_serializer_context(),
+        ))
+        return FileResponse(results, content_type='application/x-ndjson')
+
+    @action(methods=['POST'], detail=True, url_path='upload-image')
+    def upload_image(self, request, pk=None):
+        """Upload an image to recipe and thumbnail it in the background."""
+        # Must be set before the body is parsed: stream the file to disk.
+        request._request.upload_handlers = [
+            images.LimitedTemporaryFileUploadHandler(request._request),
+        ]
+        recipe = self.get_object()
+        previous = recipe.image.name
+        serializer = self.get_serializer(recipe, data=request.data)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            recipe = serializer.save(thumbnail='')
+            images.delete_image(previous)
+            images.schedule_thumbnail(recipe)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(methods=['GET'], detail=False, url_path='export')
+    def export(self, request):
+        """Stream every recipe of the user as NDJSON or CSV."""
+        output = request.query_params.get('output', 'ndjson')
+        if output not in EXPORT_FORMATS:
+            raise ValidationError(
+                {'output': f'Choose one of: {", ".join(EXPORT_FORMATS)}.'}
+            )
+
+        write_rows, content_type = EXPORT_FORMATS[output]
+        queryset = Recipe.objects.filter(user=request.user).order_by('id')
+        response = StreamingHttpResponse(
+            write_rows(queryset, settings.RECIPE_EXPORT_CHUNK_SIZE),
+            content_type=content_type,
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="recipes.{output}"'
+        )
+        return response
+
+    def perform_destroy(self, instance):
+        """Delete the recipe and then its image files."""
+        with transaction.atomic():
+            instance.delete()
+            images.delete_files([(instance.image.name, instance.thumbnail)])
+
     def perform_create(self, serializer):    # This method is the way that we override the behaviour for when DRF saves a model in view set. When we create a new object (new recipe) through the create feature of this model view set, we'll call this method as part of that object's creation
         """Create a new recipe."""
         serializer.save(user=self.request.user)  # This will set the user value to the current authenticated user when we save the object.
     # accepts a param called serializer and this should be a validated serializer. So we expect serializer data to be already validated by the view set before this method is called and thenthis method is called
 # This makes our test pass and ensure that new recipes are created have the correct user id assigned. Now rerun the test and it passes.
 
+
+@require_safe
+def recipe_thumbnail(request, digest):
+    """Serve a thumbnail by its content hash, cacheable forever."""
+    etag = f'"{digest}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        storage = images.get_thumbnail_storage()
+        try:
+            thumbnail = storage.open(images.thumbnail_name(digest))
+        except FileNotFoundError:
+            raise Http404('No such thumbnail.')
+        response = FileResponse(thumbnail, content_type='image/jpeg')
+    response['ETag'] = etag
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+
+ATTR_ORDERINGS = ('-name', 'name', '-recipe_count', 'recipe_count')
+
+
 # bcz we r going to have basic CRUD implementation, we'll use the viewset bcz its just simple to CRUD on a model
-class TagViewSet(mixins.DestroyModelMixin,   # implement feature for deleting the tag by adding another mixin that allow us to destroy. Run the test, it passes and => implemented the ability to delete models
-                 mixins.UpdateModelMixin,   # We need to modify the mixins so that we can have the update model mixin. ensure mixins are defined before the generic feature(so that it can override some behaviour),imp as defined in DRF documnetation. run test again, should pass.
-                 mixins.ListModelMixin,   # This is a mixin that allows u to add the listing functionality for listing models, generic viewset allows u to throw mixin so that we can have the viewset functionality that we desire for our articular API
-                 viewsets.GenericViewSet):
-    """Manage tags in the database."""
-    serializer_class = serializers.TagSerializer
-    queryset = Tag.objects.all()
-    authentication_classes = [TokenAuthentication]
-    permission_classes = [IsAuthenticated]
+@extend_schema_view(
+    list=extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'ordering',
+                OpenApiTypes.STR,
+                enum=ATTR_ORDERINGS,
+                description='Order by name or by number of recipes using '
+                            'the item (default -name).',
+            ),
+            OpenApiParameter(
+                'assigned_only',
+                OpenApiTypes.INT, enum=[0, 1],
+                description='Filter by items assigned to recipes.',
+            ),
+        ]
+    )
+)
+class BaseRecipeAttrViewSet(ReplicaRoutingMixin,
+                            CachedResponseMixin,
+                            mixins.DestroyModelMixin,   # implement feature for deleting the tag by adding another mixin that allow us to destroy. Run the test, it passes and => implemented the ability to delete models
+                            mixins.UpdateModelMixin,   # We need to modify the mixins so that we can have the update model mixin. ensure mixins are defined before the generic feature(so that it can override some behaviour),imp as defined in DRF documnetation. run test again, should pass.
+                            mixins.ListModelMixin,   # This is a mixin that allows u to add the listing functionality for listing models, generic viewset allows u to throw mixin so that we can have the viewset functionality that we desire for our articular API
+                            viewsets.GenericViewSet):
+    """Base viewset for recipe attributes."""
+    pagination_class = NameCursorPagination
+    authentication_classes = [CachedTokenAuthentication]   # adds the support for using token authentication, this i sthe only option for authentication on this viewset.
+    permission_classes = [IsAuthenticated]   # it means all users musyt be authenticated to use this endpt, u can't make request to the endpt. unless u r authenticated.
 
     # Now we need to override the get query set method that comes with our viewset to ensure we return only the queryset objects for the authenticated user, by default, it would return all of the different tags that exist in the db regardless of the user that created them. We wanna ensure that we filter them down to the user that created them.
     def get_queryset(self):
         """Filter queryset to authenticated user."""
-        return self.queryset.filter(user=self.request.user).order_by('-name')  # We like to be expilixit whil ereturning objects as sometimes depending on version or type of the db, it may return them in a different order, so u shoul=d always add a feature where the user can customize the order, so we hard coded so that oit orders by reverse name
+        queryset = self.queryset.filter(user=self.request.user).order_by('-name')  # We like to be expilixit whil ereturning objects as sometimes depending on version or type of the db, it may return them in a different order, so u shoul=d always add a feature where the user can customize the order, so we hard coded so that oit orders by reverse name
+        if self.action == 'list':
+            if self._assigned_only():
+                # A maintained counter, so no join or COUNT over recipes.
+                queryset = queryset.filter(recipe_count__gt=0)
+            ordering = self.get_cursor_ordering()
+            fields = self.get_serializer_class().Meta.fields
+            return queryset.order_by(*ordering).values(*dict.fromkeys([
+                *fields, *(name.lstrip('-') for name in ordering),
+            ]))
+        return queryset
+
+    def _assigned_only(self):
+        value = self.request.query_params.get('assigned_only', '0')
+        if value not in ('0', '1'):
+            raise ValidationError({'assigned_only': 'Expected 0 or 1.'})
+        return value == '1'
+
+    def get_cursor_ordering(self):
+        """Return the list ordering chosen with ?ordering=."""
+        ordering = self.request.query_params.get('ordering', '-name')
+        if ordering not in ATTR_ORDERINGS:
+            raise ValidationError(
+                {'ordering': f'Choose one of: {", ".join(ATTR_ORDERINGS)}.'}
+            )
+        # Names and counts both repeat; id keeps the cursor position stable.
+        return (ordering, ordering.replace(ordering.lstrip('-'), 'id'))
+
+    def destroy(self, request, *args, **kwargs):
+        """Delete the item, in the background if many recipes use it."""
+        instance = self.get_object()
+        if instance.recipe_count <= settings.DELETION_BATCH_SIZE:
+            self.perform_destroy(instance)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        # Listed until the job has unlinked every recipe and deleted it.
+        job = enqueue(
+            delete_linked,
+            owner=request.user,
+            model=instance._meta.model_name,
+            pk=instance.pk,
+        )
+        return Response(
+            JobSerializer(job).data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': reverse('job:job-detail', args=[job.pk])},
+        )
+
+    def perform_destroy(self, instance):
+        """Unlink the item from its recipes in batches, then delete it."""
+        Deletion(link_steps(instance)).run()
+        instance.delete()
+
+
+class TagViewSet(BaseRecipeAttrViewSet):
+    """Manage tags in the database."""
+    serializer_class = serializers.TagSerializer
+    queryset = Tag.objects.all()
 # Now add the URL mapping for this view.
 # Modify to support updating the tag items, can be done easily bcz we have viewset and we r using the mixins.
 
 
-class IngredientViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+class IngredientViewSet(BaseRecipeAttrViewSet):
     """Manage ingredients in the database."""
     serializer_class = serializers.IngredientSerializer  # specified th eserializer class and set it to our new ingredient serializer
     queryset = Ingredient.objects.all()  # sets our query set to the ingredients objects, it tells DRF what models we want to be manageable through the ingredient view set.
-    authentication_classes = [TokenAuthentication]   # adds the support for using token authentication, this i sthe only option for authentication on this viewset.
-    permission_classes = [IsAuthenticated]   # it means all users musyt be authenticated to use this endpt, u can't make request to the endpt. unless u r authenticated.
-# defined the ingredient viewset
-
-    def get_queryset(self):   # to filter the objects that are managed by this view set to the authenticated user. we only want users to view and update and make changes to their ingredients, not other user's ingredients
-        """Filter queryset to authenticated user."""
-        return self.queryset.filter(user=self.request.user).order_by('-name')   # wire this view to a url
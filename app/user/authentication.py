@@ -0,0 +1,39 @@
+"""
+Authentication classes for the APIs.
+"""
+import hashlib
+
+from django.core.cache import caches
+
+from rest_framework.authentication import TokenAuthentication
+
+
+CACHE_ALIAS = 'auth'
+
+
+def token_cache_key(key):
+    """Return the cache key for a token, without the raw token in it."""
+    return 'auth-token:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def forget_tokens(*keys):
+    """Drop cached lookups for the given token keys."""
+    caches[CACHE_ALIAS].delete_many([token_cache_key(key) for key in keys])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication that caches the token -> user lookup.
+
+    Entries are dropped when the token is deleted or its user is saved
+    (deactivation, password change, ...), see user.signals.
+    """
+
+    def authenticate_credentials(self, key):
+        cache = caches[CACHE_ALIAS]
+        cache_key = token_cache_key(key)
+        credentials = cache.get(cache_key)
+        if credentials is None:
+            # Failed lookups raise here and are never cached.
+            credentials = super().authenticate_credentials(key)
+            cache.set(cache_key, credentials)
+        return credentials
@@ -0,0 +1,90 @@
+"""
+Authentication backends for the user app.
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model, hashers
+from django.contrib.auth.backends import ModelBackend
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def _init_worker():
+    """Make Django usable in a freshly started pool process."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+    django.setup()
+
+
+def verify_password(password, encoded):
+    """Check password against encoded; return (valid, upgraded hash)."""
+    upgraded = []
+    valid = hashers.check_password(
+        password, encoded,
+        setter=lambda raw: upgraded.append(hashers.make_password(raw)),
+    )
+    return valid, (upgraded[0] if upgraded else None)
+
+
+def get_pool():
+    """Return this process's hashing pool, or None to hash inline."""
+    global _pool, _pool_pid
+    if settings.PASSWORD_HASH_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        # A pool inherited across fork() has no live workers.
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                initializer=_init_worker,
+            )
+            _pool_pid = os.getpid()
+    return _pool
+
+
+def shutdown_pool():
+    """Stop the hashing pool; the next hash starts a new one."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.shutdown()
+        _pool = None
+
+
+def run_hash(func, *args):
+    """Run a CPU-bound hashing call on the pool, or inline without one."""
+    pool = get_pool()
+    if pool is None:
+        return func(*args)
+    return pool.submit(func, *args).result()
+
+
+class PooledModelBackend(ModelBackend):
+    """ModelBackend that hashes passwords on a bounded process pool."""
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Hash anyway so unknown emails take as long as wrong passwords.
+            run_hash(hashers.make_password, password)
+            return None
+
+        valid, upgraded = run_hash(verify_password, password, user.password)
+        if not valid or not self.user_can_authenticate(user):
+            return None
+        if upgraded:
+            user.password = upgraded
+            user.save(update_fields=['password'])
+        return user
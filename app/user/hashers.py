@@ -0,0 +1,17 @@
+"""
+Password hashers for the user app.
+"""
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """PBKDF2 with the iteration count taken from settings.
+
+    The algorithm name is unchanged, so hashes with another iteration count
+    are flagged by must_update() and rehashed on the next login.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASH_ITERATIONS
@@ -25,13 +25,18 @@ class UserSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         """Update and return user."""
         password = validated_data.pop('password', None)
-        user =super().update(instance, validated_data)
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        update_fields = list(validated_data)
 
         if password:
-            user.set_password(password)
-            user.save()
+            instance.set_password(password)
+            update_fields.append('password')
+        # Only the submitted fields, so a concurrent change to the others
+        # (is_active, an admin password reset) is not written back.
+        instance.save(update_fields=update_fields)
 
-        return user
+        return instance
 
 
 class AuthTokenSerializer(serializers.Serializer):
@@ -0,0 +1,25 @@
+"""
+Signal handlers that invalidate cached token lookups.
+"""
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from user.authentication import forget_tokens
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    """Stop accepting a token as soon as it is deleted."""
+    forget_tokens(instance.key)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def forget_user_tokens(sender, instance, created, **kwargs):
+    """Re-check a user's tokens after any change to the user."""
+    if not created:
+        forget_tokens(
+            *Token.objects.filter(user=instance).values_list('key', flat=True)
+        )
@@ -0,0 +1,25 @@
+"""
+Background tasks for the user app.
+"""
+from django.contrib.auth import get_user_model
+
+from core import deletion
+from core.jobs import report_progress, task
+
+
+@task('user.delete_user')
+def delete_user(job, user_id):
+    """Delete a deactivated user and everything they own.
+
+    Retries pick up where the failed attempt stopped.
+    """
+    if not get_user_model().objects.filter(
+        pk=user_id, is_active=False,
+    ).exists():
+        return {'deleted': job.progress.get('deleted', {})}
+    deleted = deletion.delete_user(
+        user_id,
+        progress=lambda **progress: report_progress(job, **progress),
+        deleted=job.progress.get('deleted'),
+    )
+    return {'deleted': deleted}
@@ -0,0 +1,112 @@
+"""
+Tests for cached token authentication.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import exceptions, status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from user.authentication import CACHE_ALIAS, CachedTokenAuthentication
+
+
+ME_URL = reverse('user:me')
+
+TEST_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'api': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'test-api',
+    },
+    'auth': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'test-auth',
+    },
+}
+
+
+@override_settings(CACHES=TEST_CACHES)
+class CachedTokenAuthenticationTests(TestCase):
+    """Test the cached token -> user lookup."""
+
+    def setUp(self):
+        caches[CACHE_ALIAS].clear()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.auth = CachedTokenAuthentication()
+
+    def test_cache_hit_runs_no_queries(self):
+        """Test a repeated lookup is served from the cache."""
+        self.auth.authenticate_credentials(self.token.key)
+
+        with self.assertNumQueries(0):
+            user, token = self.auth.authenticate_credentials(self.token.key)
+
+        self.assertEqual(user, self.user)
+        self.assertEqual(token.key, self.token.key)
+
+    def test_deleted_token_rejected(self):
+        """Test a deleted token stops authenticating at once."""
+        key = self.token.key
+        self.auth.authenticate_credentials(key)
+        self.token.delete()
+
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.auth.authenticate_credentials(key)
+
+    def test_inactive_user_rejected(self):
+        """Test deactivating a user drops their cached tokens."""
+        self.auth.authenticate_credentials(self.token.key)
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_password_change_refreshes_user(self):
+        """Test a saved user is reloaded instead of served stale."""
+        self.auth.authenticate_credentials(self.token.key)
+        self.user.set_password('newpass123')
+        self.user.save()
+
+        with self.assertNumQueries(1):
+            user, _ = self.auth.authenticate_credentials(self.token.key)
+
+        self.assertTrue(user.check_password('newpass123'))
+
+    def test_token_header_authenticates_request(self):
+        """Test the API accepts a cached token header."""
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+        for _ in range(2):
+            res = client.get(ME_URL)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(res.data['email'], self.user.email)
+
+    def test_update_keeps_changes_made_after_caching(self):
+        """Test a profile update does not write back the cached user."""
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        client.get(ME_URL)
+        # Changed elsewhere, e.g. in another worker whose cache this is not.
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            password=make_password('newpass123'),
+        )
+
+        res = client.patch(ME_URL, {'name': 'New Name'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.name, 'New Name')
+        self.assertTrue(self.user.check_password('newpass123'))
+        self.assertFalse(self.user.check_password('testpass123'))
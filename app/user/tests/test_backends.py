@@ -0,0 +1,71 @@
+"""
+Tests for password hashing and the pooled authentication backend.
+"""
+from django.contrib.auth import authenticate, get_user_model
+from django.test import TestCase, override_settings
+
+from user import backends
+
+
+EMAIL = 'user@example.com'
+PASSWORD = 'testpass123'
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000, PASSWORD_HASH_WORKERS=0)
+class PooledModelBackendTests(TestCase):
+    """Test logging in through PooledModelBackend."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email=EMAIL, password=PASSWORD,
+        )
+
+    def tearDown(self):
+        backends.shutdown_pool()
+
+    def test_hash_uses_configured_iterations(self):
+        """Test new hashes use PASSWORD_HASH_ITERATIONS."""
+        algorithm, iterations, _, _ = self.user.password.split('$')
+
+        self.assertEqual(algorithm, 'pbkdf2_sha256')
+        self.assertEqual(iterations, '1000')
+
+    def test_login_rehashes_with_new_iterations(self):
+        """Test a login upgrades a hash stored with another work factor."""
+        with self.settings(PASSWORD_HASH_ITERATIONS=2000):
+            user = authenticate(username=EMAIL, password=PASSWORD)
+
+        self.assertEqual(user, self.user)
+        user.refresh_from_db()
+        self.assertEqual(user.password.split('$')[1], '2000')
+        self.assertTrue(user.check_password(PASSWORD))
+
+    def test_wrong_password_rejected(self):
+        """Test a wrong password does not authenticate or rehash."""
+        stored = self.user.password
+
+        with self.settings(PASSWORD_HASH_ITERATIONS=2000):
+            user = authenticate(username=EMAIL, password='wrong-pass')
+
+        self.assertIsNone(user)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.password, stored)
+
+    def test_unknown_or_inactive_user_rejected(self):
+        """Test unknown and inactive users do not authenticate."""
+        self.assertIsNone(
+            authenticate(username='other@example.com', password=PASSWORD)
+        )
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertIsNone(authenticate(username=EMAIL, password=PASSWORD))
+
+    def test_login_on_process_pool(self):
+        """Test hashing runs on the pool when workers are configured."""
+        with self.settings(PASSWORD_HASH_WORKERS=1):
+            user = authenticate(username=EMAIL, password=PASSWORD)
+            pool = backends.get_pool()
+
+        self.assertEqual(user, self.user)
+        self.assertIsNotNone(pool)
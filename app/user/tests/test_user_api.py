@@ -5,9 +5,13 @@ from django.test import TestCase
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 
+from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from core.jobs import Worker
+from core.models import Job
+
 
 CREATE_USER_URL = reverse('user:create')
 TOKEN_URL = reverse('user:token')
@@ -154,4 +158,29 @@ class PrivateUserApiTests(TestCase):
         self.user.refresh_from_db()
         self.assertEqual(self.user.name, payload['name'])
         self.assertTrue(self.user.check_password, (payload['password']))
-        self.assertEqual(res.status_code, status.HTTP_200_OK)
\ No newline at end of file
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_delete_user_in_background(self):
+        """Test deleting the user is accepted and done by a job."""
+        token = Token.objects.create(user=self.user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        res = client.delete(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(res.data['status'], Job.Status.QUEUED)
+        self.assertTrue(res['Location'].endswith(f'/{res.data["id"]}/'))
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        res = client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        Worker(concurrency=0).run(burst=True)
+
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.Status.SUCCEEDED)
+        self.assertIsNone(job.user)
+        self.assertFalse(
+            get_user_model().objects.filter(pk=self.user.pk).exists()
+        )
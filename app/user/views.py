@@ -1,10 +1,19 @@
 """
 Views for the user API.
 """
-from rest_framework import generics, authentication, permissions
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.urls import reverse
+
+from rest_framework import generics, permissions, status
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
 
+from core.jobs import enqueue
+from job.serializers import JobSerializer
+from user.authentication import CachedTokenAuthentication
+from user.tasks import delete_user
 from user.serializers import (
     UserSerializer,
     AuthTokenSerializer,
@@ -22,12 +31,30 @@ class CreateTokenView(ObtainAuthToken):
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
 
 
-class ManageUserView(generics.RetrieveUpdateAPIView):
+class ManageUserView(generics.RetrieveUpdateDestroyAPIView):
     """Manage the authenticated user."""
     serializer_class = UserSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        """Retrieve and return the authenticated user."""
-        return self.request.user
\ No newline at end of file
+        """Retrieve and return the authenticated user.
+
+        request.user may be a cached snapshot; writes start from the row.
+        """
+        if self.request.method in permissions.SAFE_METHODS:
+            return self.request.user
+        return get_user_model().objects.get(pk=self.request.user.pk)
+
+    def destroy(self, request, *args, **kwargs):
+        """Deactivate the user now and delete their data in the background."""
+        user = self.get_object()
+        with transaction.atomic():
+            user.is_active = False
+            user.save(update_fields=['is_active'])  # revokes their tokens
+            job = enqueue(delete_user, owner=user, user_id=user.pk)
+        return Response(
+            JobSerializer(job).data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': reverse('job:job-detail', args=[job.pk])},
+        )